@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from recipeApp.conditional import track_model_versions
+        from authentication import signals
+        from authentication.models import UserProfile
+
+        track_model_versions(get_user_model(), UserProfile, UserProfile.saved_recipes.through)
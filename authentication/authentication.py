@@ -0,0 +1,87 @@
+"""This module contains the JWT authentication of the API, which caches the authenticated user with their profile or
+nutritionist role.
+
+JWTAuthentication loads the user row on every request, and views then lazily load request.user.profile or
+request.user.nutritionist. CachedJWTAuthentication loads the user with both relations in one query and caches them
+for AUTH_USER_CACHE_TIMEOUT seconds, under a key made of the user id and a per-user version. Saving or deleting the
+user, e.g. on a password change, their profile or their nutritionist row bumps the version once the transaction
+commits, so a request that loaded the user before the write can never cache stale data under the new version.
+Writes that bypass the model signals, such as QuerySet.update(), call invalidate_cached_user() themselves.
+"""
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_KEY = "auth-user:{}:{}"
+USER_VERSION_KEY = "auth-user-version:{}"
+
+User = get_user_model()
+
+
+def get_user_version(user_id):
+    """Returns the version of the user's cache entry, starting a missing counter at the current time so that a
+    counter lost by the cache never goes back to a previously issued value.
+    """
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_user(user_id):
+    """Bumps the version of the user's cache entry once the current transaction commits.
+    """
+    def bump():
+        key = USER_VERSION_KEY.format(user_id)
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving the user, their profile and their nutritionist role in one cached query.
+    """
+    def load_user(self, user_id):
+        try:
+            return User.objects.select_related("profile", "nutritionist").get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = USER_KEY.format(user_id, get_user_version(user_id))
+        user = cache.get(key)
+
+        if user is None:
+            user = self.load_user(user_id)
+            cache.set(key, user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
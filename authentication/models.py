@@ -42,6 +42,12 @@ class UserProfile(models.Model):
 
     objects = UserProfileManager()
 
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["id"], name="userprofile_verified_idx", condition=models.Q(is_verified=True)),
+        ]
+
     def __str__(self):
         return self.user.username
     
@@ -0,0 +1,26 @@
+"""This module contains the signal receivers that invalidate the cached users of CachedJWTAuthentication.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from authentication.authentication import invalidate_cached_user
+from authentication.models import UserProfile
+from nutritionists.models import Nutritionist
+
+
+User = get_user_model()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Covers password changes too, as set_password() is followed by a save.
+    """
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Nutritionist)
+@receiver(post_delete, sender=Nutritionist)
+def invalidate_user_role(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
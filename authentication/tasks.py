@@ -38,4 +38,5 @@ def send_verification_email(recepient_email, verification_url):
 
     except Exception as error:
         logger.error(f"Error in sending verification email.\n{error}")
+        raise
 
@@ -1,3 +1,170 @@
+"""This module contains the tests of the authentication app.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.authentication import CachedJWTAuthentication
+from authentication.models import UserProfile
+from authentication.views import UserListAPIView
+from recipes.models import Recipe
+from recipeApp.testing import QueryPlanAssertionsMixin
 
-# Create your tests here.
+
+User = get_user_model()
+
+class UserProfileQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAINs the first page of the verified user list and fails when it regresses to a sequential scan.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+
+        for index in range(20):
+            user = User.objects.create_user(username=f"user-{index}", password=None)
+            UserProfile.objects.create(user=user, is_verified=index % 2 == 0)
+
+    def test_verified_profiles(self):
+        queryset = self.get_page_queryset(UserListAPIView, self.admin)
+        self.assertUsesIndex(queryset, ["userprofile_verified_idx"])
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Checks that users are loaded with their profile in one query, cached, and reloaded after they change.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.token = AccessToken.for_user(self.user)
+
+    def tearDown(self):
+        # Cached users outlive the rolled back rows, whose ids the next tests reuse.
+        cache.clear()
+
+    def authenticate(self):
+        return CachedJWTAuthentication().get_user(self.token)
+
+    def test_loads_profile_with_user(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+            self.assertEqual(user.profile, self.profile)
+            self.assertFalse(hasattr(user, "nutritionist"))
+
+    def test_caches_user(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().profile, self.profile)
+
+    def test_user_change_invalidates(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_profile_change_invalidates(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.is_verified = True
+            self.profile.save()
+
+        self.assertTrue(self.authenticate().profile.is_verified)
+
+
+class UserDetailConditionalGetTests(TestCase):
+    """Polls the user detail with its ETag, and checks that only writes to the user's own rows change it.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        cls.other = UserProfile.objects.create(user=User.objects.create_user(username="other", password=None))
+        cls.recipe, cls.other_recipe = [
+            Recipe.objects.create(creator=cls.other, title=title, ingredients="egg", instructions="Boil the egg.")
+            for title in ["Boiled egg", "Fried egg"]
+        ]
+        cls.profile.saved_recipes.add(cls.recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        response = self.client.get(reverse("user-detail"), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.etag = response.headers["ETag"]
+
+    def tearDown(self):
+        cache.clear()
+
+    def poll(self):
+        return self.client.get(reverse("user-detail"), headers={**self.headers, "If-None-Match": self.etag})
+
+    def assertModified(self):
+        response = self.poll()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], self.etag)
+        return response.json()
+
+    def test_saved_recipes_are_complete(self):
+        recipe = self.client.get(reverse("user-detail"), headers=self.headers).json()["saved_recipes"][0]
+        self.assertEqual((recipe["ingredients"], recipe["instructions"]), ("egg", "Boil the egg."))
+        self.assertNotIn("excerpt", recipe)
+
+    def test_unchanged_profile(self):
+        response = self.poll()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], self.etag)
+
+    def test_unrelated_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_recipe.title = "Scrambled egg"
+            self.other_recipe.save()
+            self.other.saved_recipes.add(self.recipe)
+            self.other.is_verified = True
+            self.other.save()
+            Recipe.objects.create(creator=self.other, title="Poached egg", ingredients="egg", instructions="Poach.")
+
+        self.assertEqual(self.poll().status_code, 304)
+
+    def test_profile_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.is_verified = True
+            self.profile.save()
+
+        self.assertTrue(self.assertModified()["is_verified"])
+
+    def test_user_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.email = "cook@example.com"
+            self.user.save()
+
+        self.assertEqual(self.assertModified()["user"]["email"], "cook@example.com")
+
+    def test_saved_recipes_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.saved_recipes.add(self.other_recipe)
+
+        self.assertEqual(len(self.assertModified()["saved_recipes"]), 2)
+
+    def test_saved_recipe_swapped(self):
+        through = UserProfile.saved_recipes.through
+        through.objects.filter(userprofile=self.profile).update(recipe=self.other_recipe)
+
+        self.assertEqual(self.assertModified()["saved_recipes"][0]["id"], self.other_recipe.id)
+
+    def test_saved_recipe_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.title = "Soft boiled egg"
+            self.recipe.save()
+
+        self.assertEqual(self.assertModified()["saved_recipes"][0]["title"], "Soft boiled egg")
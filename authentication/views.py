@@ -2,6 +2,7 @@
 """
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Sum
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from rest_framework.exceptions import ValidationError
@@ -11,7 +12,7 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.authentication import CachedJWTAuthentication, get_user_version
 from authentication.models import UserProfile
 from authentication.serializers import (
     CustomTokenObtainPairSerializer,
@@ -22,6 +23,8 @@ from authentication.serializers import (
 from authentication.token import account_activation_token
 from authentication.tasks import send_verification_email
 from authentication.utils import generate_verification_url
+from recipeApp.conditional import ConditionalGetMixin
+from recipeApp.query_plans import QueryPlanMixin
 
 
 User = get_user_model()
@@ -106,7 +109,7 @@ class UserDeleteAPIView(DestroyAPIView):
     """
     queryset = User.objects.all()
     serializer_class = UserUpdateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     lookup_field = "username"
 
@@ -147,34 +150,47 @@ class UserCreateAPIView(CreateAPIView):
         )
 
 
-class UserListAPIView(ListAPIView):
+class UserListAPIView(QueryPlanMixin, ListAPIView):
     """Lists all the user profiles, verified and unverified.
     """
     serializer_class = CustomUserProfileSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
         return UserProfile.objects.filter(is_verified=True)
 
 
-class UserDetailAPIView(RetrieveAPIView):
-    """Retrieves the user profile.
+class UserDetailAPIView(ConditionalGetMixin, QueryPlanMixin, RetrieveAPIView):
+    """Retrieves the user profile. An unchanged profile is answered with 304 Not Modified.
+
+    The validator is scoped to the requesting user: the cache version of their user and profile rows, bumped on every
+    write to them, and one aggregate of their saved recipes that changes when a recipe is saved, unsaved or modified.
     """
-    queryset = UserProfile.objects.prefetch_related("saved_recipes")
+    queryset = UserProfile.objects.all()
     serializer_class = UserProfileCreateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_conditional_state(self):
+        user_id = self.request.user.pk
+        saved = UserProfile.saved_recipes.through.objects.filter(userprofile__user_id=user_id).aggregate(
+            count=Count("pk"),
+            last_id=Max("pk"),
+            recipe_ids=Sum("recipe_id"),
+            last_modified=Max("recipe__modified_at"),
+        )
+        return [get_user_version(user_id), saved["count"], saved["last_id"], saved["recipe_ids"], saved["last_modified"]]
+
     def get_object(self):
-        return UserProfile.objects.get(user=self.request.user)
+        return self.filter_queryset(self.get_queryset()).get(user=self.request.user)
 
 
 class UserUpdateAPIView(UpdateAPIView):
     """Updates a user profile.
     """
     serializer_class = UserUpdateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
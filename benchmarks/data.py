@@ -0,0 +1,181 @@
+"""This module generates synthetic catalogue data for the benchmark commands.
+
+Seeded data follows skewed distributions: a few prolific creators and nutritionists write most of the recipes and
+blogs, and saves follow a Zipf distribution over the public recipes, so that a few popular recipes collect most of
+them while most users save only a handful.
+"""
+from collections import Counter
+from itertools import accumulate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from authentication.models import UserProfile
+from blogs.constants import APPROVED, PENDING, REJECTED
+from blogs.models import Blog
+from nutritionists.models import Nutritionist
+from recipes.ingredients import index_recipes
+from recipes.models import Recipe
+from recipes.saved_recipes import adjust_save_counts
+from recipeApp.conditional import bump_model_versions
+
+
+User = get_user_model()
+
+SEED_USERNAME = "seed-user-{}"
+SEED_NUTRITIONIST_USERNAME = "seed-nutritionist-{}"
+SEED_PASSWORD = "seed-password"
+QUALIFICATIONS = ["BSc Nutrition", "MSc Dietetics", "Registered Dietitian", "PhD Food Science", "Sports Nutritionist"]
+
+INGREDIENTS = [
+    "chicken", "beef", "lamb", "salmon", "shrimp", "tofu", "egg", "milk", "butter", "cream", "cheese", "yogurt",
+    "flour", "rice", "pasta", "bread", "potato", "onion", "garlic", "ginger", "tomato", "spinach", "carrot",
+    "pepper", "chili", "lemon", "lime", "honey", "sugar", "salt", "cumin", "turmeric", "paprika", "basil",
+    "oregano", "thyme", "coriander", "mint", "mushroom", "broccoli", "lentils", "chickpeas", "soy sauce",
+    "olive oil", "vinegar", "coconut milk", "almonds", "walnuts", "oats", "banana", "apple", "strawberry",
+]
+DISHES = [
+    "curry", "stew", "salad", "soup", "stir fry", "casserole", "roast", "pie", "tart", "smoothie", "kebab",
+    "biryani", "karahi", "pulao", "teriyaki", "steak", "omelette", "pancakes", "risotto", "wrap", "burger",
+]
+STYLES = ["spicy", "creamy", "grilled", "baked", "smoky", "crispy", "quick", "classic", "garlic butter", "lemon herb"]
+STEPS = [
+    "Preheat the oven", "Chop the {0} finely", "Marinate the {0} for an hour", "Fry the {0} until golden",
+    "Simmer with the {0} on low heat", "Whisk the {0} together", "Season with {0} to taste", "Bake until set",
+    "Serve hot with {0}", "Rest for ten minutes before slicing",
+]
+
+
+def recipe_text(rng):
+    """Returns a (title, ingredients, instructions) triple with a realistic length and vocabulary.
+    """
+    main = rng.choice(INGREDIENTS)
+    title = f"{rng.choice(STYLES)} {main} {rng.choice(DISHES)}".title()
+    used = [main] + rng.sample(INGREDIENTS, rng.randint(3, 10))
+    ingredients = "\n".join(f"{rng.randint(1, 4)} cups {ingredient}" for ingredient in used)
+    instructions = " ".join(
+        f"{rng.choice(STEPS).format(rng.choice(used))}." for _ in range(rng.randint(4, 12))
+    )
+    return title, ingredients, instructions
+
+
+def zipf_weights(count, exponent=1.1):
+    """Returns the cumulative weights of a Zipf distribution over count ranks, for random.choices().
+    """
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def choose(rng, population, weights=None):
+    return rng.choice(population) if weights is None else rng.choices(population, cum_weights=weights)[0]
+
+
+def build_recipe(rng, creators, public_ratio=0.8, weights=None):
+    title, ingredients, instructions = recipe_text(rng)
+    return Recipe(
+        creator=choose(rng, creators, weights),
+        title=title,
+        ingredients=ingredients,
+        instructions=instructions,
+        is_public=rng.random() < public_ratio,
+    )
+
+
+def build_blog(rng, nutritionists, approved_ratio=0.7, weights=None):
+    title, ingredients, instructions = recipe_text(rng)
+    return Blog(
+        nutritionist=choose(rng, nutritionists, weights),
+        title=f"Why {title} works",
+        content=f"{instructions}\n\n{ingredients}",
+        status=APPROVED if rng.random() < approved_ratio else rng.choice([PENDING, REJECTED]),
+    )
+
+
+def insert_in_batches(model, build, count, batch_size=5000):
+    """Builds and bulk inserts count rows in batches so that memory stays flat for million-row seeds.
+    """
+    for start in range(0, count, batch_size):
+        model.objects.bulk_create([build() for _ in range(min(batch_size, count - start))])
+
+
+def seed_users(count, username, batch_size=5000):
+    """Bulk inserts count users that share the password SEED_PASSWORD, hashed once, and returns them.
+    """
+    password = make_password(SEED_PASSWORD)
+    users = []
+
+    for start in range(0, count, batch_size):
+        users += User.objects.bulk_create([
+            User(username=username.format(index), email=f"{username.format(index)}@example.com", password=password)
+            for index in range(start, min(start + batch_size, count))
+        ])
+    return users
+
+
+def seed_profiles(rng, users, verified_ratio=0.9, batch_size=5000):
+    return UserProfile.objects.bulk_create(
+        [UserProfile(user=user, is_verified=rng.random() < verified_ratio) for user in users], batch_size=batch_size
+    )
+
+
+def seed_nutritionists(rng, users, verified_ratio=0.8, batch_size=5000):
+    return Nutritionist.objects.bulk_create(
+        [
+            Nutritionist(
+                user=user,
+                qualification=rng.choice(QUALIFICATIONS),
+                years_of_experience=min(int(rng.expovariate(1 / 6)), 40),
+                is_verified=rng.random() < verified_ratio,
+            )
+            for user in users
+        ],
+        batch_size=batch_size,
+    )
+
+
+def seed_recipes(rng, creators, count, batch_size=5000):
+    """Bulk inserts count recipes, most of them by a few prolific creators, with their ingredient index entries.
+    Returns the ids of the public recipes.
+    """
+    weights = zipf_weights(len(creators))
+    public_ids = []
+
+    for start in range(0, count, batch_size):
+        recipes = Recipe.objects.bulk_create([
+            build_recipe(rng, creators, weights=weights) for _ in range(min(batch_size, count - start))
+        ])
+        index_recipes(recipes)
+        public_ids += [recipe.pk for recipe in recipes if recipe.is_public]
+
+    bump_model_versions(Recipe)
+    return public_ids
+
+
+def seed_blogs(rng, nutritionists, count, batch_size=5000):
+    weights = zipf_weights(len(nutritionists))
+    insert_in_batches(Blog, lambda: build_blog(rng, nutritionists, weights=weights), count, batch_size)
+    bump_model_versions(Blog)
+
+
+def seed_saves(rng, profiles, recipe_ids, mean_saves, batch_size=5000):
+    """Saves recipes for every profile, an exponentially distributed number of them with the given mean, picked by
+    Zipf popularity. Updates the save counts and returns the number of saves.
+    """
+    through = UserProfile.saved_recipes.through
+    popularity = rng.sample(recipe_ids, len(recipe_ids))
+    weights = zipf_weights(len(popularity))
+    counts = Counter()
+    rows = []
+
+    for profile in profiles:
+        count = min(int(rng.expovariate(1 / mean_saves)), len(popularity)) if mean_saves and popularity else 0
+
+        for recipe_id in set(rng.choices(popularity, cum_weights=weights, k=count)):
+            rows.append(through(userprofile_id=profile.pk, recipe_id=recipe_id))
+            counts[recipe_id] += 1
+
+        if len(rows) >= batch_size:
+            through.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+
+    through.objects.bulk_create(rows, ignore_conflicts=True)
+    adjust_save_counts(counts)
+    bump_model_versions(through)
+    return sum(counts.values())
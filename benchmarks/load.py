@@ -0,0 +1,309 @@
+"""This module drives API endpoints with concurrent clients and builds the load benchmark report.
+
+Clients either call the real URL conf in process through the Django test client, or send HTTP requests to a server,
+by default a local threaded WSGI server started for the run. Every request records its latency, status and, when
+the server runs in this process, its query count. The report has the p50/p95/p99 latency, the throughput, the
+queries per request and the peak memory of a single request per endpoint, and is saved as JSON so that runs can be
+diffed.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+import requests
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from benchmarks.data import SEED_PASSWORD, SEED_USERNAME
+
+
+IN_PROCESS = "in-process"
+LIVE = "live"
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+@dataclass
+class Endpoint:
+    method: str
+    url_name: str
+    params: dict = field(default_factory=dict)
+    data: dict = None
+    authenticated: bool = True
+
+    @property
+    def path(self):
+        return reverse(self.url_name)
+
+    @property
+    def url(self):
+        return f"{self.path}?{urlencode(self.params)}" if self.params else self.path
+
+
+ENDPOINTS = {
+    "recipes-public": Endpoint("GET", "recipe-public-list"),
+    "blogs-approved": Endpoint("GET", "blog-approved-list"),
+    "users-login": Endpoint(
+        "POST",
+        "user-login",
+        data={"username": SEED_USERNAME.format(0), "password": SEED_PASSWORD},
+        authenticated=False,
+    ),
+    # Identical ingredients are answered from the generation cache after the warmup request, so this measures the
+    # API around the model rather than the model itself.
+    "recipes-generate": Endpoint("POST", "recipe-generate", data={"ingredients": "chicken, garlic, lemon, rice"}),
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+def get_token(user):
+    return str(RefreshToken.for_user(user).access_token)
+
+
+class InProcessClient:
+    """Calls the URL conf through the Django test client and counts the queries of each request.
+    """
+    def __init__(self, token):
+        self.client = Client(raise_request_exception=False, HTTP_HOST=get_host())
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def request(self, endpoint):
+        counter = QueryCounter()
+        headers = self.headers if endpoint.authenticated else {}
+        data = json.dumps(endpoint.data) if endpoint.data is not None else ""
+
+        with connection.execute_wrapper(counter):
+            response = self.client.generic(
+                endpoint.method, endpoint.url, data, content_type="application/json", headers=headers
+            )
+        return response.status_code, counter.count
+
+    def close(self):
+        connection.close()
+
+
+class LiveClient:
+    """Sends HTTP requests to a server. Query counts are only known when the server sends them back.
+    """
+    def __init__(self, token, url):
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.url = url.rstrip("/")
+
+    def request(self, endpoint):
+        headers = {"Host": get_host()}
+
+        if not endpoint.authenticated:
+            headers["Authorization"] = None
+
+        response = self.session.request(endpoint.method, f"{self.url}{endpoint.url}", json=endpoint.data, headers=headers)
+        count = response.headers.get(QUERY_COUNT_HEADER)
+        return response.status_code, int(count) if count is not None else None
+
+    def close(self):
+        self.session.close()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def count_queries(application):
+    """Wraps a WSGI application to send the number of queries of each request in the X-Query-Count header.
+    """
+    def counting_application(environ, start_response):
+        counter = QueryCounter()
+
+        def counting_start_response(status, headers, exc_info=None):
+            return start_response(status, [*headers, (QUERY_COUNT_HEADER, str(counter.count))], exc_info)
+
+        with connection.execute_wrapper(counter):
+            return application(environ, counting_start_response)
+
+    return counting_application
+
+
+class LocalServer:
+    """Serves the WSGI application on a free local port in a background thread for the duration of a with block.
+    """
+    def __enter__(self):
+        self.server = ThreadedWSGIServer(("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=True)
+        self.server.set_app(count_queries(get_internal_wsgi_application()))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_worker(make_client, endpoint, count):
+    client = make_client()
+    samples = []
+
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            status_code, queries = client.request(endpoint)
+            samples.append((time.perf_counter() - started, status_code, queries))
+    finally:
+        client.close()
+        connections.close_all()
+    return samples
+
+
+def run_endpoint(make_client, endpoint, requests, concurrency):
+    """Sends the requests from concurrent clients and returns the (latency, status, queries) samples and the wall
+    time.
+    """
+    counts = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda count: run_worker(make_client, endpoint, count), counts))
+    return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+
+def measure_peak_memory(make_client, endpoint):
+    """Returns the peak memory allocated, in KiB, while serving a single request.
+    """
+    client = make_client()
+
+    try:
+        tracemalloc.start()
+        client.request(endpoint)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        client.close()
+    return round(peak / 1024, 1)
+
+
+def summarize(endpoint, samples, elapsed, peak_memory):
+    latencies = sorted(latency * 1000 for latency, _, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    status_codes = {}
+
+    for _, status_code, _ in samples:
+        status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "method": endpoint.method,
+        "path": endpoint.path,
+        "requests": len(samples),
+        "errors": sum(count for code, count in status_codes.items() if int(code) >= 400),
+        "status_codes": status_codes,
+        "latency_ms": {
+            "p50": round(percentiles[49], 2),
+            "p95": round(percentiles[94], 2),
+            "p99": round(percentiles[98], 2),
+            "mean": round(statistics.fmean(latencies), 2),
+            "max": round(latencies[-1], 2),
+        },
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "queries_per_request": {
+            "mean": round(statistics.fmean(queries), 2),
+            "max": max(queries),
+        } if queries else None,
+        "peak_memory_kb": peak_memory,
+    }
+
+
+def get_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(user, endpoint_names, mode, requests, concurrency, warmup, url=None, progress=None):
+    """Benchmarks the named endpoints for the given user and returns the report.
+    """
+    report = {
+        "started_at": timezone.now().isoformat(),
+        "revision": get_revision(),
+        "mode": mode,
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "database": connection.vendor,
+        "debug": settings.DEBUG,
+        "python": platform.python_version(),
+        "endpoints": {},
+    }
+
+    for name in endpoint_names:
+        endpoint = ENDPOINTS[name]
+        token = get_token(user)
+
+        if mode == IN_PROCESS:
+            make_client = lambda: InProcessClient(token)
+        else:
+            make_client = lambda: LiveClient(token, url)
+
+        run_worker(make_client, endpoint, warmup)
+        samples, elapsed = run_endpoint(make_client, endpoint, requests, concurrency)
+        peak_memory = measure_peak_memory(lambda: InProcessClient(token), endpoint)
+        report["endpoints"][name] = summarize(endpoint, samples, elapsed, peak_memory)
+
+        if progress:
+            progress(name, report["endpoints"][name])
+    return report
+
+
+def run_live_benchmark(user, endpoint_names, requests, concurrency, warmup, url=None, progress=None):
+    """Benchmarks over HTTP, against url or against a local server started for the run.
+    """
+    if url:
+        return run_benchmark(user, endpoint_names, LIVE, requests, concurrency, warmup, url, progress)
+
+    with LocalServer() as server:
+        return run_benchmark(user, endpoint_names, LIVE, requests, concurrency, warmup, server.url, progress)
+
+
+def compare_reports(report, baseline):
+    """Returns the relative change of the p95 latency and the throughput of every endpoint present in both reports.
+    """
+    changes = {}
+
+    for name, result in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+
+        if previous is None:
+            continue
+
+        changes[name] = {
+            "p95": result["latency_ms"]["p95"] / previous["latency_ms"]["p95"] - 1
+            if previous["latency_ms"]["p95"] else None,
+            "throughput": result["throughput_rps"] / previous["throughput_rps"] - 1
+            if previous["throughput_rps"] else None,
+        }
+    return changes
@@ -0,0 +1,71 @@
+"""This module contains the command that load tests API endpoints and saves the report as JSON.
+"""
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from benchmarks.data import SEED_USERNAME
+from benchmarks.load import ENDPOINTS, IN_PROCESS, LIVE, compare_reports, run_benchmark, run_live_benchmark
+
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Load tests API endpoints with concurrent clients, in process or over HTTP, and saves the p50/p95/p99 " \
+        "latency, throughput, queries per request and peak memory of each endpoint as JSON. Run seed_data first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument("--mode", choices=[IN_PROCESS, LIVE], default=IN_PROCESS)
+        parser.add_argument("--url", help="Server to load test in live mode, defaults to a local server.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=5, help="Requests per endpoint before measuring.")
+        parser.add_argument("--username", default=SEED_USERNAME.format(0), help="User the requests authenticate as.")
+        parser.add_argument("--output", help="Report file, defaults to benchmark-endpoints-<mode>-<time>.json.")
+        parser.add_argument("--baseline", help="Previous report to compare the p95 latency and throughput with.")
+
+    def print_result(self, name, result):
+        latency = result["latency_ms"]
+        queries = result["queries_per_request"]
+        self.stdout.write(
+            f"  {name:<18} p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms"
+            f"  {result['throughput_rps']:8.1f} req/s  {queries['mean'] if queries else '-':>5} queries"
+            f"  {result['peak_memory_kb']:8.1f} KiB  {result['errors']} errors"
+        )
+
+    def handle(self, *args, **options):
+        if options["url"] and options["mode"] != LIVE:
+            raise CommandError("--url requires --mode live.")
+
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        user = User.objects.filter(username=options["username"]).first()
+
+        if user is None:
+            raise CommandError(f"User {options['username']!r} not found, run seed_data first.")
+
+        arguments = [user, options["endpoints"], options["requests"], options["concurrency"], options["warmup"]]
+        self.stdout.write(f"{options['mode']}, {options['requests']} requests, concurrency {options['concurrency']}")
+
+        if options["mode"] == LIVE:
+            report = run_live_benchmark(*arguments, url=options["url"], progress=self.print_result)
+        else:
+            report = run_benchmark(user, options["endpoints"], IN_PROCESS, *arguments[2:], progress=self.print_result)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                report["baseline"] = options["baseline"]
+                report["changes"] = compare_reports(report, json.load(baseline_file))
+
+            for name, change in report["changes"].items():
+                p95 = f"{change['p95']:+.1%}" if change["p95"] is not None else "-"
+                throughput = f"{change['throughput']:+.1%}" if change["throughput"] is not None else "-"
+                self.stdout.write(f"  {name:<18} p95 {p95}  throughput {throughput} vs baseline")
+
+        output = options["output"] or f"benchmark-endpoints-{options['mode']}-{timezone.now():%Y%m%d%H%M%S}.json"
+
+        with open(output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report saved to {output}"))
@@ -0,0 +1,74 @@
+"""This module contains the command that compares page number and keyset pagination on the public recipe list.
+"""
+import random
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from authentication.models import UserProfile
+from benchmarks.data import build_recipe, insert_in_batches
+from recipes.models import Recipe
+from recipes.views import PublicRecipeListAPIView
+from recipeApp.pagination import DEFAULT_CURSOR_ORDERING, encode_cursor
+
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Benchmarks the latency of shallow and deep pages of /recipes/public/ with page number and keyset " \
+        "pagination. Seeded rows are rolled back at the end."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=125_000)
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 5000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def time_request(self, user, params, repeat):
+        view = PublicRecipeListAPIView.as_view()
+        timings = []
+
+        for _ in range(repeat):
+            request = APIRequestFactory().get("/recipes/public/", params, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+
+            if response.status_code != 200:
+                raise CommandError(f"Unexpected status {response.status_code} for {params}.")
+        return statistics.median(timings)
+
+    def cursor_for_page(self, page, page_size):
+        """Returns the cursor that the keyset paginator would have produced for the last row before the page.
+        """
+        if page == 1:
+            return {"pagination": "cursor"}
+
+        fields = [field.lstrip("-") for field in DEFAULT_CURSOR_ORDERING]
+        position = Recipe.objects.filter(is_public=True).order_by(*DEFAULT_CURSOR_ORDERING).values_list(
+            *fields
+        )[(page - 1) * page_size - 1]
+        return {"cursor": encode_cursor(list(position))}
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        page_size = api_settings.PAGE_SIZE
+
+        with transaction.atomic():
+            user = User.objects.create_user(username="benchmark-pagination", password=None)
+            creators = [UserProfile.objects.create(user=user)]
+            insert_in_batches(Recipe, lambda: build_recipe(rng, creators, public_ratio=1.0), options["rows"])
+            self.stdout.write(f"{options['rows']:,} public recipes, {page_size} per page")
+
+            for page in options["pages"]:
+                offset = self.time_request(user, {"page": page}, options["repeat"])
+                keyset = self.time_request(user, self.cursor_for_page(page, page_size), options["repeat"])
+                self.stdout.write(f"  page {page:>6}   page number {offset:8.1f} ms   keyset {keyset:8.1f} ms")
+
+            transaction.set_rollback(True)
@@ -0,0 +1,71 @@
+"""This module contains the command that compares the full-text search filter with the DRF SearchFilter.
+"""
+import random
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from authentication.models import UserProfile
+from benchmarks.data import build_recipe, insert_in_batches
+from recipes.constants import SEARCH_FIELDS
+from recipes.models import Recipe
+from recipeApp.search import FullTextSearchFilter
+
+
+User = get_user_model()
+
+class SearchView:
+    search_fields = SEARCH_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Benchmarks recipe search with the icontains SearchFilter and the full-text search filter. Seeded rows " \
+        "are rolled back at the end."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--queries", nargs="+", default=["chicken", "garlic butter", "smoky lamb karahi"])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def time_filter(self, search_filter, query, repeat, page_size):
+        request = Request(APIRequestFactory().get("/", {"search": query}))
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = search_filter.filter_queryset(request, Recipe.objects.filter(is_public=True), SearchView())
+            queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            user = User.objects.create_user(username="benchmark-search", password=None)
+            creators = [UserProfile.objects.create(user=user)]
+            seeded = 0
+
+            for rows in sorted(options["rows"]):
+                insert_in_batches(Recipe, lambda: build_recipe(rng, creators), rows - seeded)
+                seeded = rows
+                self.stdout.write(f"\n{rows:,} recipes")
+
+                for query in options["queries"]:
+                    legacy = self.time_filter(filters.SearchFilter(), query, options["repeat"], options["page_size"])
+                    full_text = self.time_filter(
+                        FullTextSearchFilter(), query, options["repeat"], options["page_size"]
+                    )
+                    self.stdout.write(
+                        f"  {query!r:<24} SearchFilter {legacy:9.1f} ms   FullTextSearchFilter {full_text:9.1f} ms"
+                        f"   x{legacy / full_text:.1f}"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,109 @@
+"""This module contains the command that compares the serializer and the values() fast path on the list endpoints.
+"""
+import random
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from authentication.models import UserProfile
+from benchmarks.data import build_blog, build_recipe, insert_in_batches
+from blogs.constants import APPROVED
+from blogs.models import Blog
+from blogs.serializers import BlogListValuesSerializer
+from nutritionists.models import Nutritionist
+from recipes.models import Recipe
+from recipes.serializers import RecipeListValuesSerializer
+from recipeApp.query_plans import apply_query_plan
+from recipeApp.renderers import ORJSONRenderer
+
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Benchmarks the rows per second of the recipe and blog list representations, built by the serializers " \
+        "and rendered with JSONRenderer before, and built from values() rows and rendered with orjson after. " \
+        "Checks that both produce the same bytes. Seeded rows are rolled back at the end."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def time_rows(self, build, rows, repeat):
+        timings = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = build()
+            timings.append(time.perf_counter() - started)
+        return rows / statistics.median(timings), content
+
+    def compare(self, name, queryset, values_serializer_class, repeat):
+        request = APIRequestFactory().get("/", HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        context = {"request": request}
+        serializer_class = values_serializer_class.serializer_class
+        rows = queryset.count()
+
+        def before():
+            instances = apply_query_plan(queryset, serializer_class)
+            return JSONRenderer().render(serializer_class(instances, many=True, context=context).data)
+
+        def values_only():
+            values_serializer = values_serializer_class(context=context)
+            values_queryset = values_serializer.get_queryset(apply_query_plan(queryset, serializer_class))
+            return JSONRenderer().render(values_serializer.to_representation(values_queryset))
+
+        def after():
+            values_serializer = values_serializer_class(context=context)
+            values_queryset = values_serializer.get_queryset(apply_query_plan(queryset, serializer_class))
+            return ORJSONRenderer().render(values_serializer.to_representation(values_queryset))
+
+        results = [(label, *self.time_rows(build, rows, repeat)) for label, build in [
+            ("serializer + JSONRenderer", before),
+            ("values() + JSONRenderer", values_only),
+            ("values() + ORJSONRenderer", after),
+        ]]
+
+        if len({content for _, _, content in results}) != 1:
+            raise CommandError(f"The {name} fast path output differs from the serializer output.")
+
+        self.stdout.write(f"{name}: {rows:,} rows, {len(results[0][2]):,} bytes, identical output")
+
+        for label, rows_per_second, _ in results:
+            speedup = rows_per_second / results[0][1]
+            self.stdout.write(f"  {label:<28} {rows_per_second:>10,.0f} rows/s   x{speedup:.2f}")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        with transaction.atomic():
+            users = [
+                User.objects.create_user(username=f"benchmark-serialization-{index}", password=None)
+                for index in range(10)
+            ]
+            creators = [UserProfile.objects.create(user=user) for user in users]
+            nutritionists = [
+                Nutritionist.objects.create(user=user, qualification="MSc Nutrition", years_of_experience=index)
+                for index, user in enumerate(users)
+            ]
+            insert_in_batches(Recipe, lambda: build_recipe(rng, creators, public_ratio=1.0), options["rows"])
+            insert_in_batches(Blog, lambda: build_blog(rng, nutritionists, approved_ratio=1.0), options["rows"])
+
+            self.compare(
+                "recipes",
+                Recipe.objects.filter(creator__in=creators).order_by("-created_at", "-id"),
+                RecipeListValuesSerializer,
+                options["repeat"],
+            )
+            self.compare(
+                "blogs",
+                Blog.objects.filter(nutritionist__in=nutritionists, status=APPROVED).order_by("-created_at", "-id"),
+                BlogListValuesSerializer,
+                options["repeat"],
+            )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,74 @@
+"""This module contains the command that seeds synthetic users, nutritionists, recipes, blogs and saves.
+"""
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from authentication.models import UserProfile
+from benchmarks.data import (
+    SEED_NUTRITIONIST_USERNAME,
+    SEED_PASSWORD,
+    SEED_USERNAME,
+    seed_blogs,
+    seed_nutritionists,
+    seed_profiles,
+    seed_recipes,
+    seed_saves,
+    seed_users,
+)
+from nutritionists.models import Nutritionist
+from recipeApp.conditional import bump_model_versions
+
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Seeds users, nutritionists, recipes, blogs and saved recipes with bulk inserts, for the load " \
+        f"benchmarks. Seeded users are named {SEED_USERNAME.format('N')} and log in with {SEED_PASSWORD!r}."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--nutritionists", type=int, default=50)
+        parser.add_argument("--recipes", type=int, default=10_000)
+        parser.add_argument("--blogs", type=int, default=2000)
+        parser.add_argument("--saves-per-user", type=float, default=12, help="Mean number of saves per user.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--clear", action="store_true", help="Deletes previously seeded data first.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        seeded = User.objects.filter(username__startswith="seed-")
+
+        if options["users"] < 1 and options["recipes"] or options["nutritionists"] < 1 and options["blogs"]:
+            raise CommandError("Recipes need at least one user and blogs at least one nutritionist.")
+
+        if options["clear"]:
+            deleted, _ = seeded.delete()
+            self.stdout.write(f"Deleted {deleted:,} previously seeded rows")
+        elif seeded.exists():
+            raise CommandError("Seeded data already exists, run with --clear to replace it.")
+
+        started = time.monotonic()
+
+        with transaction.atomic():
+            users = seed_users(options["users"], SEED_USERNAME, batch_size)
+            profiles = seed_profiles(rng, users, batch_size=batch_size)
+            nutritionist_users = seed_users(options["nutritionists"], SEED_NUTRITIONIST_USERNAME, batch_size)
+            nutritionists = seed_nutritionists(rng, nutritionist_users, batch_size=batch_size)
+            bump_model_versions(User, UserProfile, Nutritionist)
+            self.stdout.write(f"{len(profiles):,} users and {len(nutritionists):,} nutritionists")
+
+            public_ids = seed_recipes(rng, profiles, options["recipes"], batch_size) if options["recipes"] else []
+            self.stdout.write(f"{options['recipes']:,} recipes, {len(public_ids):,} public")
+
+            if options["blogs"]:
+                seed_blogs(rng, nutritionists, options["blogs"], batch_size)
+            self.stdout.write(f"{options['blogs']:,} blogs")
+
+            saves = seed_saves(rng, profiles, public_ids, options["saves_per_user"], batch_size)
+            self.stdout.write(f"{saves:,} saved recipes")
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.monotonic() - started:.1f} s"))
@@ -0,0 +1,41 @@
+"""This module contains the command that lists the slowest query fingerprints recorded by the slow query log.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipeApp.slow_queries import SLOW_QUERIES, get_slow_queries, reset_slow_queries
+
+
+ORDERINGS = ("total", "count", "p95", "max")
+
+
+class Command(BaseCommand):
+    help = "Prints the query fingerprints slower than SLOW_QUERY_THRESHOLD with the most time spent, with their " \
+        "count, mean, p95 and max durations and the frames they came from. Entries are flushed by the web and " \
+        "worker processes every SLOW_QUERY_FLUSH_INTERVAL seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--order-by", choices=ORDERINGS, default="total")
+        parser.add_argument("--origins", type=int, default=3, help="Number of origins printed per query.")
+        parser.add_argument("--reset", action="store_true", help="Deletes the recorded queries after printing them.")
+
+    def handle(self, *args, **options):
+        SLOW_QUERIES.flush()
+        entries = sorted(get_slow_queries().items(), key=lambda item: -item[1][options["order_by"]])
+
+        if not entries:
+            self.stdout.write(f"No queries slower than {settings.SLOW_QUERY_THRESHOLD * 1000:g} ms were recorded.")
+
+        for rank, (key, entry) in enumerate(entries[:options["limit"]], 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank}. {key}  count {entry['count']:,}  total {entry['total']:.2f} s  "
+                f"mean {entry['mean'] * 1000:.1f} ms  p95 {entry['p95'] * 1000:.1f} ms  max {entry['max'] * 1000:.1f} ms"
+            ))
+            self.stdout.write(f"   {entry['sql']}")
+
+            for origin, count in list(entry["origins"].items())[:options["origins"]]:
+                self.stdout.write(f"   {count:>8,}  {origin or 'outside the project'}")
+
+        if options["reset"]:
+            reset_slow_queries()
+            self.stdout.write(self.style.SUCCESS("Deleted the recorded slow queries."))
@@ -0,0 +1,556 @@
+"""This module contains the query budget tests of the API endpoints.
+
+Every endpoint of the authentication, recipes, blogs and nutritionists URL confs is requested once with 1 and once
+with 50 seeded items of each kind: users, nutritionists, recipes, saves and blogs. Both requests must run exactly the
+number of queries declared for the endpoint in BUDGETS, so an N+1 query or a new hidden query fails here with the SQL
+and the stack of every query of the request. Intended changes update BUDGETS, which keeps them reviewable.
+
+The seed_data and benchmark_endpoints commands are smoke tested on a small catalogue.
+"""
+import io
+import json
+import os
+import tempfile
+import traceback
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from authentication import urls as authentication_urls
+from authentication.models import UserProfile
+from authentication.tasks import send_verification_email
+from authentication.token import account_activation_token
+from benchmarks.load import IN_PROCESS
+from blogs import urls as blogs_urls
+from blogs.constants import APPROVED, PENDING, REJECTED
+from blogs.models import Blog
+from nutritionists import urls as nutritionists_urls
+from nutritionists.models import Nutritionist
+from recipes import urls as recipes_urls
+from recipes.cache import canonicalize_ingredients, generation_cache, generation_cache_key
+from recipes.ingredients import index_recipes
+from recipes.models import Recipe
+
+
+User = get_user_model()
+
+SIZES = (1, 50)
+
+# Queries per request, whatever the number of seeded items, keyed on (url name, method).
+BUDGETS = {
+    ("user-list", "GET"): 3,
+    ("user-create", "POST"): 5,
+    ("user-detail", "GET"): 4,
+    ("user-update", "PUT"): 3,
+    ("user-login", "POST"): 3,
+    ("user-logout", "POST"): 7,
+    ("user-delete", "DELETE"): 16,
+    ("user-verify-email", "GET"): 3,
+    ("user-token-refresh", "POST"): 6,
+    ("recipe-create", "POST"): 6,
+    ("recipe-detail", "GET"): 2,
+    ("recipe-import", "POST"): 11,
+    ("recipe-export", "GET"): 2,
+    ("recipe-public-list", "GET"): 3,
+    ("recipe-private-list", "GET"): 3,
+    ("recipe-save", "POST"): 6,
+    ("recipe-save", "DELETE"): 7,
+    ("recipe-save-bulk", "POST"): 7,
+    ("recipe-posted-list", "GET"): 3,
+    ("recipe-update", "PATCH"): 19,
+    ("recipe-delete", "DELETE"): 6,
+    ("recipe-generate", "POST"): 1,
+    ("recipe-generate-stream", "POST"): 1,
+    ("recipe-generate-job", "GET"): 1,
+    ("recipe-trending-list", "GET"): 3,
+    ("recipe-pantry-list", "GET"): 3,
+    ("recipe-public-list-others", "GET"): 3,
+    ("blog-create", "POST"): 2,
+    ("blog-detail", "GET"): 2,
+    ("blog-delete", "DELETE"): 3,
+    ("blog-update", "PATCH"): 3,
+    ("blog-approved-list", "GET"): 3,
+    ("blog-export", "GET"): 2,
+    ("blog-posted-approved-list", "GET"): 3,
+    ("blog-rejected-list", "GET"): 3,
+    ("blog-pending-list", "GET"): 3,
+    ("blog-status-update", "PUT"): 3,
+    ("nutritionist-list", "GET"): 3,
+    ("nutritionist-create", "POST"): 4,
+    ("nutritionist-detail", "GET"): 2,
+    ("nutritionist-update", "PUT"): 3,
+}
+
+
+class QueryRecorder:
+    """Execute wrapper recording the SQL, the parameters and the stack of every query, limited to the frames of the
+    project code, or to the innermost frames for queries that library code runs on its own.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        stack = traceback.extract_stack()[:-1]
+        frames = [
+            frame for frame in stack
+            if frame.filename.startswith(str(settings.BASE_DIR))
+            and "site-packages" not in frame.filename
+            and frame.filename not in (__file__, str(settings.BASE_DIR / "manage.py"))
+        ]
+        self.queries.append((sql, params, frames or stack[-5:]))
+        return execute(sql, params, many, context)
+
+    def format(self):
+        return "\n\n".join(
+            f"{number}. {sql}\n   params: {params}\n{''.join(traceback.format_list(frames))}"
+            for number, (sql, params, frames) in enumerate(self.queries, start=1)
+        )
+
+
+def seed_catalogue(size, cook, nutritionist):
+    """Seeds size items of each kind around the cook and the nutritionist, and returns them.
+    """
+    users = User.objects.bulk_create([
+        User(username=f"budget-{kind}-{index}", email=f"budget-{kind}-{index}@example.com", password="!")
+        for kind in ("user", "nutritionist")
+        for index in range(size)
+    ])
+    profiles = UserProfile.objects.bulk_create([UserProfile(user=user, is_verified=True) for user in users[:size]])
+    nutritionists = Nutritionist.objects.bulk_create([
+        Nutritionist(user=user, qualification="MSc Nutrition", years_of_experience=5, is_verified=True)
+        for user in users[size:]
+    ])
+
+    def build_recipes(creators, is_public):
+        return [
+            Recipe(
+                creator=creator,
+                title=f"Egg dish {index}",
+                ingredients="2 eggs\n100 g flour",
+                instructions="Whisk the eggs into the flour.",
+                is_public=is_public,
+                trending_score=index + 1,
+            )
+            for index, creator in enumerate(creators)
+        ]
+
+    recipes = Recipe.objects.bulk_create(
+        build_recipes([cook.profile] * size, True)
+        + build_recipes([cook.profile] * size, False)
+        + build_recipes(profiles, True)
+        + build_recipes(profiles, False)
+    )
+    index_recipes(recipes)
+    own_public, own_private, public, private = (recipes[start:start + size] for start in range(0, 4 * size, size))
+
+    Saves = UserProfile.saved_recipes.through
+    Saves.objects.bulk_create(
+        [Saves(userprofile=cook.profile, recipe=recipe) for recipe in public]
+        + [Saves(userprofile=profile, recipe=own_public[0]) for profile in profiles]
+    )
+
+    blogs = Blog.objects.bulk_create([
+        Blog(nutritionist=author, title=f"Eggs, part {index}", content="Eggs are rich in protein.", status=status)
+        for author in (nutritionist.nutritionist, *nutritionists)
+        for status in (APPROVED, PENDING, REJECTED)
+        for index in range(size if author == nutritionist.nutritionist else 1)
+    ])
+    return SimpleNamespace(
+        size=size,
+        profiles=profiles,
+        nutritionists=nutritionists,
+        own_public=own_public,
+        own_private=own_private,
+        public=public,
+        private=private,
+        own_blogs=[blog for blog in blogs if blog.nutritionist_id == nutritionist.nutritionist.pk],
+        blogs=[blog for blog in blogs if blog.nutritionist_id != nutritionist.nutritionist.pk],
+    )
+
+
+def resolve(value, catalogue):
+    return value(catalogue) if callable(value) else value
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class QueryBudgetTests(TestCase):
+    """Requests every endpoint at each of SIZES and compares its number of queries with BUDGETS.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.cook = User.objects.create_user(username="cook", email="cook@example.com", password="cook-password")
+        UserProfile.objects.create(user=cls.cook, is_verified=True)
+        cls.nutritionist = User.objects.create_user(username="nutritionist", email="nutritionist@example.com")
+        Nutritionist.objects.create(user=cls.nutritionist, years_of_experience=5, is_verified=True)
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        UserProfile.objects.create(user=cls.admin, is_verified=True)
+        cls.pending = User.objects.create_user(username="pending", email="pending@example.com")
+        UserProfile.objects.create(user=cls.pending)
+
+    def measure(self, url_name, method, user, size, kwargs=None, data=None, query=None, multipart=False, status=None):
+        """Seeds size items, sends the request as user and returns the query recorder. The seeded rows are rolled
+        back and the cache is cleared, so that every request sees a cold cache.
+        """
+        client = Client()
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"} if user else {}
+        recorder = QueryRecorder()
+
+        with transaction.atomic():
+            catalogue = seed_catalogue(size, self.cook, self.nutritionist)
+            path = reverse(url_name, kwargs=resolve(kwargs, catalogue))
+            data = resolve(data, catalogue)
+            cache.clear()
+
+            with connection.execute_wrapper(recorder):
+                if multipart:
+                    response = client.post(f"{path}?{query or ''}", data, headers=headers)
+                else:
+                    body = json.dumps(data) if data is not None else ""
+                    response = client.generic(
+                        method, f"{path}?{query or ''}", body, content_type="application/json", headers=headers
+                    )
+
+                content = b"".join(response.streaming_content) if response.streaming else response.content
+
+            transaction.set_rollback(True)
+
+        self.assertIn(
+            response.status_code,
+            [status] if status else range(200, 400),
+            f"{method} {path} with {size} items answered {response.status_code}: {content[:500]!r}",
+        )
+        return recorder
+
+    def assertQueryBudget(self, url_name, method="GET", user=None, **options):
+        """Asserts that the endpoint runs exactly its budgeted number of queries at every size.
+        """
+        budget = BUDGETS[url_name, method]
+
+        for size in SIZES:
+            recorder = self.measure(url_name, method, user, size, **options)
+
+            if len(recorder.queries) != budget:
+                self.fail(
+                    f"{method} {url_name} ran {len(recorder.queries)} queries with {size} seeded items, its budget "
+                    f"is {budget}. Fix the regression, or update BUDGETS if the change is intended.\n\n"
+                    f"{recorder.format()}"
+                )
+
+    def test_every_url_has_a_budget(self):
+        url_names = {
+            pattern.name
+            for urls in (authentication_urls, recipes_urls, blogs_urls, nutritionists_urls)
+            for pattern in urls.urlpatterns
+        }
+        self.assertEqual(url_names, {url_name for url_name, _ in BUDGETS})
+
+    def test_user_list(self):
+        self.assertQueryBudget("user-list", user=self.admin)
+
+    def test_user_create(self):
+        with mock.patch.object(send_verification_email, "delay"):
+            self.assertQueryBudget(
+                "user-create",
+                "POST",
+                data={"user": {"username": "new-cook", "email": "new-cook@example.com", "password": "Pass-1234"}},
+            )
+
+    def test_user_detail(self):
+        self.assertQueryBudget("user-detail", user=self.cook)
+
+    def test_user_update(self):
+        self.assertQueryBudget("user-update", "PUT", user=self.cook, data={"email": "chef@example.com"})
+
+    def test_user_login(self):
+        self.assertQueryBudget("user-login", "POST", data={"username": "cook", "password": "cook-password"})
+
+    def test_user_logout(self):
+        self.assertQueryBudget(
+            "user-logout",
+            "POST",
+            user=self.cook,
+            data=lambda catalogue: {"refresh_token": str(RefreshToken.for_user(self.cook))},
+        )
+
+    def test_user_delete(self):
+        self.assertQueryBudget("user-delete", "DELETE", user=self.cook, kwargs={"username": "cook"})
+
+    def test_user_verify_email(self):
+        self.assertQueryBudget(
+            "user-verify-email",
+            kwargs={
+                "token1": urlsafe_base64_encode(force_bytes(self.pending.pk)),
+                "token2": account_activation_token.make_token(self.pending),
+            },
+        )
+
+    def test_user_token_refresh(self):
+        self.assertQueryBudget(
+            "user-token-refresh",
+            "POST",
+            data=lambda catalogue: {"refresh": str(RefreshToken.for_user(self.cook))},
+        )
+
+    def test_recipe_create(self):
+        self.assertQueryBudget(
+            "recipe-create",
+            "POST",
+            user=self.cook,
+            data=lambda catalogue: {
+                "title": "Pantry soup",
+                "ingredients": "\n".join(f"ingredient {index}" for index in range(catalogue.size)),
+                "instructions": "Simmer everything.",
+            },
+        )
+
+    def test_recipe_detail(self):
+        self.assertQueryBudget("recipe-detail", user=self.cook, kwargs=lambda catalogue: {"pk": catalogue.public[0].pk})
+
+    def test_recipe_import(self):
+        def upload(catalogue):
+            rows = [
+                json.dumps({"title": f"Imported {index}", "ingredients": "egg", "instructions": "Boil the egg."})
+                for index in range(catalogue.size)
+            ]
+            return {"file": SimpleUploadedFile("recipes.jsonl", "\n".join(rows).encode())}
+
+        self.assertQueryBudget("recipe-import", "POST", user=self.admin, data=upload, multipart=True)
+
+    def test_recipe_export(self):
+        self.assertQueryBudget("recipe-export", user=self.admin)
+
+    def test_public_recipes(self):
+        self.assertQueryBudget("recipe-public-list", user=self.cook)
+
+    def test_private_recipes(self):
+        self.assertQueryBudget("recipe-private-list", user=self.cook)
+
+    def test_recipe_save(self):
+        self.assertQueryBudget("recipe-save", "POST", user=self.cook, kwargs=lambda catalogue: {
+            "id": catalogue.own_public[0].pk,
+        })
+
+    def test_recipe_unsave(self):
+        self.assertQueryBudget("recipe-save", "DELETE", user=self.cook, kwargs=lambda catalogue: {
+            "id": catalogue.public[0].pk,
+        })
+
+    def test_recipe_bulk_save(self):
+        self.assertQueryBudget("recipe-save-bulk", "POST", user=self.cook, data=lambda catalogue: {
+            "action": "save",
+            "ids": [recipe.pk for recipe in catalogue.own_public + catalogue.public],
+        })
+
+    def test_posted_recipes(self):
+        self.assertQueryBudget("recipe-posted-list", user=self.cook)
+
+    def test_recipe_update(self):
+        self.assertQueryBudget(
+            "recipe-update",
+            "PATCH",
+            user=self.cook,
+            kwargs=lambda catalogue: {"pk": catalogue.own_public[0].pk},
+            data={"title": "Private egg dish", "is_public": False},
+        )
+
+    def test_recipe_delete(self):
+        self.assertQueryBudget("recipe-delete", "DELETE", user=self.cook, kwargs=lambda catalogue: {
+            "pk": catalogue.own_public[0].pk,
+        })
+
+    def cache_generated_recipe(self, catalogue):
+        """Caches the recipe generated for size ingredients, so the generation endpoints never call the model.
+        """
+        ingredients = ", ".join(f"ingredient {index}" for index in range(catalogue.size))
+        generation_cache.set(generation_cache_key(canonicalize_ingredients(ingredients)), "Simmer everything.")
+        return {"ingredients": ingredients}
+
+    def test_recipe_generate(self):
+        self.assertQueryBudget("recipe-generate", "POST", user=self.cook, data=self.cache_generated_recipe)
+
+    def test_recipe_generate_stream(self):
+        self.assertQueryBudget("recipe-generate-stream", "POST", user=self.cook, data=self.cache_generated_recipe)
+
+    def test_recipe_generate_job(self):
+        # Only the owner check runs without a result backend: a job of another user is not found.
+        self.assertQueryBudget("recipe-generate-job", user=self.cook, kwargs={"job_id": uuid.uuid4()}, status=404)
+
+    def test_trending_recipes(self):
+        self.assertQueryBudget("recipe-trending-list", user=self.cook)
+
+    def test_pantry_recipes(self):
+        self.assertQueryBudget("recipe-pantry-list", user=self.cook, query="ingredients=egg")
+
+    def test_public_recipes_of_others(self):
+        self.assertQueryBudget("recipe-public-list-others", user=self.cook)
+
+    def test_blog_create(self):
+        self.assertQueryBudget("blog-create", "POST", user=self.nutritionist, data={
+            "title": "Eggs for breakfast",
+            "content": "Eggs are rich in protein.",
+        })
+
+    def test_blog_detail(self):
+        self.assertQueryBudget("blog-detail", user=self.nutritionist, kwargs=lambda catalogue: {
+            "pk": catalogue.blogs[0].pk,
+        })
+
+    def test_blog_delete(self):
+        self.assertQueryBudget("blog-delete", "DELETE", user=self.nutritionist, kwargs=lambda catalogue: {
+            "pk": catalogue.own_blogs[0].pk,
+        })
+
+    def test_blog_update(self):
+        self.assertQueryBudget(
+            "blog-update",
+            "PATCH",
+            user=self.nutritionist,
+            kwargs=lambda catalogue: {"pk": catalogue.own_blogs[0].pk},
+            data={"title": "Eggs, revisited"},
+        )
+
+    def test_approved_blogs(self):
+        self.assertQueryBudget("blog-approved-list", user=self.cook)
+
+    def test_blog_export(self):
+        self.assertQueryBudget("blog-export", user=self.admin)
+
+    def test_posted_approved_blogs(self):
+        self.assertQueryBudget("blog-posted-approved-list", user=self.nutritionist)
+
+    def test_rejected_blogs(self):
+        self.assertQueryBudget("blog-rejected-list", user=self.nutritionist)
+
+    def test_pending_blogs(self):
+        self.assertQueryBudget("blog-pending-list", user=self.nutritionist)
+
+    def test_blog_status_update(self):
+        self.assertQueryBudget(
+            "blog-status-update",
+            "PUT",
+            user=self.admin,
+            kwargs=lambda catalogue: {"pk": catalogue.blogs[1].pk},
+            data={"status": APPROVED},
+        )
+
+    def test_nutritionist_list(self):
+        self.assertQueryBudget("nutritionist-list", user=self.admin)
+
+    def test_nutritionist_create(self):
+        with mock.patch.object(send_verification_email, "delay"):
+            self.assertQueryBudget("nutritionist-create", "POST", data={
+                "user": {
+                    "username": "new-nutritionist",
+                    "email": "new-nutritionist@example.com",
+                    "password": "Pass-1234",
+                },
+                "qualification": "MSc Nutrition",
+                "years_of_experience": 3,
+            })
+
+    def test_nutritionist_detail(self):
+        self.assertQueryBudget("nutritionist-detail", user=self.nutritionist)
+
+    def test_nutritionist_update(self):
+        self.assertQueryBudget("nutritionist-update", "PUT", user=self.nutritionist, data={
+            "qualification": "PhD Food Science",
+        })
+
+
+class SeedDataTests(TestCase):
+    """Tests the seed_data command on a small catalogue.
+    """
+    def seed(self, *args):
+        call_command(
+            "seed_data", "--users", "3", "--nutritionists", "2", "--recipes", "10", "--blogs", "5", *args,
+            stdout=io.StringIO(),
+        )
+
+    def assertSeeded(self):
+        self.assertEqual(User.objects.filter(username__startswith="seed-user-").count(), 3)
+        self.assertEqual(User.objects.filter(username__startswith="seed-nutritionist-").count(), 2)
+        self.assertEqual(UserProfile.objects.count(), 3)
+        self.assertEqual(Nutritionist.objects.count(), 2)
+        self.assertEqual(Recipe.objects.count(), 10)
+        self.assertEqual(Blog.objects.count(), 5)
+
+        through = UserProfile.saved_recipes.through
+        saves = dict(through.objects.values("recipe").annotate(count=Count("pk")).values_list("recipe", "count"))
+        self.assertTrue(saves)
+        self.assertEqual(dict(Recipe.objects.filter(save_count__gt=0).values_list("pk", "save_count")), saves)
+
+    def test_seed(self):
+        self.seed()
+        self.assertSeeded()
+
+    def test_seeded_data_is_not_seeded_twice(self):
+        self.seed()
+
+        with self.assertRaisesMessage(CommandError, "Seeded data already exists"):
+            self.seed()
+
+        self.assertSeeded()
+
+    def test_clear(self):
+        self.seed()
+        self.seed("--clear", "--seed", "1")
+        self.assertSeeded()
+
+
+class BenchmarkEndpointsTests(TransactionTestCase):
+    """Runs the benchmark_endpoints command in process against seeded data. The requests are sent from worker threads
+    with their own connections, so the seeded data is committed.
+    """
+    def setUp(self):
+        call_command(
+            "seed_data", "--users", "3", "--nutritionists", "2", "--recipes", "10", "--blogs", "5",
+            stdout=io.StringIO(),
+        )
+        cache.clear()
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        output.close()
+        self.output = output.name
+        self.addCleanup(os.remove, self.output)
+
+    def test_in_process_report(self):
+        # Without warmup and with a single client, only the first request misses the response cache.
+        call_command(
+            "benchmark_endpoints", "--endpoints", "recipes-public", "blogs-approved", "--requests", "4",
+            "--concurrency", "1", "--warmup", "0", "--output", self.output, stdout=io.StringIO(),
+        )
+
+        with open(self.output) as output_file:
+            report = json.load(output_file)
+
+        self.assertEqual(report["mode"], IN_PROCESS)
+        self.assertEqual((report["requests"], report["concurrency"]), (4, 1))
+        self.assertEqual(list(report["endpoints"]), ["recipes-public", "blogs-approved"])
+
+        for name, url_name in [("recipes-public", "recipe-public-list"), ("blogs-approved", "blog-approved-list")]:
+            result = report["endpoints"][name]
+            self.assertEqual(
+                set(result),
+                {
+                    "method", "path", "requests", "errors", "status_codes", "latency_ms", "throughput_rps",
+                    "queries_per_request", "peak_memory_kb",
+                },
+            )
+            self.assertEqual((result["method"], result["path"]), ("GET", reverse(url_name)))
+            self.assertEqual((result["requests"], result["errors"], result["status_codes"]), (4, 0, {"200": 4}))
+            self.assertEqual(set(result["latency_ms"]), {"p50", "p95", "p99", "mean", "max"})
+            self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["max"])
+            queries = result["queries_per_request"]
+            self.assertIn(queries["max"], range(1, BUDGETS[url_name, "GET"] + 1))
+            self.assertEqual(queries["mean"], round(queries["max"] / 4, 2))
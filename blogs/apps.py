@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogs'
+
+    def ready(self):
+        from recipeApp.conditional import track_model_versions
+        from recipeApp.search import search_index_post_migrate
+        from blogs.constants import SEARCH_FIELDS
+        from blogs.models import Blog
+
+        track_model_versions(Blog)
+        self.restore_search_index = search_index_post_migrate("blogs_blog", SEARCH_FIELDS)
+        post_migrate.connect(self.restore_search_index, sender=self)
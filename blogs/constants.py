@@ -4,3 +4,15 @@ APPROVED = "A"
 REJECTED = "R"
 PENDING = "P"
 
+
+# Searchable fields in order of decreasing weight. The search index migration was created with the same order.
+SEARCH_FIELDS = ["title", "content"]
+
+EXPORT_FIELDS = {
+    "id": "id",
+    "nutritionist": "nutritionist__user__username",
+    "title": "title",
+    "content": "content",
+    "created_at": "created_at",
+    "modified_at": "modified_at",
+}
@@ -0,0 +1,14 @@
+"""This module contains the command that exports the approved blogs as NDJSON or CSV.
+"""
+from blogs.constants import APPROVED, EXPORT_FIELDS
+from blogs.models import Blog
+from recipeApp.exports import BaseExportCommand
+
+
+class Command(BaseExportCommand):
+    help = "Streams all the approved blogs as NDJSON or CSV to a file or stdout."
+    export_name = "blogs"
+    export_fields = EXPORT_FIELDS
+
+    def get_queryset(self):
+        return Blog.objects.filter(status=APPROVED)
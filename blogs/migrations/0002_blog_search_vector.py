@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 13:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+from recipeApp.search import search_index_migration
+
+
+create_search_index, drop_search_index = search_index_migration("blogs_blog", ["title", "content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
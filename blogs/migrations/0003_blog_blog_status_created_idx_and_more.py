@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0002_blog_search_vector'),
+        ('nutritionists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='blog_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['nutritionist', 'status', '-created_at', '-id'], name='blog_author_created_idx'),
+        ),
+    ]
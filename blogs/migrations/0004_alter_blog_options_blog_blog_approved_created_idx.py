@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_blog_blog_status_created_idx_and_more'),
+        ('nutritionists', '0002_alter_nutritionist_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='blog',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('status', 'A')), fields=['-created_at', '-id'], name='blog_approved_created_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 """This module contains the blog related models.
 """
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from blogs.choices import STATUS_CHOICES
-from blogs.constants import PENDING
+from blogs.constants import APPROVED, PENDING
 from nutritionists.models import Nutritionist
 
 
@@ -13,6 +14,19 @@ class Blog(models.Model):
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="blog_approved_created_idx",
+                condition=models.Q(status=APPROVED),
+            ),
+            models.Index(fields=["status", "-created_at", "-id"], name="blog_status_created_idx"),
+            models.Index(fields=["nutritionist", "status", "-created_at", "-id"], name="blog_author_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -1,12 +1,17 @@
 """This module contains the serializers for blogs.
 """
+from django.utils.encoding import force_str
 from rest_framework import serializers
 from blogs.models import Blog
 from blogs.constants import PENDING
+from recipeApp.excerpts import ExcerptField, get_excerpt_expression
+from recipeApp.fast_path import ValuesSerializer
+from recipeApp.query_plans import SparseFieldsetMixin
 
 
-class BlogSerializer(serializers.ModelSerializer):
-    """Blog serializer.
+class BlogSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Blog serializer for the detail representation. The Meta query plan covers the nutritionist and user read by
+    the nested nutritionist serializer.
     """
     nutritionist = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
@@ -14,6 +19,20 @@ class BlogSerializer(serializers.ModelSerializer):
     class Meta:
         model = Blog
         fields = ["id", "nutritionist", "title", "content", "status", "created_at", "modified_at"]
+        select_related = ["nutritionist__user"]
+        only = [
+            "id",
+            "nutritionist__qualification",
+            "nutritionist__years_of_experience",
+            "nutritionist__is_verified",
+            "nutritionist__user__username",
+            "nutritionist__user__email",
+            "title",
+            "content",
+            "status",
+            "created_at",
+            "modified_at",
+        ]
 
     def get_nutritionist(self, obj):
         from nutritionists.serializers import NutritionistSerializer
@@ -21,8 +40,46 @@ class BlogSerializer(serializers.ModelSerializer):
     
     def get_status(self, obj):
         return obj.get_status_display()
+
+
+class BlogListSerializer(BlogSerializer):
+    """Blog list serializer. Replaces the content with an excerpt, so list views never read the content column.
+    """
+    excerpt = ExcerptField()
+
+    class Meta(BlogSerializer.Meta):
+        fields = ["id", "nutritionist", "title", "excerpt", "status", "created_at", "modified_at"]
+        only = [field for field in BlogSerializer.Meta.only if field != "content"]
+        annotations = {"excerpt": get_excerpt_expression("content")}
     
 
+class BlogListValuesSerializer(ValuesSerializer):
+    """Fast path of BlogListSerializer for values() rows.
+    """
+    serializer_class = BlogListSerializer
+    columns = {
+        "nutritionist": [
+            "nutritionist__user__username",
+            "nutritionist__user__email",
+            "nutritionist__qualification",
+            "nutritionist__years_of_experience",
+            "nutritionist__is_verified",
+        ],
+    }
+    status_labels = {value: force_str(label) for value, label in Blog._meta.get_field("status").flatchoices}
+
+    def map_nutritionist(self, username, email, qualification, years_of_experience, is_verified):
+        return {
+            "user": {"username": username, "email": email},
+            "qualification": qualification,
+            "years_of_experience": years_of_experience,
+            "is_verified": is_verified,
+        }
+
+    def map_status(self, value):
+        return self.status_labels.get(value, value)
+
+
 class BlogUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating a blog"s title and content. Status is automatically set to Pending on update.
     """
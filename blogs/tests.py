@@ -1,3 +1,60 @@
+"""This module contains the tests of the blogs app.
+"""
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from blogs.constants import APPROVED, PENDING, REJECTED
+from blogs.models import Blog
+from blogs.views import (
+    ApprovedBlogListAPIView,
+    NutritionistApprovedBlogListAPIView,
+    PendingBlogListAPIView,
+    RejectedBlogListAPIView,
+)
+from nutritionists.models import Nutritionist
+from recipeApp.testing import QueryPlanAssertionsMixin
 
-# Create your tests here.
+
+User = get_user_model()
+
+class BlogQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAINs the first page of the hot blog lists and fails when one regresses to a sequential scan or a sort.
+    On SQLite, parameterized status filters cannot prove the predicate of the approved partial index and use the
+    status index instead.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create_user(username=f"writer-{index}", password=None) for index in range(2)]
+        cls.nutritionists = [
+            Nutritionist.objects.create(user=user, qualification="MSc", years_of_experience=3) for user in users
+        ]
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        statuses = [APPROVED, APPROVED, PENDING, REJECTED]
+        Blog.objects.bulk_create([
+            Blog(
+                nutritionist=cls.nutritionists[index % 2],
+                title=f"Blog {index}",
+                content="Eat your greens.",
+                status=statuses[index % 4],
+            )
+            for index in range(60)
+        ])
+
+    def test_approved_blogs(self):
+        queryset = self.get_page_queryset(ApprovedBlogListAPIView, self.nutritionists[0].user)
+        self.assertUsesIndex(queryset, ["blog_approved_created_idx", "blog_status_created_idx"])
+
+    def test_approved_blogs_of_nutritionist(self):
+        queryset = self.get_page_queryset(NutritionistApprovedBlogListAPIView, self.nutritionists[0].user)
+        self.assertUsesIndex(queryset, ["blog_author_created_idx"])
+
+    def test_pending_blogs_of_nutritionist(self):
+        queryset = self.get_page_queryset(PendingBlogListAPIView, self.nutritionists[0].user)
+        self.assertUsesIndex(queryset, ["blog_author_created_idx"])
+
+    def test_pending_blogs_for_admin(self):
+        queryset = self.get_page_queryset(PendingBlogListAPIView, self.admin)
+        self.assertUsesIndex(queryset, ["blog_status_created_idx"])
+
+    def test_rejected_blogs_for_admin(self):
+        queryset = self.get_page_queryset(RejectedBlogListAPIView, self.admin)
+        self.assertUsesIndex(queryset, ["blog_status_created_idx"])
@@ -5,6 +5,8 @@ from blogs.views import (
     ApprovedBlogListAPIView,
     BlogCreateAPIView,
     BlogDeleteAPIView,
+    BlogDetailAPIView,
+    BlogExportAPIView,
     BlogStatusUpdateAPIView,
     BlogUpdateAPIView,
     NutritionistApprovedBlogListAPIView,
@@ -15,9 +17,11 @@ from blogs.views import (
 
 urlpatterns = [
     path("create/", BlogCreateAPIView.as_view(), name="blog-create"),
+    path("<int:pk>/", BlogDetailAPIView.as_view(), name="blog-detail"),
     path("delete/<int:pk>", BlogDeleteAPIView.as_view(), name="blog-delete"),
     path("update/<int:pk>", BlogUpdateAPIView.as_view(), name="blog-update"),
     path("approved/", ApprovedBlogListAPIView.as_view(), name="blog-approved-list"),
+    path("export/", BlogExportAPIView.as_view(), name="blog-export"),
     path("posted-approved/", NutritionistApprovedBlogListAPIView.as_view(), name="blog-posted-approved-list"),
     path("rejected/", RejectedBlogListAPIView.as_view(), name="blog-rejected-list"),
     path("pending/", PendingBlogListAPIView.as_view(), name="blog-pending-list"),
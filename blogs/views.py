@@ -1,36 +1,48 @@
 """This module contains the blog related views.
 """
-from rest_framework import status, filters
+from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.generics import ListAPIView, CreateAPIView, DestroyAPIView, UpdateAPIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from blogs.constants import APPROVED, PENDING, REJECTED
+from rest_framework.generics import ListAPIView, CreateAPIView, DestroyAPIView, RetrieveAPIView, UpdateAPIView
+from authentication.authentication import CachedJWTAuthentication
+from blogs.constants import APPROVED, EXPORT_FIELDS, PENDING, REJECTED, SEARCH_FIELDS
 from blogs.models import Blog
-from blogs.serializers import BlogSerializer, BlogUpdateSerializer
+from blogs.serializers import BlogListSerializer, BlogListValuesSerializer, BlogSerializer, BlogUpdateSerializer
+from nutritionists.models import Nutritionist
+from recipeApp.conditional import ConditionalGetMixin
+from recipeApp.exports import ExportAPIView
+from recipeApp.fast_path import FastPathMixin
+from recipeApp.query_plans import QueryPlanMixin
+from recipeApp.response_cache import CachedResponseMixin
+from recipeApp.search import FullTextSearchFilter
 
 
 User = get_user_model()
 
-class ApprovedBlogListAPIView(ListAPIView):
-    """Lists all approved blogs.
+class ApprovedBlogListAPIView(ConditionalGetMixin, CachedResponseMixin, FastPathMixin, QueryPlanMixin, ListAPIView):
+    """Lists all approved blogs. Unchanged pages are answered with 304 Not Modified, and pages are served from the
+    response cache.
     """
-    serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = BlogListSerializer
+    values_serializer_class = BlogListValuesSerializer
+    conditional_models = [Blog, Nutritionist, User]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "content"]
+    filter_backends = [FullTextSearchFilter]
+    search_fields = SEARCH_FIELDS
 
     def get_queryset(self):
         return Blog.objects.filter(status=APPROVED)
     
 
-class NutritionistApprovedBlogListAPIView(ListAPIView):
+class NutritionistApprovedBlogListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
     """Lists all approved blogs of authenticated nutritionist.
     """
-    serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = BlogListSerializer
+    values_serializer_class = BlogListValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -41,11 +53,12 @@ class NutritionistApprovedBlogListAPIView(ListAPIView):
         return Blog.objects.filter(status=APPROVED, nutritionist=user.nutritionist)
     
 
-class RejectedBlogListAPIView(ListAPIView):
+class RejectedBlogListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
     """Lists all rejected blogs of authenticated nutritionist.
     """
-    serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = BlogListSerializer
+    values_serializer_class = BlogListValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -56,11 +69,12 @@ class RejectedBlogListAPIView(ListAPIView):
         return Blog.objects.filter(status=REJECTED, nutritionist=user.nutritionist)
     
 
-class PendingBlogListAPIView(ListAPIView):
+class PendingBlogListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
     """Lists all pending blogs authenticated nutritionist.
     """
-    serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = BlogListSerializer
+    values_serializer_class = BlogListValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -71,10 +85,26 @@ class PendingBlogListAPIView(ListAPIView):
         return Blog.objects.filter(status=PENDING, nutritionist=user.nutritionist)
       
 
+class BlogDetailAPIView(QueryPlanMixin, RetrieveAPIView):
+    """Returns a blog with its full content. Blogs that are not approved are only visible to their nutritionist
+    and to admins.
+    """
+    serializer_class = BlogSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.is_staff:
+            return Blog.objects.all()
+        return Blog.objects.filter(Q(status=APPROVED) | Q(nutritionist__user=user))
+
+
 class BlogCreateAPIView(CreateAPIView):
     """Adds a blog created by the current authenticated user to the database. 
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = BlogSerializer
 
@@ -91,7 +121,7 @@ class BlogDeleteAPIView(DestroyAPIView):
     """
     queryset = Blog.objects.all()
     serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
 
@@ -100,7 +130,7 @@ class BlogUpdateAPIView(UpdateAPIView):
     """
     serializer_class = BlogUpdateSerializer
     queryset = Blog.objects.all()
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def update(self, request, *args, **kwargs):
@@ -108,12 +138,22 @@ class BlogUpdateAPIView(UpdateAPIView):
         return Response({"message": "Blog updated successfully and sent for review"}, status=status.HTTP_200_OK)
     
 
+class BlogExportAPIView(ExportAPIView):
+    """Streams all the approved blogs as NDJSON or CSV for admins.
+    """
+    export_name = "blogs"
+    export_fields = EXPORT_FIELDS
+
+    def get_queryset(self):
+        return Blog.objects.filter(status=APPROVED)
+
+
 class BlogStatusUpdateAPIView(UpdateAPIView):
     """Approves a blog posted by nutritionist.
     """
     queryset = Blog.objects.all()
     serializer_class = BlogSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def update(self, request, *args, **kwargs):
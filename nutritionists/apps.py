@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class NutritionistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nutritionists'
+
+    def ready(self):
+        from recipeApp.conditional import track_model_versions
+        from nutritionists.models import Nutritionist
+
+        track_model_versions(Nutritionist)
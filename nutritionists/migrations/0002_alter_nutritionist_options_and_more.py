@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 14:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutritionists', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='nutritionist',
+            options={'ordering': ['id']},
+        ),
+        migrations.AddIndex(
+            model_name='nutritionist',
+            index=models.Index(condition=models.Q(('is_verified', True)), fields=['id'], name='nutritionist_verified_idx'),
+        ),
+    ]
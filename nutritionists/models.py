@@ -26,6 +26,12 @@ class Nutritionist(models.Model):
 
     objects = NutritionistManager()
 
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["id"], name="nutritionist_verified_idx", condition=models.Q(is_verified=True)),
+        ]
+
     def __str__(self):
         return self.user.username
 
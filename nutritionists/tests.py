@@ -1,3 +1,27 @@
+"""This module contains the tests of the nutritionists app.
+"""
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from nutritionists.models import Nutritionist
+from nutritionists.views import NutritionistListAPIView
+from recipeApp.testing import QueryPlanAssertionsMixin
 
-# Create your tests here.
+
+User = get_user_model()
+
+class NutritionistQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAINs the first page of the verified nutritionist list and fails when it regresses to a sequential scan.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+
+        for index in range(20):
+            user = User.objects.create_user(username=f"nutritionist-{index}", password=None)
+            Nutritionist.objects.create(
+                user=user, qualification="MSc", years_of_experience=index, is_verified=index % 2 == 0
+            )
+
+    def test_verified_nutritionists(self):
+        queryset = self.get_page_queryset(NutritionistListAPIView, self.admin)
+        self.assertUsesIndex(queryset, ["nutritionist_verified_idx"])
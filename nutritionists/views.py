@@ -5,12 +5,13 @@ from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from nutritionists.models import  Nutritionist
 from nutritionists.serializers import NutritionistCreateSerializer, NutritionistSerializer
+from authentication.authentication import CachedJWTAuthentication
 from authentication.serializers import UserUpdateSerializer
 from authentication.tasks import send_verification_email
 from authentication.utils import generate_verification_url
+from recipeApp.query_plans import QueryPlanMixin
 
 
 User = get_user_model()
@@ -40,32 +41,32 @@ class NutritionistCreateAPIView(CreateAPIView):
         )
 
 
-class NutritionistListAPIView(ListAPIView):
+class NutritionistListAPIView(QueryPlanMixin, ListAPIView):
     serializer_class = NutritionistSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
         return Nutritionist.objects.filter(is_verified=True)
     
 
-class NutritionistDetailAPIView(RetrieveAPIView):
+class NutritionistDetailAPIView(QueryPlanMixin, RetrieveAPIView):
     """Retrives the nutritionist profile.
     """
     queryset = Nutritionist.objects.all()
     serializer_class = NutritionistCreateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return Nutritionist.objects.get(user=self.request.user) 
+        return self.filter_queryset(self.get_queryset()).get(user=self.request.user)
     
 
 class NutritionistUpdateAPIView(UpdateAPIView):
     """Updates the nutritionist profile.
     """
     serializer_class = NutritionistCreateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
@@ -0,0 +1,115 @@
+"""This module adds conditional GET support to API views.
+
+A view mixing in ConditionalGetMixin derives an ETag from a cheap validator, before running its queryset or
+serializer, and answers a matching If-None-Match with 304 Not Modified. The validator combines the query, the user
+and either the version counters of the models the response is built from, or the Max(modified_at) and the row count
+of the queryset for views that declare no models. Version counters live in the cache and are bumped after every
+committed write to a model registered with track_model_versions.
+"""
+import hashlib
+import json
+import time
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+
+VERSION_KEY = "model-version:{}"
+
+
+def get_model_label(model):
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    return model._meta.label_lower
+
+
+def get_model_versions(models):
+    """Returns the current version counters of the given models, starting missing counters at the current time so
+    that a counter lost by the cache never goes back to a previously issued value.
+    """
+    keys = [VERSION_KEY.format(get_model_label(model)) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_versions(*models):
+    """Bumps the version counters of the given models once the current transaction commits. Writes that bypass the
+    model signals, such as QuerySet.update() and bulk_create(), call it themselves.
+    """
+    def bump():
+        for model in models:
+            key = VERSION_KEY.format(get_model_label(model))
+
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def bump_sender_version(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_model_versions(sender)
+
+
+def track_model_versions(*models):
+    """Bumps the version counters of the given models on save, on delete and, for many-to-many through models, when
+    related managers add or remove rows. Called from the ready() of the app defining the models.
+    """
+    for model in models:
+        uid = f"track_model_versions:{get_model_label(model)}"
+        post_save.connect(bump_sender_version, sender=model, dispatch_uid=uid)
+        post_delete.connect(bump_sender_version, sender=model, dispatch_uid=uid)
+
+        if model._meta.auto_created:
+            m2m_changed.connect(bump_sender_version, sender=model, dispatch_uid=uid)
+
+
+class ConditionalGetMixin:
+    """Answers GET requests with 304 Not Modified when the client's ETag still matches the view's validator, without
+    fetching or serializing anything. Set conditional_models to the models the response is built from, otherwise
+    the validator aggregates the filtered queryset, or override get_conditional_state().
+    """
+    conditional_models = None
+
+    def get_conditional_state(self):
+        """Returns the part of the validator that changes with the data. Views whose response depends on a few rows
+        only override it with a state scoped to those rows.
+        """
+        if self.conditional_models is not None:
+            return get_model_versions(self.conditional_models)
+
+        aggregates = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_modified=Max("modified_at"), count=Count("pk")
+        )
+        return [aggregates["last_modified"], aggregates["count"]]
+
+    def get_validator(self):
+        request = self.request
+        return [self.get_conditional_state(), request.get_full_path(), request.user.pk, request.accepted_media_type]
+
+    def get_etag(self):
+        validator = json.dumps(self.get_validator(), default=str, separators=(",", ":"))
+        return f'"{hashlib.sha256(validator.encode()).hexdigest()[:32]}"'
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,41 @@
+"""This module computes the truncated excerpts of long text columns shown by list representations.
+
+The excerpt is read with a database Substr() of the column, one character longer than the excerpt so that the
+serializer knows whether the text was cut, and the column itself is never fetched. The serializer field then cuts
+the text at the last word boundary and appends an ellipsis.
+"""
+from django.db.models.functions import Substr
+from rest_framework import serializers
+
+
+EXCERPT_LENGTH = 200
+ELLIPSIS = "…"
+
+
+def get_excerpt_expression(field_name, length=EXCERPT_LENGTH):
+    return Substr(field_name, 1, length + 1)
+
+
+def truncate(text, length=EXCERPT_LENGTH):
+    """Returns the text cut at the last word boundary before length characters, with an ellipsis when it was cut.
+    """
+    if len(text) <= length:
+        return " ".join(text.split())
+
+    cut = text[:length]
+
+    if not (text[length].isspace() or cut[-1].isspace()) and len(cut.split()) > 1:
+        cut = cut.rsplit(None, 1)[0]
+    return " ".join(cut.split()).rstrip(".,;:!?-") + ELLIPSIS
+
+
+class ExcerptField(serializers.ReadOnlyField):
+    """Read-only field truncating the annotation of the same name, set up with get_excerpt_expression() in the
+    serializer's Meta annotations.
+    """
+    def __init__(self, length=EXCERPT_LENGTH, **kwargs):
+        self.length = length
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return truncate(value or "", self.length)
@@ -0,0 +1,180 @@
+"""This module streams querysets as NDJSON or CSV, optionally gzip compressed.
+
+Rows are read with values_list() and QuerySet.iterator(), so no model instances are built and memory stays flat whatever
+the table size, and the output is produced chunk by chunk for StreamingHttpResponse or a file.
+"""
+import csv
+import io
+import sys
+import zlib
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from authentication.authentication import CachedJWTAuthentication
+
+
+NDJSON = "ndjson"
+CSV = "csv"
+EXPORT_FORMATS = [NDJSON, CSV]
+CONTENT_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+ITERATOR_CHUNK_SIZE = 2000
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_ndjson(rows, columns):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def iter_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_chunks(lines, chunk_size=OUTPUT_CHUNK_SIZE):
+    """Joins encoded lines into chunks of about chunk_size bytes, so every row is not a separate write.
+    """
+    chunk = []
+    size = 0
+
+    for line in lines:
+        data = line.encode()
+        chunk.append(data)
+        size += len(data)
+
+        if size >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield b"".join(chunk)
+
+
+def iter_gzip(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def iter_export(queryset, fields, export_format, compress=False, modified_since=None):
+    """Yields the bytes of the export of a queryset's values_list(). fields maps the output columns, in order, to
+    their lookups.
+    """
+    if modified_since is not None:
+        queryset = queryset.filter(modified_at__gte=modified_since)
+
+    columns = list(fields)
+    rows = queryset.order_by("pk").values_list(*fields.values()).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    lines = iter_ndjson(rows, columns) if export_format == NDJSON else iter_csv(rows, columns)
+    chunks = iter_chunks(lines)
+    return iter_gzip(chunks) if compress else chunks
+
+
+def get_export_filename(name, export_format, compress):
+    return f"{name}-{timezone.now():%Y%m%d%H%M%S}.{export_format}{'.gz' if compress else ''}"
+
+
+class ExportSerializer(serializers.Serializer):
+    """Export serializer with the output format, the optional modified_since filter and the compression flag. The
+    format is named file_format since DRF reserves the format query parameter for renderer selection.
+    """
+    file_format = serializers.ChoiceField(choices=EXPORT_FORMATS, default=NDJSON)
+    modified_since = serializers.DateTimeField(required=False)
+    gzip = serializers.BooleanField(default=False)
+
+
+class ExportAPIView(APIView):
+    """Streams the export of get_queryset() for admins. Subclasses set export_name and export_fields.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+    export_name = None
+    export_fields = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        export_format = serializer.validated_data["file_format"]
+        compress = serializer.validated_data["gzip"]
+        filename = get_export_filename(self.export_name, export_format, compress)
+        response = StreamingHttpResponse(
+            iter_export(
+                self.get_queryset(),
+                self.export_fields,
+                export_format,
+                compress=compress,
+                modified_since=serializer.validated_data.get("modified_since"),
+            ),
+            content_type="application/gzip" if compress else CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class BaseExportCommand(BaseCommand):
+    """Writes the export of get_queryset() to a file or to stdout. Subclasses set export_name and export_fields.
+    """
+    export_name = None
+    export_fields = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="File to write to, defaults to stdout.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default=NDJSON)
+        parser.add_argument("--modified-since", help="ISO 8601 date time, exports only rows modified since.")
+        parser.add_argument("--gzip", action="store_true")
+
+    def handle(self, *args, **options):
+        data = {"file_format": options["format"], "gzip": options["gzip"]}
+
+        if options["modified_since"]:
+            data["modified_since"] = options["modified_since"]
+
+        serializer = ExportSerializer(data=data)
+
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        chunks = iter_export(
+            self.get_queryset(),
+            self.export_fields,
+            serializer.validated_data["file_format"],
+            compress=serializer.validated_data["gzip"],
+            modified_since=serializer.validated_data.get("modified_since"),
+        )
+        output = open(options["output"], "wb") if options["output"] else sys.stdout.buffer
+
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options["output"]:
+                output.close()
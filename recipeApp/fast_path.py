@@ -0,0 +1,180 @@
+"""This module contains the fast path that serializes the pages of read-only list views from values() rows.
+
+A ValuesSerializer mirrors the representation of a ModelSerializer for the rows of a values() query. Its fields are
+compiled once per field set into mappers, so a page is built without model instances, bound serializer fields or
+SerializerMethodField dispatch. Model fields of plain types are copied as they are, date times and files get
+dedicated mappers, fields reading annotations reuse their to_representation(), and every other field needs a
+map_<field> method called with the columns declared for it in columns.
+"""
+import datetime
+from functools import lru_cache
+from operator import itemgetter
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from recipeApp.metrics import time_serializer
+from recipeApp.query_plans import FIELDS_PARAM
+
+
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+COMPOSITE_FIELDS = (serializers.BaseSerializer, serializers.SerializerMethodField)
+
+
+def get_datetime_mapper(serializer_field):
+    """Returns a mapper for DateTimeField values. UTC datetimes rendered in ISO 8601 while the current timezone is
+    UTC, the common case, skip the timezone conversion of DateTimeField.to_representation().
+    """
+    to_representation = serializer_field.to_representation
+    output_format = getattr(serializer_field, "format", api_settings.DATETIME_FORMAT)
+
+    if (
+        output_format is None
+        or output_format.lower() != ISO_8601
+        or hasattr(serializer_field, "timezone")
+        or timezone.get_current_timezone_name() != "UTC"
+    ):
+        return to_representation
+
+    def map_datetime(value):
+        if value is None or value.tzinfo is not datetime.timezone.utc:
+            return to_representation(value)
+        return value.isoformat()[:-6] + "Z"
+
+    return map_datetime
+
+
+def get_file_mapper(request, storage):
+    """Returns a mapper for FileField values, memoized since many rows usually share the same file.
+    """
+    build_url = request.build_absolute_uri if request is not None else str
+
+    @lru_cache(maxsize=1024)
+    def map_file(name):
+        return build_url(storage.url(name)) if name else None
+
+    return map_file
+
+
+@lru_cache(maxsize=None)
+def compile_fields(values_serializer_class, fields=None):
+    """Returns the (field name, columns, kind, serializer field) entries of a ValuesSerializer for the given fields,
+    all of them when fields is None.
+    """
+    serializer_class = values_serializer_class.serializer_class
+    context = {FIELDS_PARAM: fields} if fields is not None else {}
+    entries = []
+
+    for name, serializer_field in serializer_class(context=context).fields.items():
+        if serializer_field.write_only:
+            continue
+
+        source = "__".join(serializer_field.source_attrs) if serializer_field.source != "*" else name
+
+        if hasattr(values_serializer_class, f"map_{name}"):
+            columns = tuple(values_serializer_class.columns.get(name, [source]))
+            entries.append((name, columns, "method", serializer_field))
+        elif isinstance(serializer_field, COMPOSITE_FIELDS):
+            raise ImproperlyConfigured(
+                f"{values_serializer_class.__name__} must define map_{name}() for the {type(serializer_field).__name__} "
+                f"{name} of {serializer_class.__name__}."
+            )
+        elif isinstance(serializer_field, serializers.DateTimeField):
+            entries.append((name, (source,), "datetime", serializer_field))
+        elif isinstance(serializer_field, serializers.FileField):
+            entries.append((name, (source,), "file", serializer_field))
+        elif type(serializer_field) in IDENTITY_FIELDS:
+            entries.append((name, (source,), "identity", serializer_field))
+        else:
+            entries.append((name, (source,), "field", serializer_field))
+    return entries
+
+
+class ValuesSerializer:
+    """Serializes values() rows into the representation of serializer_class. Subclasses set serializer_class and,
+    for its method and nested fields, define map_<field> methods and the columns they read in columns.
+    """
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.request = self.context.get("request")
+        self.entries = compile_fields(type(self), self.context.get(FIELDS_PARAM))
+        self.mappers = [(name, self.get_mapper(columns, kind, field)) for name, columns, kind, field in self.entries]
+
+    def get_columns(self):
+        return list(dict.fromkeys(column for _, columns, _, _ in self.entries for column in columns))
+
+    def get_mapper(self, columns, kind, serializer_field):
+        """Returns the function that maps a row to the field's representation. Like Serializer.to_representation(),
+        None values of model fields are not passed to the field.
+        """
+        if kind == "method":
+            method = getattr(self, f"map_{serializer_field.field_name}")
+            getter = itemgetter(*columns)
+            return (lambda row: method(getter(row))) if len(columns) == 1 else (lambda row: method(*getter(row)))
+
+        column = columns[0]
+
+        if kind == "identity":
+            return itemgetter(column)
+
+        if kind == "file":
+            storage = serializer_field.parent.Meta.model._meta.get_field(column).storage
+            map_file = get_file_mapper(self.request, storage)
+            return lambda row: map_file(row[column])
+
+        to_representation = (
+            get_datetime_mapper(serializer_field) if kind == "datetime" else serializer_field.to_representation
+        )
+        return lambda row: None if row[column] is None else to_representation(row[column])
+
+    def get_queryset(self, queryset, extra_columns=()):
+        """Returns the values() query of the serializer's columns. extra_columns are also fetched, the pagination
+        reads the cursor position from them.
+        """
+        columns = self.get_columns()
+        columns += [column for column in extra_columns if column not in columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    @time_serializer
+    def to_representation(self, rows):
+        mappers = self.mappers
+        return [{name: mapper(row) for name, mapper in mappers} for row in rows]
+
+
+class FastPathMixin:
+    """List view mixin that serves pages through values_serializer_class instead of the serializer, which is used
+    again when values_serializer_class is None. Place it before QueryPlanMixin, whose filter_queryset() still applies
+    the plan annotations and validates the fields parameter.
+    """
+    values_serializer_class = None
+
+    def get_cursor_columns(self, queryset):
+        get_cursor_ordering = getattr(self.paginator, "get_cursor_ordering", None)
+
+        if get_cursor_ordering is None:
+            return []
+        return [field.lstrip("-") for field in get_cursor_ordering(queryset, self)]
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.values_serializer_class(context=self.get_serializer_context())
+        queryset = values_serializer.get_queryset(queryset, self.get_cursor_columns(queryset))
+        page = self.paginate_queryset(queryset)
+        data = values_serializer.to_representation(page if page is not None else queryset)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
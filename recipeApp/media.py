@@ -0,0 +1,143 @@
+"""This module contains the view that serves the uploaded media files.
+
+Responses carry a strong ETag and Last-Modified, answer conditional requests with 304 and single byte ranges with
+206. Content-hashed files are cached as immutable. When MEDIA_ACCEL_REDIRECT_PREFIX or MEDIA_SENDFILE_HEADER is set,
+the transfer itself is handed off to the front proxy (nginx X-Accel-Redirect, Apache/lighttpd X-Sendfile), which
+then also handles the ranges.
+"""
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+CONTENT_HASH_PATTERN = re.compile(r"(?:^|/)([0-9a-f]{32,64})-[^/]*$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_etag(path, stat):
+    """Returns a strong ETag, the content hash of content-hashed files and the modification time and size otherwise.
+    """
+    match = CONTENT_HASH_PATTERN.search(path)
+
+    if match:
+        return f'"{match.group(1)}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def get_cache_control(path):
+    if CONTENT_HASH_PATTERN.search(path):
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def get_range(request, size, etag, last_modified):
+    """Returns the (start, end) of the single byte range requested, inclusive, None to send the whole file, or
+    False when the range cannot be satisfied. Ranges are ignored when If-Range does not match the current file.
+    """
+    header = request.META.get("HTTP_RANGE", "").replace(" ", "")
+    match = RANGE_PATTERN.match(header)
+
+    if not match or match.groups() == ("", ""):
+        return None
+
+    if_range = request.META.get("HTTP_IF_RANGE")
+
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != int(last_modified):
+        return None
+
+    start, end = match.groups()
+
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(file, start, length):
+    with file:
+        file.seek(start)
+
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+
+            if not chunk:
+                break
+
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Serves a file of MEDIA_ROOT with caching, conditional request and range support.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, ValueError, OSError):
+        raise Http404("File not found.")
+
+    if not os.path.isfile(full_path):
+        raise Http404("File not found.")
+
+    etag = get_etag(path, stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": get_cache_control(path),
+        "Accept-Ranges": "bytes",
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified.headers.setdefault(header, value)
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    headers["Content-Type"] = content_type or "application/octet-stream"
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{path}"
+        return HttpResponse(headers=headers)
+
+    if settings.MEDIA_SENDFILE_HEADER:
+        headers[settings.MEDIA_SENDFILE_HEADER] = full_path
+        return HttpResponse(headers=headers)
+
+    byte_range = get_range(request, stat.st_size, etag, stat.st_mtime)
+
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{stat.st_size}"
+        return HttpResponse(status=416, headers=headers)
+
+    start, end = byte_range or (0, stat.st_size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    if request.method == "HEAD":
+        return HttpResponse(status=206 if byte_range else 200, headers=headers)
+
+    return StreamingHttpResponse(
+        read_range(open(full_path, "rb"), start, end - start + 1),
+        status=206 if byte_range else 200,
+        headers=headers,
+    )
@@ -0,0 +1,402 @@
+"""This module contains the low overhead instrumentation of the API and of the celery tasks, exposed in the
+Prometheus text format at /metrics/.
+
+MetricsMiddleware records, per resolved route, the request latency, the number and time of the database queries,
+the time spent in serializers, the response size and the status. They are aggregated in the memory of each process,
+in fixed bucket histograms updated under a lock once per request, and merged into the shared cache every
+METRICS_FLUSH_INTERVAL seconds like the slow query log, so any web process answers a scrape with the totals of all
+the web and worker processes, and counters do not go back when a process restarts.
+
+Task durations and states are recorded by celery signals in the worker processes, so they are counted in the shared
+cache, a few increments per task, and read back by the endpoint along with the response cache stats.
+"""
+import atexit
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from celery import current_app
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+from recipeApp.response_cache import STATS, get_response_cache_stats
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TASK_DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TASK_STATES = ("SUCCESS", "FAILURE", "RETRY")
+TASK_STATS_KEY = "metrics:tasks:{}:{}"
+SERIES_KEY = "metrics:series"
+LOCK_KEY = "metrics:lock"
+LOCK_TIMEOUT = 10
+
+local = threading.local()
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = [*zip(names, values), *([extra] if extra else [])]
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+def format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, values, amount=1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def merge(self, target, series):
+        for values, value in series.items():
+            target[values] = target.get(values, 0) + value
+
+    def samples(self, series):
+        for values, value in series.items():
+            yield f"{self.name}{format_labels(self.labels, values)} {value}"
+
+
+class Histogram:
+    """Histogram with fixed buckets. Each series keeps its per bucket counts, the last one for +Inf, and its sum.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, values, value):
+        series = self.series.get(values)
+
+        if series is None:
+            series = self.series[values] = [[0] * (len(self.buckets) + 1), 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def merge(self, target, series):
+        for values, (counts, total) in series.items():
+            merged = target.setdefault(values, [[0] * len(counts), 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+
+    def samples(self, series):
+        for values, (counts, total) in series.items():
+            yield from format_histogram(self.name, self.labels, values, self.buckets, counts, total)
+
+
+def format_histogram(name, labels, values, buckets, counts, total):
+    cumulative = 0
+
+    for bound, count in zip([*buckets, float("inf")], counts):
+        cumulative += count
+        yield f"{name}_bucket{format_labels(labels, values, ('le', format_bound(bound)))} {cumulative}"
+
+    yield f"{name}_sum{format_labels(labels, values)} {total}"
+    yield f"{name}_count{format_labels(labels, values)} {cumulative}"
+
+
+def format_metric(name, kind, documentation, samples):
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", *samples]
+
+
+class Registry:
+    """Metrics of the process, updated under lock and merged into the shared series by flush().
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+        self.flushed = time.monotonic()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def flush(self):
+        """Merges the series of the process into the cache. Processes flush in turn under a cache lock, and a
+        process that finds it taken keeps its series for its next flush.
+        """
+        if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            return
+
+        try:
+            with self.lock:
+                pending = {metric.name: metric.series for metric in self.metrics if metric.series}
+
+                for metric in self.metrics:
+                    metric.series = {}
+
+                self.flushed = time.monotonic()
+
+            if pending:
+                shared = cache.get(SERIES_KEY) or {}
+
+                for metric in self.metrics:
+                    if metric.name in pending:
+                        metric.merge(shared.setdefault(metric.name, {}), pending[metric.name])
+
+                cache.set(SERIES_KEY, shared, timeout=None)
+        finally:
+            cache.delete(LOCK_KEY)
+
+    def flush_if_due(self):
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def collect(self):
+        """Returns the series of all the processes by metric name, after flushing the ones of this process.
+        """
+        self.flush()
+        return cache.get(SERIES_KEY) or {}
+
+    def render(self):
+        shared = self.collect()
+        return [
+            line
+            for metric in self.metrics
+            for line in format_metric(
+                metric.name, metric.kind, metric.documentation, list(metric.samples(shared.get(metric.name, {})))
+            )
+        ]
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests by route, method and status.", ("route", "method", "status")
+))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("route", "method"), DURATION_BUCKETS
+))
+QUERY_COUNT = REGISTRY.register(Histogram(
+    "http_request_db_queries", "Database queries per request by route.", ("route",), QUERY_COUNT_BUCKETS
+))
+QUERY_DURATION = REGISTRY.register(Histogram(
+    "http_request_db_duration_seconds", "Database time per request by route.", ("route",), DURATION_BUCKETS
+))
+SERIALIZER_DURATION = REGISTRY.register(Histogram(
+    "http_request_serializer_duration_seconds", "Serializer time per request by route.", ("route",), DURATION_BUCKETS
+))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size by route, streamed responses excluded.", ("route",), SIZE_BUCKETS
+))
+
+
+class RequestMetrics:
+    """Query and serializer counters of the request being served by the current thread.
+    """
+    __slots__ = ("queries", "query_time", "serializer_time", "serializing")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0
+        self.serializer_time = 0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def time_serializer(function):
+    """Adds the time spent in function to the serializer time of the current request. Nested serializers, e.g. a
+    SerializerMethodField building another serializer's data, are only counted once.
+    """
+    @wraps(function)
+    def timed(*args, **kwargs):
+        metrics = getattr(local, "request", None)
+
+        if metrics is None or metrics.serializing:
+            return function(*args, **kwargs)
+
+        metrics.serializing = True
+        started = time.perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
+
+    return timed
+
+
+def install():
+    """Times the data of every DRF serializer. Serializer.data and ListSerializer.data both end in
+    BaseSerializer.data, which builds the representation.
+    """
+    data = serializers.BaseSerializer.data
+
+    if not hasattr(data.fget, "__wrapped__"):
+        serializers.BaseSerializer.data = property(time_serializer(data.fget))
+
+
+def get_route(request):
+    match = request.resolver_match
+
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """Records the metrics of every request. Place it first so that the time of the other middlewares is included.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        local.request = metrics
+        started = time.perf_counter()
+
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            local.request = None
+
+        duration = time.perf_counter() - started
+        route = get_route(request)
+
+        with REGISTRY.lock:
+            REQUESTS.inc((route, request.method, response.status_code))
+            REQUEST_DURATION.observe((route, request.method), duration)
+            QUERY_COUNT.observe((route,), metrics.queries)
+            QUERY_DURATION.observe((route,), metrics.query_time)
+            SERIALIZER_DURATION.observe((route,), metrics.serializer_time)
+
+            if not response.streaming:
+                RESPONSE_SIZE.observe((route,), len(response.content))
+
+        REGISTRY.flush_if_due()
+        return response
+
+
+def count(key, amount=1):
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, amount)
+
+
+@task_prerun.connect
+def start_task_timer(task=None, **kwargs):
+    task.request.metrics_started = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task(task=None, state=None, **kwargs):
+    """Counts the task's state and its duration in the cache. The sum is kept in microseconds, as cache increments
+    are integers.
+    """
+    started = getattr(task.request, "metrics_started", None)
+
+    if started is None or state not in TASK_STATES:
+        return
+
+    duration = time.perf_counter() - started
+    count(TASK_STATS_KEY.format(task.name, state))
+    count(TASK_STATS_KEY.format(task.name, f"bucket:{bisect_left(TASK_DURATION_BUCKETS, duration)}"))
+    count(TASK_STATS_KEY.format(task.name, "sum"), round(duration * 1_000_000))
+
+
+@task_postrun.connect
+def flush_task_metrics(**kwargs):
+    # Workers serve no requests, so the metrics they record, e.g. the generation cache counters, flush after tasks.
+    REGISTRY.flush_if_due()
+
+
+def get_task_names():
+    current_app.loader.import_default_modules()
+    return sorted(name for name in current_app.tasks if not name.startswith("celery."))
+
+
+def render_task_metrics():
+    names = get_task_names()
+    suffixes = [*TASK_STATES, *(f"bucket:{index}" for index in range(len(TASK_DURATION_BUCKETS) + 1)), "sum"]
+    keys = {(name, suffix): TASK_STATS_KEY.format(name, suffix) for name in names for suffix in suffixes}
+    values = cache.get_many(keys.values())
+
+    def get(name, suffix):
+        return values.get(keys[name, suffix], 0)
+
+    tasks = format_metric("celery_tasks_total", "counter", "Finished tasks by task and state.", [
+        f"celery_tasks_total{format_labels(('task', 'state'), (name, state))} {get(name, state)}"
+        for name in names
+        for state in TASK_STATES
+    ])
+    durations = format_metric("celery_task_duration_seconds", "histogram", "Task run time by task.", [
+        line
+        for name in names
+        for line in format_histogram(
+            "celery_task_duration_seconds",
+            ("task",),
+            (name,),
+            TASK_DURATION_BUCKETS,
+            [get(name, f"bucket:{index}") for index in range(len(TASK_DURATION_BUCKETS) + 1)],
+            get(name, "sum") / 1_000_000,
+        )
+    ])
+    return tasks + durations
+
+
+def render_response_cache_metrics():
+    stats = get_response_cache_stats()
+    events = format_metric("response_cache_events_total", "counter", "Response cache events by view.", [
+        f"response_cache_events_total{format_labels(('view', 'event'), (view, event))} {view_stats[event]}"
+        for view, view_stats in sorted(stats.items())
+        for event in STATS
+    ])
+    ratios = format_metric("response_cache_hit_ratio", "gauge", "Response cache hit ratio by view.", [
+        f"response_cache_hit_ratio{format_labels(('view',), (view,))} {view_stats['hit_ratio']}"
+        for view, view_stats in sorted(stats.items())
+        if view_stats["hit_ratio"] is not None
+    ])
+    return events + ratios
+
+
+def has_metrics_access(request):
+    """Scrapers authenticate with the METRICS_TOKEN bearer token when one is set, else come from INTERNAL_IPS.
+    """
+    if settings.METRICS_TOKEN:
+        return request.headers.get("Authorization") == f"Bearer {settings.METRICS_TOKEN}"
+    return request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+
+
+def metrics_view(request):
+    """Returns the metrics in the Prometheus text format. A plain Django view keeps DRF out of the scrapes.
+    """
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+
+    lines = REGISTRY.render() + render_task_metrics() + render_response_cache_metrics()
+    return HttpResponse("\n".join(lines) + "\n", content_type=CONTENT_TYPE)
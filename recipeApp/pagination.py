@@ -0,0 +1,154 @@
+"""This module contains the default pagination class of the API. Page number pagination stays the default, and
+clients opt in to keyset (cursor) pagination with ?pagination=cursor, then follow the opaque next/previous cursors.
+
+Keyset pages filter on the last seen (created_at, id) instead of using OFFSET, and skip the COUNT(*) query, so the
+cost of a page does not grow with its depth and rows inserted meanwhile do not shift the pages. Search results are
+ordered by relevance, which no keyset can follow, so cursors are refused on them, as on views ranked by other
+computed values that set allow_cursor to False.
+"""
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as APIValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from recipeApp.search import SEARCH_RANK
+
+
+CURSOR = "cursor"
+DEFAULT_CURSOR_ORDERING = ("-created_at", "-id")
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": values, "r": reverse}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, ordering):
+    """Returns the position values and the direction stored in a cursor, converted to the ordering field types.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = payload["v"]
+
+        if len(values) != len(ordering):
+            raise ValueError
+
+        fields = [model._meta.get_field(field.lstrip("-")) for field in ordering]
+        return [field.to_python(value) for field, value in zip(fields, values)], bool(payload["r"])
+    except (ValueError, TypeError, KeyError, ValidationError):
+        raise NotFound("Invalid cursor.")
+
+
+def keyset_filter(ordering, values, reverse):
+    """Returns the condition selecting the rows that come after the given position in the ordering, or before it
+    when reverse is set. The leading bound on the first field lets the database use a range scan on the index.
+    """
+    condition = Q()
+    equal = {}
+
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") != reverse else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+
+    first = ordering[0].lstrip("-")
+    bound = "lte" if ordering[0].startswith("-") != reverse else "gte"
+    return Q(**{f"{first}__{bound}": values[0]}) & condition
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """Page number pagination that switches to keyset pagination on (created_at, id) when the request opts in.
+    Views over models without created_at page on the id, and views can set cursor_ordering to override.
+    Keyset pages are always ordered by the cursor ordering, so views whose ranking it cannot follow set allow_cursor
+    to False.
+    """
+    mode_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = CURSOR in request.query_params or request.query_params.get(self.mode_query_param) == CURSOR
+
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        if SEARCH_RANK in queryset.query.annotations or SEARCH_RANK in queryset.query.extra:
+            raise APIValidationError({"message": "Search results cannot be paginated with a cursor."})
+
+        if not getattr(view, "allow_cursor", True):
+            raise APIValidationError({"message": "These results cannot be paginated with a cursor."})
+
+        self.request = request
+        self.ordering = self.get_cursor_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(CURSOR)
+        reverse = False
+
+        if cursor:
+            values, reverse = decode_cursor(cursor, queryset.model, self.ordering)
+            queryset = queryset.filter(keyset_filter(self.ordering, values, reverse))
+
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more or reverse
+        self.has_previous = has_more if reverse else bool(cursor)
+        self.rows = rows
+        return rows
+
+    def get_cursor_ordering(self, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+
+        if ordering:
+            return list(ordering)
+
+        try:
+            queryset.model._meta.get_field("created_at")
+            return list(DEFAULT_CURSOR_ORDERING)
+        except FieldDoesNotExist:
+            return ["-id"]
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return [row[field.lstrip("-")] for field in self.ordering]
+        return [getattr(row, field.lstrip("-")) for field in self.ordering]
+
+    def get_cursor_link(self, row, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, CURSOR, encode_cursor(self.get_position(row), reverse))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.rows:
+            return None
+        return self.get_cursor_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.rows:
+            return None
+        return self.get_cursor_link(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
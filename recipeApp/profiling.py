@@ -0,0 +1,291 @@
+"""This module contains the on-demand profiler of requests and celery tasks.
+
+A request is profiled when it is sampled at PROFILING_SAMPLE_RATE, or when it carries an X-Profile header signed for
+an admin by ProfileTokenAPIView, while that user is still an active admin. Celery tasks are sampled at
+PROFILING_TASK_SAMPLE_RATE, or profiled when sent with the signed token in their x_profile header. Other requests only
+pay a header lookup and a random draw.
+
+A profiled run is wrapped in cProfile, for a pstats file, and in a stack sampler that reads the stack of the
+profiled thread every PROFILING_INTERVAL seconds, for a flame graph in the folded stacks format read by flamegraph.pl
+and speedscope. Both are written to PROFILING_ROOT with a JSON record of the route or task, the user, the status, the
+query count and the duration. The oldest artifacts are deleted beyond PROFILING_MAX_ARTIFACTS.
+"""
+import cProfile
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connection
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from authentication.authentication import CachedJWTAuthentication
+from recipeApp.metrics import get_route
+
+
+PROFILE_HEADER = "X-Profile"
+TASK_PROFILE_HEADER = "x_profile"
+TOKEN_SALT = "recipeApp.profiling"
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9]{14}-[0-9a-f]{12}$")
+ARTIFACT_FILES = {"pstats": ".prof", "folded": ".folded"}
+SAMPLED = "sampled"
+REQUESTED = "requested"
+
+local = threading.local()
+
+
+def make_profile_token(user):
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def check_profile_token(token):
+    """Returns whether the token was signed by ProfileTokenAPIView less than PROFILING_TOKEN_MAX_AGE seconds ago, for
+    a user who is still an active admin, so leaked tokens and revoked admins stop profiling.
+    """
+    try:
+        user_id = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return get_user_model().objects.filter(pk=user_id, is_active=True, is_staff=True).exists()
+
+
+def get_trigger(token, sample_rate):
+    """Returns why the run is profiled, or None when it is not. Runs nested in a profiled run are never profiled.
+    """
+    if getattr(local, "profiler", None) is not None:
+        return None
+
+    if token and check_profile_token(token):
+        return REQUESTED
+
+    if sample_rate and random.random() < sample_rate:
+        return SAMPLED
+    return None
+
+
+def get_frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of a thread, sampled every interval seconds until stopped.
+    """
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+
+            while frame is not None:
+                names.append(get_frame_name(frame))
+                frame = frame.f_back
+
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """Profiles the code run by the current thread between start() and stop(), and counts its queries.
+    """
+    def __init__(self, kind, trigger):
+        self.kind = kind
+        self.trigger = trigger
+        self.queries = 0
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def start(self):
+        local.profiler = self
+        self.query_counter = connection.execute_wrapper(self)
+        self.query_counter.__enter__()
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+        self.query_counter.__exit__(None, None, None)
+        local.profiler = None
+
+    def save(self, **tags):
+        """Writes the pstats, folded stacks and JSON record of the run, and returns the record.
+        """
+        root = Path(settings.PROFILING_ROOT)
+        root.mkdir(parents=True, exist_ok=True)
+        artifact_id = f"{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:12]}"
+        record = {
+            "id": artifact_id,
+            "kind": self.kind,
+            "trigger": self.trigger,
+            "created_at": timezone.now().isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "queries": self.queries,
+            "samples": sum(self.sampler.stacks.values()),
+            **tags,
+        }
+        self.profile.dump_stats(root / f"{artifact_id}{ARTIFACT_FILES['pstats']}")
+        (root / f"{artifact_id}{ARTIFACT_FILES['folded']}").write_text(self.sampler.folded())
+        (root / f"{artifact_id}.json").write_text(json.dumps(record))
+        prune_artifacts(root, settings.PROFILING_MAX_ARTIFACTS)
+        return record
+
+
+def prune_artifacts(root, max_artifacts):
+    records = sorted(root.glob("*.json"), reverse=True)
+
+    for record in records[max_artifacts:]:
+        for suffix in [*ARTIFACT_FILES.values(), ".json"]:
+            record.with_suffix(suffix).unlink(missing_ok=True)
+
+
+def get_artifacts():
+    """Returns the records of the stored artifacts, newest first.
+    """
+    root = Path(settings.PROFILING_ROOT)
+
+    if not root.is_dir():
+        return []
+    return [json.loads(path.read_text()) for path in sorted(root.glob("*.json"), reverse=True)]
+
+
+class ProfilingMiddleware:
+    """Profiles the sampled and the requested requests. Place it first to profile the other middlewares too.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = get_trigger(request.headers.get(PROFILE_HEADER), settings.PROFILING_SAMPLE_RATE)
+
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = Profiler("request", trigger)
+        profiler.start()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+
+        user = getattr(request, "user", None)
+        profiler.save(
+            name=get_route(request),
+            method=request.method,
+            path=request.get_full_path(),
+            user=user.get_username() if user is not None and user.is_authenticated else None,
+            status=response.status_code,
+        )
+        return response
+
+
+def get_task_header(task_request, name):
+    """Custom headers are attributes of the request on workers, and in its headers when the task runs eagerly.
+    """
+    return getattr(task_request, name, None) or (getattr(task_request, "headers", None) or {}).get(name)
+
+
+@task_prerun.connect
+def start_task_profiler(task=None, **kwargs):
+    token = get_task_header(task.request, TASK_PROFILE_HEADER)
+    trigger = get_trigger(token, settings.PROFILING_TASK_SAMPLE_RATE)
+
+    if trigger is not None:
+        task.request.profiler = Profiler("task", trigger)
+        task.request.profiler.start()
+
+
+@task_postrun.connect
+def save_task_profile(task=None, state=None, **kwargs):
+    profiler = getattr(task.request, "profiler", None)
+
+    if profiler is None:
+        return
+
+    profiler.stop()
+    task.request.profiler = None
+    profiler.save(name=task.name, task_id=task.request.id, user=None, status=state)
+
+
+class ProfileTokenAPIView(APIView):
+    """Returns a token for the X-Profile header, or the x_profile task header, that profiles the requests or tasks
+    sent with it for PROFILING_TOKEN_MAX_AGE seconds.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        return Response({
+            "header": PROFILE_HEADER,
+            "token": make_profile_token(request.user),
+            "expires_in": settings.PROFILING_TOKEN_MAX_AGE,
+        })
+
+
+class ProfileListAPIView(APIView):
+    """Lists the stored profiles, newest first, with the urls of their artifacts.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        artifacts = get_artifacts()
+
+        for artifact in artifacts:
+            artifact["files"] = {
+                artifact_format: request.build_absolute_uri(reverse(
+                    "profile-download", kwargs={"artifact_id": artifact["id"], "artifact_format": artifact_format}
+                ))
+                for artifact_format in ARTIFACT_FILES
+            }
+        return Response(artifacts)
+
+
+class ProfileDownloadAPIView(APIView):
+    """Downloads the pstats or the folded stacks file of a profile.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, artifact_id, artifact_format, *args, **kwargs):
+        if not ARTIFACT_ID_PATTERN.match(artifact_id) or artifact_format not in ARTIFACT_FILES:
+            raise Http404
+
+        path = Path(settings.PROFILING_ROOT) / f"{artifact_id}{ARTIFACT_FILES[artifact_format]}"
+
+        if not path.is_file():
+            raise Http404
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=path.name, content_type="application/octet-stream"
+        )
@@ -0,0 +1,219 @@
+"""This module applies the query plans that serializers declare for the relations they read.
+
+A serializer declares in its Meta the relations its SerializerMethodFields traverse (select_related and
+prefetch_related), optionally the columns it reads (only) and the database expressions it reads as attributes named
+after its fields (annotations). Nested serializer fields contribute their own plans automatically, so a view only has
+to mix in QueryPlanMixin to fetch a whole page in a fixed number of queries.
+
+Clients can ask for a subset of the fields with ?fields=a,b. The plan is then narrowed to the lookups whose first
+segment belongs to a requested field, so the columns of the other fields are not even read.
+"""
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from django.conf import settings
+from django.db import connection
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS_PARAM = "fields"
+
+@dataclass
+class QueryPlan:
+    select_related: list = field(default_factory=list)
+    prefetch_related: list = field(default_factory=list)
+    nested_prefetches: list = field(default_factory=list)
+    only: list = None
+    annotations: dict = field(default_factory=dict)
+
+
+def _prefixed(prefix, lookups):
+    return [f"{prefix}__{lookup}" for lookup in lookups]
+
+
+def _get_source(name, serializer_field):
+    """Returns the model attribute a serializer field reads, its name for SerializerMethodFields.
+    """
+    return name if serializer_field.source == "*" else serializer_field.source_attrs[0]
+
+
+def _narrow(lookups, sources):
+    return [lookup for lookup in lookups if lookup.split("__", 1)[0] in sources]
+
+
+def get_requested_fields(request, serializer_class):
+    """Returns the sorted tuple of fields listed in the fields query parameter, or None when it is absent.
+    """
+    value = request.query_params.get(FIELDS_PARAM) if request is not None else None
+
+    if value is None:
+        return None
+
+    fields = tuple(sorted({name.strip() for name in value.split(",") if name.strip()}))
+    unknown = set(fields) - set(serializer_class().fields)
+
+    if not fields or unknown:
+        available = ", ".join(serializer_class().fields)
+        raise ValidationError({FIELDS_PARAM: [f"Expected a comma separated subset of: {available}."]})
+    return fields
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class, fields=None):
+    """Returns the query plan declared by a serializer class merged with the plans of its nested serializers,
+    narrowed to the given fields if any.
+    """
+    meta = getattr(serializer_class, "Meta", None)
+    only = getattr(meta, "only", None)
+    plan = QueryPlan(
+        select_related=list(getattr(meta, "select_related", [])),
+        prefetch_related=list(getattr(meta, "prefetch_related", [])),
+        only=list(only) if only is not None else None,
+        annotations=dict(getattr(meta, "annotations", {})),
+    )
+    serializer_fields = serializer_class().fields.items()
+
+    if fields is not None:
+        serializer_fields = [(name, value) for name, value in serializer_fields if name in fields]
+        sources = {_get_source(name, value) for name, value in serializer_fields}
+        plan.select_related = _narrow(plan.select_related, sources)
+        plan.prefetch_related = _narrow(plan.prefetch_related, sources)
+        plan.annotations = {name: value for name, value in plan.annotations.items() if name in fields}
+
+        if plan.only is not None:
+            plan.only = ["pk"] + _narrow(plan.only, sources)
+
+    for _, serializer_field in serializer_fields:
+        if serializer_field.write_only:
+            continue
+
+        if isinstance(serializer_field, serializers.ListSerializer):
+            if isinstance(serializer_field.child, serializers.ModelSerializer):
+                source = "__".join(serializer_field.source_attrs)
+                plan.nested_prefetches.append((source, type(serializer_field.child)))
+
+        elif isinstance(serializer_field, serializers.ModelSerializer):
+            source = "__".join(serializer_field.source_attrs)
+            nested = get_query_plan(type(serializer_field))
+            plan.select_related += [source] + _prefixed(source, nested.select_related)
+            plan.prefetch_related += _prefixed(source, nested.prefetch_related)
+            plan.nested_prefetches += [
+                (f"{source}__{lookup}", child_class) for lookup, child_class in nested.nested_prefetches
+            ]
+
+            if plan.only is not None:
+                plan.only += _prefixed(source, nested.only) if nested.only is not None else [source]
+    return plan
+
+
+def apply_query_plan(queryset, serializer_class, fields=None):
+    """Applies the select_related, prefetch_related, only() and annotate() calls of a serializer's query plan to a
+    queryset.
+    """
+    plan = get_query_plan(serializer_class, fields)
+
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+
+    prefetches = plan.prefetch_related + [
+        Prefetch(lookup, queryset=apply_query_plan(child_class.Meta.model._default_manager.all(), child_class))
+        for lookup, child_class in plan.nested_prefetches
+    ]
+
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+
+    if plan.only is not None:
+        queryset = queryset.only(*plan.only)
+
+    if plan.annotations:
+        queryset = queryset.annotate(**plan.annotations)
+    return queryset
+
+
+class audit_query_plan:
+    """Logs a warning, in debug mode, for every query executed while serializing already fetched instances. Such a
+    query means that the serializer touched a relation missing from its declared query plan.
+    """
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        if settings.DEBUG:
+            self.wrapper = connection.execute_wrapper(self)
+            self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not settings.DEBUG:
+            return
+
+        self.wrapper.__exit__(*exc_info)
+
+        if self.queries:
+            logger.warning(
+                "%s ran %d undeclared queries during serialization. Declare the relations it reads in its Meta "
+                "select_related/prefetch_related.\n%s",
+                self.serializer_class.__name__,
+                len(self.queries),
+                "\n".join(self.queries),
+            )
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin that drops the fields not listed in the "fields" context entry set by QueryPlanMixin. Only
+    applies to the top-level serializer, nested serializers keep all their fields.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get(FIELDS_PARAM)
+        parent = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+
+        if requested is None or parent is not None:
+            return fields
+        return {name: value for name, value in fields.items() if name in requested}
+
+
+class QueryPlanMixin:
+    """Applies the serializer's query plan, narrowed to the requested fields, to the view's queryset and audits
+    serialization in debug mode.
+    """
+    def get_requested_fields(self):
+        return get_requested_fields(self.request, self.get_serializer_class())
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), FIELDS_PARAM: self.get_requested_fields()}
+
+    def filter_queryset(self, queryset):
+        return apply_query_plan(
+            super().filter_queryset(queryset), self.get_serializer_class(), self.get_requested_fields()
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        instances = page if page is not None else list(queryset)
+
+        with audit_query_plan(self.get_serializer_class()):
+            data = self.get_serializer(instances, many=True).data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        with audit_query_plan(self.get_serializer_class()):
+            data = self.get_serializer(instance).data
+        return Response(data)
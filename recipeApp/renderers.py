@@ -0,0 +1,71 @@
+"""This module contains the orjson based JSON renderer and parser of the API.
+
+The renderer produces the same bytes as DRF's JSONRenderer with the default settings: compact separators, non-ASCII
+characters left unescaped, U+2028 and U+2029 escaped, and the types orjson does not handle natively, datetimes
+included, encoded by DRF's JSONEncoder. Floats are the exception, orjson writes exponents without the sign and
+padding of repr() (1e16, 1e-5 instead of 1e+16, 1e-05), which only appears outside [1e-4, 1e16). Indented output
+and anything orjson rejects, such as integers wider than 64 bits, fall back to JSONRenderer. orjson also writes NaN
+and infinities as null where the strict JSONRenderer raises, so output holding a null is checked for them and falls
+back as well.
+"""
+import math
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def has_non_finite_float(data):
+    stack = [data]
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer using orjson for compact output.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b"null" in ret and has_non_finite_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser using orjson for UTF-8 bodies.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+
+        if encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f"JSON parse error - {error}")
@@ -0,0 +1,163 @@
+"""This module caches the serialized pages of list views that return the same data to many users.
+
+Keys combine the view, the query parameters and the version counters of the models the page is built from, so a
+write bumps the versions and stale pages are never served, they just age out. Pages hold absolute URLs, so keys
+include the scheme and the host too. Views that depend on the user add the
+user to the key. Concurrent misses are collapsed behind a short lock, and entries are recomputed early with a
+probability that grows as they near expiry (XFetch), so popular pages do not all expire at once. Hits and misses are
+counted per view in the cache.
+"""
+import hashlib
+import json
+import math
+import random
+import time
+from django.core.cache import cache
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from authentication.authentication import CachedJWTAuthentication
+from recipeApp.conditional import get_model_versions
+
+
+RESPONSE_CACHE_TTL = 60 * 10
+RESPONSE_CACHE_BETA = 1.0
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+STATS_KEY = "response-cache:stats:{}:{}"
+STATS = ("hits", "misses", "early_recomputes", "lock_waits")
+CACHED_VIEWS = set()
+
+
+def count(view_name, stat):
+    key = STATS_KEY.format(view_name, stat)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_response_cache_stats():
+    """Returns the hit, miss, early recompute and lock wait counts and the hit ratio of every cached view.
+    """
+    keys = {(view_name, stat): STATS_KEY.format(view_name, stat) for view_name in CACHED_VIEWS for stat in STATS}
+    values = cache.get_many(keys.values())
+    stats = {}
+
+    for (view_name, stat), key in keys.items():
+        stats.setdefault(view_name, {})[stat] = values.get(key, 0)
+
+    for view_stats in stats.values():
+        requests = view_stats["hits"] + view_stats["misses"]
+        view_stats["hit_ratio"] = round(view_stats["hits"] / requests, 4) if requests else None
+    return stats
+
+
+def should_recompute_early(entry, beta):
+    """XFetch: recomputes before the expiry with a probability rising as the expiry nears, scaled by how long the
+    entry took to compute.
+    """
+    return time.time() - entry["delta"] * beta * math.log(1 - random.random()) >= entry["expiry"]
+
+
+class CachedResponseMixin:
+    """Serves the view's list from the response cache. response_cache_models defaults to conditional_models and
+    lists the models the page is built from. Set response_cache_per_user when the page depends on the user.
+    """
+    response_cache_models = None
+    response_cache_per_user = False
+    response_cache_ttl = RESPONSE_CACHE_TTL
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        CACHED_VIEWS.add(cls.__name__)
+
+    def get_response_cache_models(self):
+        if self.response_cache_models is not None:
+            return self.response_cache_models
+        return self.conditional_models
+
+    def get_response_cache_key(self):
+        request = self.request
+        parts = [
+            get_model_versions(self.get_response_cache_models()),
+            request.scheme,
+            request.get_host(),
+            request.get_full_path(),
+            request.accepted_media_type,
+            request.user.pk if self.response_cache_per_user else None,
+        ]
+        digest = hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+        return f"response-cache:{type(self).__name__}:{digest}"
+
+    def compute_entry(self, key, request, *args, **kwargs):
+        started = time.monotonic()
+        data = super().list(request, *args, **kwargs).data
+        entry = {
+            "data": data,
+            "delta": time.monotonic() - started,
+            "expiry": time.time() + self.response_cache_ttl,
+        }
+        cache.set(key, entry, timeout=self.response_cache_ttl)
+        return entry
+
+    def list(self, request, *args, **kwargs):
+        view_name = type(self).__name__
+        key = self.get_response_cache_key()
+        lock_key = f"{key}:lock"
+        entry = cache.get(key)
+
+        if entry is not None:
+            if should_recompute_early(entry, RESPONSE_CACHE_BETA) and cache.add(
+                lock_key, True, timeout=RESPONSE_CACHE_LOCK_TIMEOUT
+            ):
+                count(view_name, "early_recomputes")
+
+                try:
+                    entry = self.compute_entry(key, request, *args, **kwargs)
+                finally:
+                    cache.delete(lock_key)
+
+            count(view_name, "hits")
+            return Response(entry["data"])
+
+        count(view_name, "misses")
+
+        if not cache.add(lock_key, True, timeout=RESPONSE_CACHE_LOCK_TIMEOUT):
+            count(view_name, "lock_waits")
+            entry = self.wait_for_entry(key)
+
+            if entry is not None:
+                return Response(entry["data"])
+            return Response(self.compute_entry(key, request, *args, **kwargs)["data"])
+
+        try:
+            entry = self.compute_entry(key, request, *args, **kwargs)
+        finally:
+            cache.delete(lock_key)
+        return Response(entry["data"])
+
+    def wait_for_entry(self, key):
+        """Polls for the entry computed by the request holding the lock, giving up when the lock times out.
+        """
+        deadline = time.monotonic() + RESPONSE_CACHE_LOCK_TIMEOUT
+
+        while time.monotonic() < deadline:
+            time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+            entry = cache.get(key)
+
+            if entry is not None:
+                return entry
+        return None
+
+
+class ResponseCacheStatsAPIView(APIView):
+    """Returns the hit ratio and the counters of the response cache per view.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_response_cache_stats())
@@ -0,0 +1,232 @@
+"""This module contains the pluggable full-text search backends used by the recipe and blog list views.
+
+PostgreSQL keeps a weighted tsvector in a stored "search_vector" column that a trigger refreshes on every write and
+a GIN index serves. SQLite keeps an FTS5 shadow table next to the model table that triggers keep in sync. Other
+databases fall back to the DRF SearchFilter icontains lookups.
+"""
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+
+SEARCH_VECTOR_FIELD = "search_vector"
+SEARCH_RANK = "search_rank"
+SEARCH_CONFIG = "english"
+MAX_SEARCH_TERMS = 10
+
+# Weight labels are assigned to the search fields in order, so the first field (the title) ranks highest.
+WEIGHT_LABELS = ("A", "B", "C", "D")
+LABEL_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+
+def get_search_terms(value):
+    """Splits a raw search string into lower-cased alphanumeric terms that are safe to embed in a tsquery or an
+    FTS5 MATCH expression.
+    """
+    return re.findall(r"[^\W_]+", value.lower())[:MAX_SEARCH_TERMS]
+
+
+def fts_table_name(table):
+    return f"{table}_fts"
+
+
+def _vector_expression(row, fields):
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}{field}, '')), '{label}')"
+        for field, label in zip(fields, WEIGHT_LABELS)
+    )
+
+
+def postgres_search_index_sql(table, fields):
+    """Returns the statements that create the trigger maintaining the search vector column and its GIN index.
+    """
+    columns = ", ".join(fields)
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.{SEARCH_VECTOR_FIELD} := {_vector_expression("NEW.", fields)};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}",
+        f"""
+        CREATE TRIGGER {table}_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF {columns} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """,
+        f"UPDATE {table} SET {SEARCH_VECTOR_FIELD} = {_vector_expression('', fields)}",
+        f"CREATE INDEX IF NOT EXISTS {table}_search_vector_gin ON {table} USING gin ({SEARCH_VECTOR_FIELD})",
+    ]
+
+
+def sqlite_search_index_sql(table, fields):
+    """Returns the statements that create the FTS5 shadow table of a model table and the triggers syncing it.
+    """
+    fts = fts_table_name(table)
+    columns = ", ".join(fields)
+    new_values = ", ".join(f"new.{field}" for field in fields)
+    old_values = ", ".join(f"old.{field}" for field in fields)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+        USING fts5({columns}, content='{table}', content_rowid='id', tokenize='porter unicode61')
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+def create_search_index(connection, table, fields, rebuild=True):
+    """Creates (idempotently) the search index of a table on the given connection. On SQLite, rebuilding re-reads
+    every row of the model table into the FTS5 table.
+    """
+    if connection.vendor == "postgresql":
+        statements = postgres_search_index_sql(table, fields)
+    elif connection.vendor == "sqlite":
+        statements = sqlite_search_index_sql(table, fields)
+        if rebuild:
+            fts = fts_table_name(table)
+            statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_search_index(connection, table):
+    if connection.vendor == "postgresql":
+        statements = [
+            f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}",
+            f"DROP FUNCTION IF EXISTS {table}_search_vector_update()",
+            f"DROP INDEX IF EXISTS {table}_search_vector_gin",
+        ]
+    elif connection.vendor == "sqlite":
+        fts = fts_table_name(table)
+        statements = [f"DROP TRIGGER IF EXISTS {fts}_{event}" for event in ("insert", "delete", "update")]
+        statements.append(f"DROP TABLE IF EXISTS {fts}")
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_index_migration(table, fields):
+    """Returns the forwards/backwards functions for a RunPython migration operation that manages a search index.
+    """
+    def forwards(apps, schema_editor):
+        create_search_index(schema_editor.connection, table, fields)
+
+    def backwards(apps, schema_editor):
+        drop_search_index(schema_editor.connection, table)
+
+    return forwards, backwards
+
+
+def restore_search_index_triggers(connection, table, fields):
+    """Recreates the SQLite sync triggers, which are dropped whenever a migration has to remake the model table.
+    The FTS5 content itself survives a remake because the row ids are preserved.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    tables = connection.introspection.table_names()
+
+    if table in tables and fts_table_name(table) in tables:
+        create_search_index(connection, table, fields, rebuild=False)
+
+
+def search_index_post_migrate(table, fields):
+    """Returns a post_migrate receiver that restores the SQLite sync triggers of a table.
+    """
+    def receiver(sender, using, **kwargs):
+        restore_search_index_triggers(connections[using], table, fields)
+
+    return receiver
+
+
+class PostgresSearchBackend:
+    """Matches against the stored weighted tsvector and ranks with ts_rank.
+    """
+    def search(self, queryset, terms, fields):
+        query = SearchQuery(" & ".join(f"{term}:*" for term in terms), search_type="raw", config=SEARCH_CONFIG)
+        weights = [LABEL_WEIGHTS[label] for label in reversed(WEIGHT_LABELS)]
+        return queryset.filter(**{SEARCH_VECTOR_FIELD: query}).annotate(
+            **{SEARCH_RANK: SearchRank(F(SEARCH_VECTOR_FIELD), query, weights=weights)}
+        )
+
+
+class SQLiteSearchBackend:
+    """Matches against the FTS5 shadow table and ranks with bm25 using per-column weights.
+    """
+    def search(self, queryset, terms, fields):
+        table = queryset.model._meta.db_table
+        fts = fts_table_name(table)
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(LABEL_WEIGHTS[label]) for label in WEIGHT_LABELS[:len(fields)])
+        return queryset.extra(
+            tables=[fts],
+            where=[f'{fts}.rowid = "{table}"."id"', f"{fts} MATCH %s"],
+            params=[match],
+            select={SEARCH_RANK: f"-bm25({fts}, {weights})"},
+        )
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(connection):
+    """Returns the search backend configured in the FULL_TEXT_SEARCH_BACKEND setting, or the one matching the
+    database vendor. None means the database has no full-text index.
+    """
+    backend_path = getattr(settings, "FULL_TEXT_SEARCH_BACKEND", None)
+
+    if backend_path:
+        return import_string(backend_path)()
+
+    backend_class = SEARCH_BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Relevance-ranked replacement for SearchFilter. The view's search_fields must be listed in the same order as
+    the columns of the model's search index, most important field first.
+    """
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        terms = get_search_terms(request.query_params.get(self.search_param, ""))
+
+        if not search_fields or not terms:
+            return queryset
+
+        backend = get_search_backend(connections[queryset.db])
+
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, terms, search_fields).order_by(f"-{SEARCH_RANK}", "-pk")
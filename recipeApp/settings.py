@@ -17,6 +17,9 @@ SECRET_KEY = 'django-insecure-_yd2^30$*zncxn_6^=7+!_a$abit39&&&#$@#g%0w%n0_x@b*q
 
 DEBUG = True
 
+# The toolbar instruments every query and template, keep it to local debugging.
+DEBUG_TOOLBAR = env.bool('DEBUG_TOOLBAR', default=False)
+
 ALLOWED_HOSTS = ['16.16.114.159', 'www.recipeSensei.com']
 
 INSTALLED_APPS = [
@@ -32,12 +35,15 @@ INSTALLED_APPS = [
     'recipes',
     'blogs',
     'nutritionists',
+    'benchmarks',
     'corsheaders',
     'django_celery_results',
-    'debug_toolbar',
     'rest_framework_simplejwt.token_blacklist',
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173',
 ]
@@ -49,14 +55,25 @@ CSRF_TRUSTED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.BasePermission'
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'recipeApp.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'recipeApp.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
+    'DEFAULT_PAGINATION_CLASS': 'recipeApp.pagination.CursorOptInPagination',
     'PAGE_SIZE': 20
 }
 
@@ -80,6 +97,9 @@ SIMPLE_JWT = {
 log_path = os.path.join(BASE_DIR, 'logs', 'app.log')
 
 MIDDLEWARE = [
+    'recipeApp.profiling.ProfilingMiddleware',
+    'recipeApp.metrics.MetricsMiddleware',
+    'recipeApp.slow_queries.SlowQueryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,9 +108,11 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG_TOOLBAR:
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'recipeApp.urls'
 
 TEMPLATES = [
@@ -142,7 +164,7 @@ INTERNAL_IPS = [
 ]
 
 def show_toolbar(request):
-    return True
+    return DEBUG and request.META.get('REMOTE_ADDR') in INTERNAL_IPS
 
 DEBUG_TOOLBAR_CONFIG = {
     'SHOW_TOOLBAR_CALLBACK' : show_toolbar,
@@ -160,12 +182,28 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    }
+}
+
 CELERY_BROKER_URL = 'redis://127.0.0.1:6379'
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = 'redis://127.0.0.1:6379/0'
 CELERY_TIMEZONE = 'Asia/Karachi'
+CELERY_TASK_TRACK_STARTED = True
+# Connects the task metrics, profiling and slow query signals in the workers.
+CELERY_IMPORTS = ('recipeApp.metrics', 'recipeApp.profiling', 'recipeApp.slow_queries')
+CELERY_BEAT_SCHEDULE = {
+    'recompute-trending-scores': {
+        'task': 'tasks.recompute_trending_scores',
+        'schedule': timedelta(minutes=5),
+    },
+}
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -193,11 +231,44 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'slow_queries': {
+            'handlers': ['file'],
+            'level': 'WARNING',
+            'propagate': True,
+        },
     },
 }
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+# Hand media transfers off to the front proxy: an internal nginx location for X-Accel-Redirect, or the header name
+# (X-Sendfile, X-LIGHTTPD-send-file) understood by Apache/lighttpd. The proxy then serves the bytes and the ranges.
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default=None)
+MEDIA_SENDFILE_HEADER = env('MEDIA_SENDFILE_HEADER', default=None)
+
+# Bearer token of the Prometheus scrapes of /metrics/. Without one, only INTERNAL_IPS may scrape.
+METRICS_TOKEN = env('METRICS_TOKEN', default=None)
+# Seconds between the merges of the metrics of each process into the shared cache, which the scrapes read.
+METRICS_FLUSH_INTERVAL = 10
+
+# Share of the requests and celery tasks profiled, see recipeApp/profiling.py. Admins profile a request on demand
+# with a signed X-Profile header.
+PROFILING_SAMPLE_RATE = env.float('PROFILING_SAMPLE_RATE', default=0.0)
+PROFILING_TASK_SAMPLE_RATE = env.float('PROFILING_TASK_SAMPLE_RATE', default=0.0)
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_INTERVAL = 0.001
+PROFILING_ROOT = env('PROFILING_ROOT', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_ARTIFACTS = 500
+
+# Lifetime of the users cached by CachedJWTAuthentication, which are also invalidated when they change.
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Queries slower than SLOW_QUERY_THRESHOLD seconds are logged and aggregated by fingerprint, see
+# recipeApp/slow_queries.py, and listed by the top_slow_queries command.
+SLOW_QUERY_THRESHOLD = env.float('SLOW_QUERY_THRESHOLD', default=0.1)
+SLOW_QUERY_FLUSH_INTERVAL = 60
+SLOW_QUERY_MAX_FINGERPRINTS = 1000
 
 GRAPH_MODELS = {
   'all_applications': True,
@@ -0,0 +1,255 @@
+"""This module contains the slow query log of the API and of the celery tasks.
+
+SlowQueryMiddleware, and the celery signals in the workers, wrap the database connection so that every query is
+timed. Queries slower than SLOW_QUERY_THRESHOLD seconds are logged to the slow_queries logger and grouped by their
+fingerprint, the SQL with its literals and parameters stripped and its IN lists collapsed, so that the same search or
+relation load with other values adds to one entry. Each entry counts the project frame the query came from, e.g. a
+serializer method, and the view that dispatched it.
+
+Entries are aggregated in the memory of each process, a count, a total, a max and a histogram of the durations for
+the p95, and merged into the shared cache at most every SLOW_QUERY_FLUSH_INTERVAL seconds, when a query is recorded
+and after each request or task. The top_slow_queries command reads them back.
+"""
+import atexit
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.views import View
+
+
+AGGREGATES_KEY = "slow-queries:aggregates"
+LOCK_KEY = "slow-queries:lock"
+LOCK_TIMEOUT = 10
+MAX_ORIGINS = 10
+# Duration histogram bounds from 1 ms to about 9 minutes, 25% apart, so the p95 is known within 25%.
+BUCKETS = tuple(0.001 * 1.25 ** index for index in range(60))
+STRING_PATTERN = re.compile(r"'(?:''|[^'])*'")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+PARAMETER_PATTERN = re.compile(r"%s|%\(\w+\)s")
+IN_LIST_PATTERN = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+VALUES_PATTERN = re.compile(r"(\([?, ]+\))(?:, \([?, ]+\))+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# The query wrappers themselves are never the origin of a query.
+INSTRUMENTATION_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).resolve().with_name("metrics.py")),
+    str(Path(__file__).resolve().with_name("profiling.py")),
+}
+
+logger = logging.getLogger("slow_queries")
+
+
+def normalize(sql):
+    """Returns the query with its literals and parameters replaced by ?, its IN lists and multi-row VALUES collapsed
+    and its whitespace squeezed.
+    """
+    sql = STRING_PATTERN.sub("?", sql)
+    sql = NUMBER_PATTERN.sub("?", sql)
+    sql = PARAMETER_PATTERN.sub("?", sql)
+    sql = IN_LIST_PATTERN.sub("IN (...)", sql)
+    sql = VALUES_PATTERN.sub(r"\1, ...", sql)
+    return WHITESPACE_PATTERN.sub(" ", sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+
+def is_project_file(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and "site-packages" not in filename
+        and filename not in INSTRUMENTATION_FILES
+    )
+
+
+def get_view_name(frame):
+    view = frame.f_locals.get("self") if frame.f_code.co_name == "dispatch" else None
+    return f"{type(view).__module__}.{type(view).__qualname__}" if isinstance(view, View) else None
+
+
+def get_origin():
+    """Returns the innermost project frame of the current stack, as path:line in function, followed by the view that
+    dispatched the request, as queries run by the views inherited from DRF, e.g. list() or the authentication, have
+    no project frame of their own.
+    """
+    frame = sys._getframe(1)
+    location = None
+
+    while frame is not None:
+        filename = frame.f_code.co_filename
+
+        if location is None and is_project_file(filename):
+            path = Path(filename).relative_to(settings.BASE_DIR)
+            location = f"{path}:{frame.f_lineno} in {frame.f_code.co_qualname}"
+
+        view_name = get_view_name(frame)
+
+        if view_name is not None:
+            return f"{location} via {view_name}" if location else view_name
+        frame = frame.f_back
+    return location
+
+
+def new_entry(sql):
+    return {"sql": sql, "count": 0, "total": 0, "max": 0, "buckets": {}, "origins": {}, "last_seen": None}
+
+
+def merge_entry(entry, other):
+    entry["count"] += other["count"]
+    entry["total"] += other["total"]
+    entry["max"] = max(entry["max"], other["max"])
+    entry["last_seen"] = max(filter(None, [entry["last_seen"], other["last_seen"]]), default=None)
+
+    for index, count in other["buckets"].items():
+        entry["buckets"][index] = entry["buckets"].get(index, 0) + count
+
+    for origin, count in other["origins"].items():
+        entry["origins"][origin] = entry["origins"].get(origin, 0) + count
+
+    entry["origins"] = dict(sorted(entry["origins"].items(), key=lambda item: -item[1])[:MAX_ORIGINS])
+    return entry
+
+
+def get_percentile(entry, percentile):
+    """Returns the upper bound of the histogram bucket holding the percentile, capped by the max duration.
+    """
+    rank = entry["count"] * percentile / 100
+    cumulative = 0
+
+    for index in sorted(entry["buckets"]):
+        cumulative += entry["buckets"][index]
+
+        if cumulative >= rank:
+            return min(BUCKETS[index] if index < len(BUCKETS) else entry["max"], entry["max"])
+    return entry["max"]
+
+
+class SlowQueryLog:
+    """Times the queries of the connection it wraps, and aggregates the slow ones until they are flushed.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.flushed = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                self.record(sql, duration, get_origin())
+
+    def record(self, sql, duration, origin):
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        logger.warning("Slow query %s took %.1f ms at %s: %s", key, duration * 1000, origin, normalized)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                if len(self.entries) >= settings.SLOW_QUERY_MAX_FINGERPRINTS:
+                    return
+                entry = self.entries[key] = new_entry(normalized)
+
+            index = bisect_left(BUCKETS, duration)
+            entry["count"] += 1
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+            entry["buckets"][index] = entry["buckets"].get(index, 0) + 1
+            entry["origins"][origin] = entry["origins"].get(origin, 0) + 1
+            entry["last_seen"] = timezone.now().isoformat()
+
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if self.entries and time.monotonic() - self.flushed >= settings.SLOW_QUERY_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Merges the entries into the cache. Processes flush in turn under a cache lock, and a process that finds it
+        taken keeps its entries for its next flush.
+        """
+        if not self.entries or not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            return
+
+        try:
+            with self.lock:
+                entries, self.entries = self.entries, {}
+                self.flushed = time.monotonic()
+
+            aggregates = cache.get(AGGREGATES_KEY) or {}
+
+            for key, entry in entries.items():
+                merge_entry(aggregates.setdefault(key, new_entry(entry["sql"])), entry)
+
+            top = sorted(aggregates.items(), key=lambda item: -item[1]["total"])
+            cache.set(AGGREGATES_KEY, dict(top[:settings.SLOW_QUERY_MAX_FINGERPRINTS]), timeout=None)
+        finally:
+            cache.delete(LOCK_KEY)
+
+
+SLOW_QUERIES = SlowQueryLog()
+atexit.register(SLOW_QUERIES.flush)
+
+
+def get_slow_queries():
+    """Returns the flushed entries by fingerprint, with their mean and p95 durations.
+    """
+    aggregates = cache.get(AGGREGATES_KEY) or {}
+
+    for entry in aggregates.values():
+        entry["mean"] = entry["total"] / entry["count"]
+        entry["p95"] = get_percentile(entry, 95)
+    return aggregates
+
+
+def reset_slow_queries():
+    cache.delete(AGGREGATES_KEY)
+
+
+class SlowQueryMiddleware:
+    """Logs the slow queries of every request.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(SLOW_QUERIES):
+            response = self.get_response(request)
+
+        # Flushed after the request too, so the entries of a process that goes quiet are not held until it exits.
+        SLOW_QUERIES.flush_if_due()
+        return response
+
+
+@task_prerun.connect
+def start_slow_query_log(task=None, **kwargs):
+    # Tasks run eagerly in a request are already wrapped by the middleware.
+    if SLOW_QUERIES not in connection.execute_wrappers:
+        connection.execute_wrappers.append(SLOW_QUERIES)
+        task.request.slow_queries = True
+
+
+@task_postrun.connect
+def stop_slow_query_log(task=None, **kwargs):
+    if getattr(task.request, "slow_queries", False):
+        connection.execute_wrappers.remove(SLOW_QUERIES)
+        task.request.slow_queries = False
+
+    SLOW_QUERIES.flush_if_due()
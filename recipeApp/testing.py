@@ -0,0 +1,55 @@
+"""This module contains the assertions shared by the test suites of the apps.
+"""
+import re
+from types import SimpleNamespace
+from django.db import connection
+from rest_framework.settings import api_settings
+
+
+SEQUENTIAL_SCAN_PATTERNS = {
+    "sqlite": r"\bSCAN {table}\b(?! USING)",
+    "postgresql": r"\bSeq Scan on {table}\b",
+}
+SORT_PATTERNS = {
+    "sqlite": r"\bUSE TEMP B-TREE FOR ORDER BY\b",
+    "postgresql": r"\bSort\b",
+}
+
+
+class QueryPlanAssertionsMixin:
+    """TestCase mixin asserting on the EXPLAIN output of querysets, on SQLite and PostgreSQL. PostgreSQL prefers
+    sequential scans on the tiny tables of a test database, so they are disabled for the EXPLAIN. A table that is
+    still scanned sequentially then has no usable index.
+    """
+    def get_page_queryset(self, view_class, user, query_params=None, **kwargs):
+        """Returns the query of the first page of a list view, as filtered by the view for the given user.
+        """
+        request = SimpleNamespace(user=user, query_params=query_params or {})
+        view = view_class(request=request, kwargs=kwargs, format_kwarg=None)
+        return view.filter_queryset(view.get_queryset())[:api_settings.PAGE_SIZE]
+
+    def get_query_plan(self, queryset):
+        if connection.vendor not in SEQUENTIAL_SCAN_PATTERNS:
+            self.skipTest(f"No query plan assertions for {connection.vendor}.")
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, indexes, ordered=True):
+        """Asserts that the queryset reads its table through one of the given indexes, never with a sequential scan,
+        and, when ordered, that the rows come in index order without a sort step.
+        """
+        plan = self.get_query_plan(queryset)
+        table = queryset.model._meta.db_table
+        message = f"\n{queryset.query}\n{plan}"
+
+        if re.search(SEQUENTIAL_SCAN_PATTERNS[connection.vendor].format(table=table), plan):
+            self.fail(f"Sequential scan on {table}:{message}")
+
+        if ordered and re.search(SORT_PATTERNS[connection.vendor], plan):
+            self.fail(f"Sort step instead of an index ordered scan of {table}:{message}")
+
+        if not any(index in plan for index in indexes):
+            self.fail(f"None of the indexes {', '.join(indexes)} is used:{message}")
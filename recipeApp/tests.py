@@ -0,0 +1,809 @@
+"""This module contains the tests of the API machinery shared by the apps.
+"""
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from django.urls import resolve, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.models import UserProfile
+from blogs.constants import APPROVED
+from blogs.models import Blog
+from nutritionists.models import Nutritionist
+from recipes.importers import RecipeImporter
+from recipes.tasks import generate_image_variants_task
+from recipeApp.metrics import Counter, Registry
+from recipeApp.pagination import CursorOptInPagination
+from recipeApp.profiling import PROFILE_HEADER, check_profile_token, make_profile_token, prune_artifacts
+from recipeApp.renderers import ORJSONParser, ORJSONRenderer
+from recipeApp.slow_queries import (
+    BUCKETS,
+    MAX_ORIGINS,
+    SLOW_QUERIES,
+    SlowQueryLog,
+    get_percentile,
+    get_slow_queries,
+    merge_entry,
+    new_entry,
+    normalize,
+)
+from recipes.models import Recipe
+from recipeApp.response_cache import get_response_cache_stats
+
+
+User = get_user_model()
+
+def authorization(user):
+    return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+
+class CursorPaginationTests(TestCase):
+    """Follows the next and previous cursors of a list view across its pages.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        profile = UserProfile.objects.create(user=cls.user)
+        Recipe.objects.bulk_create([
+            Recipe(
+                creator=profile,
+                title=f"Egg recipe {index}",
+                ingredients="egg",
+                instructions="Boil the egg.",
+                is_public=False,
+            )
+            for index in range(45)
+        ])
+        cls.expected = list(Recipe.objects.filter(is_public=False).order_by("-created_at", "-id").values_list(
+            "id", flat=True
+        ))
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        response = self.client.get(url, headers=authorization(self.user))
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_next_and_previous_links(self):
+        pages = [self.get(f"{reverse('recipe-private-list')}?pagination=cursor")]
+
+        while pages[-1]["next"]:
+            pages.append(self.get(pages[-1]["next"]))
+
+        self.assertEqual([len(page["results"]) for page in pages], [20, 20, 5])
+        self.assertEqual([row["id"] for page in pages for row in page["results"]], self.expected)
+        self.assertIsNone(pages[0]["previous"])
+        self.assertNotIn("count", pages[0])
+
+        previous = self.get(pages[-1]["previous"])
+        self.assertEqual(previous["results"], pages[1]["results"])
+        self.assertEqual(self.get(previous["previous"])["results"], pages[0]["results"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{reverse('recipe-private-list')}?cursor=garbage", headers=authorization(self.user))
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_results_are_not_cursor_paginated(self):
+        Recipe.objects.update(is_public=True)
+        url = f"{reverse('recipe-public-list')}?search=egg&pagination=cursor"
+        response = self.client.get(url, headers=authorization(self.user))
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_pantry_results_are_not_cursor_paginated(self):
+        full, partial = Recipe.objects.order_by("id")[:2]
+
+        for recipe, ingredients in [(full, "egg"), (partial, "egg\nflour\nmilk\nsugar")]:
+            recipe.is_public = True
+            recipe.ingredients = ingredients
+            recipe.save()
+        url = f"{reverse('recipe-pantry-list')}?ingredients=egg"
+
+        response = self.client.get(url, headers=authorization(self.user))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [(row["id"], row["coverage"]) for row in response.json()["results"]], [(full.id, 1.0), (partial.id, 0.25)]
+        )
+
+        response = self.client.get(f"{url}&pagination=cursor", headers=authorization(self.user))
+        self.assertEqual(response.status_code, 400, response.content)
+
+
+class MediaTests(TestCase):
+    """Requests uploaded files with conditional and range headers.
+    """
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = self.settings(MEDIA_ROOT=media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        with open(os.path.join(media_root.name, "photo.jpg"), "wb") as file:
+            file.write(self.content)
+
+        self.url = reverse("media", args=["photo.jpg"])
+        self.etag = self.client.get(self.url).headers["ETag"]
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response.headers["Content-Length"], str(len(self.content)))
+        self.assertEqual(response.headers["Accept-Ranges"], "bytes")
+
+    def test_ranges(self):
+        for header, start, end in [
+            ("bytes=0-99", 0, 99),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=-24", 1000, 1023),
+            ("bytes=1000-5000", 1000, 1023),
+        ]:
+            with self.subTest(header):
+                response = self.client.get(self.url, headers={"Range": header})
+
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b"".join(response.streaming_content), self.content[start:end + 1])
+                self.assertEqual(response.headers["Content-Range"], f"bytes {start}-{end}/1024")
+                self.assertEqual(response.headers["Content-Length"], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={"Range": "bytes=1024-"})
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["Content-Range"], "bytes */1024")
+
+    def test_if_range(self):
+        response = self.client.get(self.url, headers={"Range": "bytes=0-99", "If-Range": self.etag})
+        self.assertEqual(response.status_code, 206)
+
+        response = self.client.get(self.url, headers={"Range": "bytes=0-99", "If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_not_modified(self):
+        response = self.client.get(self.url, headers={"If-None-Match": self.etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], self.etag)
+        self.assertEqual(response.content, b"")
+
+        last_modified = self.client.head(self.url).headers["Last-Modified"]
+        response = self.client.get(self.url, headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, headers={"If-Modified-Since": http_date(0)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_file(self):
+        self.assertEqual(self.client.get(reverse("media", args=["missing.jpg"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("media", args=["../settings.py"])).status_code, 404)
+
+
+class ResponseCacheTests(TestCase):
+    """Serves list pages from the response cache and checks that writes to their models invalidate them.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        cls.other = UserProfile.objects.create(user=User.objects.create_user(username="other", password=None))
+
+        for profile in [cls.profile, cls.other]:
+            Recipe.objects.create(
+                creator=profile, title=f"{profile} egg", ingredients="egg", instructions="Boil the egg."
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url_name, user=None):
+        response = self.client.get(reverse(url_name), headers=authorization(user or self.user))
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row["title"] for row in response.json()["results"]]
+
+    def test_hits_run_no_queries(self):
+        titles = self.get("recipe-public-list")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get("recipe-public-list"), titles)
+
+        stats = get_response_cache_stats()["PublicRecipeListAPIView"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_ratio"]), (1, 1, 0.5))
+
+    def test_writes_invalidate(self):
+        self.get("recipe-public-list")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                creator=self.other, title="Fried egg", ingredients="egg", instructions="Fry the egg."
+            )
+
+        self.assertIn("Fried egg", self.get("recipe-public-list"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.is_public = False
+            recipe.save()
+
+        self.assertNotIn("Fried egg", self.get("recipe-public-list"))
+
+    def test_pages_per_user(self):
+        self.assertEqual(self.get("recipe-public-list-others"), ["other egg"])
+        self.assertEqual(self.get("recipe-public-list-others", self.other.user), ["cook egg"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "www.example.com"])
+    def test_pages_per_host(self):
+        links = []
+
+        with mock.patch.object(CursorOptInPagination, "page_size", 1):
+            for options in [{}, {"secure": True}, {"headers": {"host": "www.example.com"}}]:
+                headers = {**authorization(self.user), **options.pop("headers", {})}
+                response = self.client.get(reverse("recipe-public-list"), headers=headers, **options)
+                links.append(response.json()["next"])
+
+        self.assertEqual(
+            links,
+            [
+                f"http://testserver{reverse('recipe-public-list')}?page=2",
+                f"https://testserver{reverse('recipe-public-list')}?page=2",
+                f"http://www.example.com{reverse('recipe-public-list')}?page=2",
+            ],
+        )
+
+    def test_stats_view(self):
+        self.get("recipe-public-list")
+        response = self.client.get(reverse("response-cache-stats"), headers=authorization(self.admin))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["PublicRecipeListAPIView"]["misses"], 1)
+        response = self.client.get(reverse("response-cache-stats"), headers=authorization(self.user))
+        self.assertEqual(response.status_code, 403)
+
+
+class ExportTests(TestCase):
+    """Streams the recipe export in every format and imports it back.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        cls.profile = UserProfile.objects.create(user=User.objects.create_user(username="cook", password=None))
+        Recipe.objects.bulk_create([
+            Recipe(
+                creator=cls.profile,
+                title=f"Crème brûlée {index}",
+                ingredients="4 egg yolks\n500 ml cream, sugar",
+                instructions='Whisk, bake and "torch" the sugar.\nServe cold.',
+                is_public=index != 2,
+            )
+            for index in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, **params):
+        response = self.client.get(reverse("recipe-export"), params, headers=authorization(self.admin))
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def get_rows(self, queryset):
+        return list(queryset.order_by("pk").values_list("creator", "title", "ingredients", "instructions"))
+
+    def test_ndjson(self):
+        response, content = self.export()
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+
+        self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["creator"], "cook")
+        self.assertEqual(rows[0]["instructions"], 'Whisk, bake and "torch" the sugar.\nServe cold.')
+
+    def test_round_trips(self):
+        expected = self.get_rows(Recipe.objects.filter(is_public=True))
+
+        for params, import_format in [
+            ({}, "ndjson"),
+            ({"file_format": "csv"}, "csv"),
+            ({"file_format": "csv", "gzip": "true"}, "csv"),
+        ]:
+            with self.subTest(**params):
+                response, content = self.export(**params)
+
+                if params.get("gzip"):
+                    self.assertEqual(response.headers["Content-Type"], "application/gzip")
+                    content = gzip.decompress(content)
+
+                imported = Recipe.objects.filter(pk__gt=Recipe.objects.order_by("pk").last().pk)
+                report = RecipeImporter(self.profile).import_file(io.StringIO(content.decode()), import_format)
+
+                self.assertEqual((report.imported, report.errors), (4, []))
+                self.assertEqual(self.get_rows(imported), expected)
+
+                Recipe.objects.filter(pk__in=imported.values("pk")).delete()
+
+    def test_csv_columns(self):
+        _, content = self.export(file_format="csv")
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+
+        self.assertEqual(list(rows[0]), ["id", "creator", "title", "ingredients", "instructions", "image",
+                                         "save_count", "created_at", "modified_at"])
+        self.assertEqual(rows[0]["ingredients"], "4 egg yolks\n500 ml cream, sugar")
+
+    def test_modified_since(self):
+        _, content = self.export(modified_since="2999-01-01T00:00:00Z")
+        self.assertEqual(content, b"")
+
+    def test_admins_only(self):
+        response = self.client.get(reverse("recipe-export"), headers=authorization(self.profile.user))
+        self.assertEqual(response.status_code, 403)
+
+
+class FastPathTests(TestCase):
+    """Renders every fast path list view with and without its values serializer and compares the response bytes.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        other = UserProfile.objects.create(user=User.objects.create_user(username="chef", password=None))
+        variants = {
+            "source": "recipes/egg.jpg",
+            "hash": "0" * 32,
+            "placeholder": "data:image/webp;base64,AAAA",
+            "variants": {"thumbnail": {"avif": "variants/0-thumbnail.avif", "webp": "variants/0-thumbnail.webp"}},
+        }
+
+        for index in range(6):
+            Recipe.objects.create(
+                creator=cls.profile if index % 2 else other,
+                title=f"Œufs brouillés {index}",
+                ingredients="2 eggs\nbutter, salt",
+                instructions="Whisk the eggs. " * (index * 20) + "Cook them slowly in butter, stirring.",
+                is_public=index != 5,
+                image="recipes/egg.jpg" if index % 3 else "recipes/default.jpg",
+                image_variants=variants if index == 1 else {},
+            )
+
+        Recipe.objects.filter(pk__in=Recipe.objects.values("pk")[:3]).update(trending_score=1.5)
+        nutritionist = Nutritionist.objects.create(
+            user=User.objects.create_user(username="dietitian", password=None), years_of_experience=3
+        )
+
+        for index in range(3):
+            Blog.objects.create(
+                nutritionist=nutritionist, title=f"Blog {index}", content="Eat well. " * 40, status=APPROVED
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        response = self.client.get(url, headers=authorization(self.user))
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content
+
+    def test_responses_are_identical(self):
+        for url in [
+            reverse("recipe-public-list"),
+            f"{reverse('recipe-public-list')}?fields=id,image_variants,modified_at",
+            f"{reverse('recipe-public-list')}?search=eggs",
+            f"{reverse('recipe-public-list')}?pagination=cursor",
+            reverse("recipe-public-list-others"),
+            reverse("recipe-private-list"),
+            reverse("recipe-posted-list"),
+            reverse("recipe-trending-list"),
+            f"{reverse('recipe-pantry-list')}?ingredients=eggs, salt",
+            reverse("blog-approved-list"),
+        ]:
+            with self.subTest(url):
+                view_class = resolve(url.split("?")[0]).func.view_class
+                self.assertIsNotNone(view_class.values_serializer_class)
+                fast = self.get(url)
+                self.assertTrue(json.loads(fast)["results"])
+                cache.clear()
+
+                with mock.patch.object(view_class, "values_serializer_class", None):
+                    self.assertEqual(fast, self.get(url))
+
+                cache.clear()
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    """Scrapes the metrics, which add up the series flushed by every process.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def get_sample(self, lines, prefix):
+        return next((float(line.rsplit(" ", 1)[1]) for line in lines if line.startswith(prefix)), 0)
+
+    def test_requests_are_counted(self):
+        sample = 'http_requests_total{route="recipe-private-list",method="GET",status="200"}'
+        before = self.get_sample(self.scrape(), sample)
+
+        for _ in range(3):
+            self.client.get(reverse("recipe-private-list"), headers=authorization(self.user))
+
+        self.assertEqual(self.get_sample(self.scrape(), sample), before + 3)
+
+    def test_series_of_other_processes_are_merged(self):
+        before = self.get_sample(self.scrape(), 'http_requests_total{route="other"')
+        other_process = Registry()
+        other_process.register(Counter("http_requests_total", "", ("route", "method", "status"))).inc(
+            ("other", "GET", 200), 5
+        )
+        other_process.flush()
+
+        self.assertEqual(self.get_sample(self.scrape(), 'http_requests_total{route="other"'), before + 5)
+
+    def test_scrapes_need_the_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+
+class SlowQueryAggregationTests(SimpleTestCase):
+    """Checks the fingerprinting of slow queries and the aggregation of their entries.
+    """
+    def test_normalize(self):
+        self.assertEqual(
+            normalize(
+                'SELECT "U0"."id", T2."name" FROM "recipes_recipe" U0 INNER JOIN t T2\n  '
+                'WHERE U0."title" = \'it\'\'s\' AND U0."save_count" > 42 AND T2."score" < 1.5 AND U0."id" = %s '
+                'AND U0."creator_id" IN (%s, %s, %s)'
+            ),
+            'SELECT "U0"."id", T2."name" FROM "recipes_recipe" U0 INNER JOIN t T2 WHERE U0."title" = ? '
+            'AND U0."save_count" > ? AND T2."score" < ? AND U0."id" = ? AND U0."creator_id" IN (...)',
+        )
+        self.assertEqual(
+            normalize('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (?, ?), ...',
+        )
+        self.assertEqual(normalize("SELECT 1 WHERE a IN (1, 2)"), normalize("SELECT 7 WHERE a IN (3)"))
+
+    def test_percentile(self):
+        entry = {"count": 100, "max": 0.5, "buckets": {0: 90, 10: 10}}
+
+        self.assertEqual(get_percentile(entry, 50), BUCKETS[0])
+        self.assertEqual(get_percentile(entry, 95), BUCKETS[10])
+        self.assertEqual(get_percentile({**entry, "max": 0.002}, 95), 0.002)
+
+    def test_merge_entry(self):
+        entry = new_entry("SELECT ?")
+        entry.update(count=2, total=0.3, max=0.2, buckets={1: 2}, last_seen="2026-01-01T00:00:00")
+        entry["origins"] = {f"views.py:{line}": 1 for line in range(MAX_ORIGINS)}
+        other = new_entry("SELECT ?")
+        other.update(count=3, total=0.9, max=0.5, buckets={1: 1, 4: 2}, last_seen="2026-01-02T00:00:00")
+        other["origins"] = {"serializers.py:1": 3, "views.py:0": 1}
+
+        merge_entry(entry, other)
+
+        self.assertEqual((entry["count"], entry["total"], entry["max"]), (5, 1.2, 0.5))
+        self.assertEqual(entry["buckets"], {1: 3, 4: 2})
+        self.assertEqual(entry["last_seen"], "2026-01-02T00:00:00")
+        self.assertEqual(len(entry["origins"]), MAX_ORIGINS)
+        self.assertEqual(list(entry["origins"].items())[:2], [("serializers.py:1", 3), ("views.py:0", 2)])
+
+
+class SlowQueryLogTests(TestCase):
+    """Times queries through the slow query log, flushes them to the cache and lists them with top_slow_queries.
+    """
+    def setUp(self):
+        cache.clear()
+        entries = mock.patch.object(SLOW_QUERIES, "entries", {})
+        entries.start()
+        self.addCleanup(entries.stop)
+
+    def test_threshold(self):
+        log = SlowQueryLog()
+
+        with self.settings(SLOW_QUERY_THRESHOLD=60), connection.execute_wrapper(log):
+            User.objects.count()
+
+        self.assertEqual(log.entries, {})
+
+        with (
+            self.assertLogs("slow_queries", "WARNING"),
+            self.settings(SLOW_QUERY_THRESHOLD=0),
+            connection.execute_wrapper(log),
+        ):
+            User.objects.count()
+
+        [entry] = log.entries.values()
+        self.assertEqual(entry["count"], 1)
+        self.assertIn("recipeApp/tests.py", next(iter(entry["origins"])))
+
+    def test_quiet_process_flushes_after_requests(self):
+        with self.assertLogs("slow_queries", "WARNING"):
+            SLOW_QUERIES.record('SELECT * FROM "t" WHERE "id" = 1', 0.5, "views.py:1")
+
+        self.assertEqual(get_slow_queries(), {})
+        SLOW_QUERIES.flushed = time.monotonic() - settings.SLOW_QUERY_FLUSH_INTERVAL
+
+        with self.settings(SLOW_QUERY_THRESHOLD=60):
+            self.client.get(reverse("recipe-public-list"))
+
+        self.assertEqual([entry["count"] for entry in get_slow_queries().values()], [1])
+        self.assertEqual(SLOW_QUERIES.entries, {})
+
+    def record(self, log, sql, durations):
+        for duration in durations:
+            log.record(sql, duration, "views.py:1")
+
+    def test_command(self):
+        log = SlowQueryLog()
+
+        with self.assertLogs("slow_queries", "WARNING"):
+            self.record(log, 'SELECT * FROM "recipes_recipe"', [2.0])
+            self.record(log, 'SELECT * FROM "auth_user" WHERE "id" = 1', [0.2, 0.2, 0.2])
+
+        log.flush()
+        output = io.StringIO()
+        call_command("top_slow_queries", "--order-by", "count", stdout=output)
+        lines = output.getvalue().splitlines()
+
+        self.assertIn('SELECT * FROM "auth_user" WHERE "id" = ?', lines[1])
+        self.assertIn("count 3", lines[0])
+        self.assertIn('SELECT * FROM "recipes_recipe"', lines[4])
+
+        output = io.StringIO()
+        call_command("top_slow_queries", "--reset", stdout=output)
+        self.assertTrue(output.getvalue().splitlines()[0].startswith("1. "))
+        self.assertIn("Deleted the recorded slow queries.", output.getvalue())
+
+        output = io.StringIO()
+        call_command("top_slow_queries", stdout=output)
+        self.assertIn("No queries slower than", output.getvalue())
+
+
+class ProfileTokenTests(TestCase):
+    """Checks that profile tokens are only honoured while their user is an active admin.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+
+    def test_active_admin(self):
+        token = make_profile_token(self.admin)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(check_profile_token(token))
+
+    def test_revoked_admin(self):
+        token = make_profile_token(self.admin)
+
+        for fields in [{"is_staff": False}, {"is_active": False}]:
+            with self.subTest(**fields):
+                User.objects.filter(pk=self.admin.pk).update(**fields)
+                self.assertFalse(check_profile_token(token))
+                User.objects.filter(pk=self.admin.pk).update(is_staff=True, is_active=True)
+
+        self.admin.delete()
+        self.assertFalse(check_profile_token(token))
+
+    def test_bad_or_expired_token(self):
+        token = make_profile_token(self.admin)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(check_profile_token(token[:-1] + ("a" if token[-1] != "a" else "b")))
+            self.assertFalse(check_profile_token("garbage"))
+
+        with self.settings(PROFILING_TOKEN_MAX_AGE=-1):
+            self.assertFalse(check_profile_token(token))
+
+
+class ProfilingTests(TestCase):
+    """Profiles sampled and requested runs, and lists and downloads their artifacts.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        cls.user = User.objects.create_user(username="cook", password=None)
+        UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        profiling_root = tempfile.TemporaryDirectory()
+        self.addCleanup(profiling_root.cleanup)
+        self.root = Path(profiling_root.name)
+        override = self.settings(
+            PROFILING_ROOT=profiling_root.name, PROFILING_SAMPLE_RATE=0, PROFILING_TASK_SAMPLE_RATE=0
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, url, user=None, **headers):
+        return self.client.get(url, headers={**authorization(user or self.user), **headers})
+
+    def get_records(self):
+        return [json.loads(path.read_text()) for path in sorted(self.root.glob("*.json"))]
+
+    def assertArtifacts(self, record):
+        self.assertTrue(pstats.Stats(str(self.root / f"{record['id']}.prof")).total_calls)
+        self.assertTrue((self.root / f"{record['id']}.folded").is_file())
+
+    def test_unprofiled_request(self):
+        self.get(reverse("recipe-private-list"))
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_sampled_request(self):
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            self.assertEqual(self.get(reverse("recipe-private-list")).status_code, 200)
+
+        [record] = self.get_records()
+        self.assertEqual(
+            {key: record[key] for key in ["kind", "trigger", "name", "method", "user", "status"]},
+            {
+                "kind": "request",
+                "trigger": "sampled",
+                "name": "recipe-private-list",
+                "method": "GET",
+                "user": "cook",
+                "status": 200,
+            },
+        )
+        self.assertGreater(record["queries"], 0)
+        self.assertArtifacts(record)
+
+    def test_requested_request(self):
+        token = self.client.post(reverse("profile-token"), headers=authorization(self.admin)).json()["token"]
+        self.get(reverse("recipe-private-list"), **{PROFILE_HEADER: token})
+
+        [record] = self.get_records()
+        self.assertEqual(
+            (record["trigger"], record["name"], record["user"]), ("requested", "recipe-private-list", "cook")
+        )
+        self.assertArtifacts(record)
+
+        self.get(reverse("recipe-private-list"), **{PROFILE_HEADER: "garbage"})
+        self.assertEqual(len(self.get_records()), 1)
+
+    def test_sampled_task(self):
+        with self.settings(PROFILING_TASK_SAMPLE_RATE=1):
+            generate_image_variants_task.delay(0)
+
+        [record] = self.get_records()
+        self.assertEqual(
+            (record["kind"], record["name"], record["status"]), ("task", "tasks.generate_image_variants", "SUCCESS")
+        )
+        self.assertEqual(record["queries"], 1)
+        self.assertArtifacts(record)
+
+    def test_list_and_download(self):
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            self.get(reverse("recipe-private-list"))
+
+        response = self.get(reverse("profile-list"), self.admin)
+        [artifact] = response.json()
+        self.assertEqual(set(artifact["files"]), {"pstats", "folded"})
+
+        response = self.get(artifact["files"]["pstats"], self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), (self.root / f"{artifact['id']}.prof").read_bytes())
+
+        for artifact_id, artifact_format in [
+            (artifact["id"], "json"),
+            ("..settings", "pstats"),
+            ("20260101000000-000000000000", "pstats"),
+        ]:
+            with self.subTest(artifact_id=artifact_id, artifact_format=artifact_format):
+                kwargs = {"artifact_id": artifact_id, "artifact_format": artifact_format}
+                self.assertEqual(self.get(reverse("profile-download", kwargs=kwargs), self.admin).status_code, 404)
+
+    def test_admins_only(self):
+        url = reverse(
+            "profile-download", kwargs={"artifact_id": "20260101000000-000000000000", "artifact_format": "pstats"}
+        )
+
+        self.assertEqual(self.get(reverse("profile-list")).status_code, 403)
+        self.assertEqual(self.get(url).status_code, 403)
+        self.assertEqual(self.client.post(reverse("profile-token"), headers=authorization(self.user)).status_code, 403)
+
+    def test_prune_artifacts(self):
+        for index in range(4):
+            for suffix in [".prof", ".folded", ".json"]:
+                (self.root / f"2026010100000{index}-000000000000{suffix}").touch()
+
+        prune_artifacts(self.root, 2)
+
+        self.assertEqual(
+            sorted(path.name for path in self.root.iterdir()),
+            [
+                f"2026010100000{index}-000000000000{suffix}"
+                for index in [2, 3]
+                for suffix in [".folded", ".json", ".prof"]
+            ],
+        )
+
+
+class RendererTests(SimpleTestCase):
+    """Compares the orjson renderer and parser with the JSONRenderer and JSONParser of DRF.
+    """
+    def render(self, renderer_class, data):
+        try:
+            return renderer_class().render(data, "application/json", {})
+        except ValueError as error:
+            return type(error)
+
+    def parse(self, parser_class, content, encoding="utf-8"):
+        try:
+            return parser_class().parse(io.BytesIO(content), "application/json", {"encoding": encoding})
+        except ParseError:
+            return ParseError
+
+    def test_render(self):
+        for data in [
+            None,
+            {"title": "Crème brûlée 醤油 🍳", "separators": "\u2028\u2029", "quote": '"\\</script>'},
+            [1, -2, 0.5, 1.25e-3, 123456.789, 2 ** 63 - 1, 2 ** 70, True, False, None, "", [], {}],
+            {
+                "at": datetime.datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo=datetime.timezone.utc),
+                "naive": datetime.datetime(2026, 10, 18, 12, 30),
+                "date": datetime.date(2026, 10, 18),
+                "time": datetime.time(7, 5),
+                "duration": datetime.timedelta(minutes=90),
+                "decimal": decimal.Decimal("4.50"),
+                "uuid": uuid.UUID(int=7),
+                "lazy": gettext_lazy("Recipe"),
+                "tuple": (1, 2),
+                1: "non-string key",
+            },
+            ReturnDict({"results": [{"id": 1, "nested": {"a": [None]}}]}, serializer=None),
+            {"n": float("nan")},
+            [None, {"scores": [1.0, float("inf")]}],
+            {"n": -float("inf")},
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(self.render(ORJSONRenderer, data), self.render(JSONRenderer, data))
+
+    def test_parse(self):
+        for content in [
+            b'{"title": "Cr\xc3\xa8me", "n": [1, 2.5, -3e2, true, false, null], "u": "\\u2028"}',
+            b"[]",
+            b'"text"',
+            b"",
+            b"{",
+            b"NaN",
+            b'{"n": Infinity}',
+            b"\xff",
+        ]:
+            with self.subTest(content=content):
+                self.assertEqual(self.parse(ORJSONParser, content), self.parse(JSONParser, content))
+
+        latin = '{"title": "Crème"}'.encode("latin-1")
+        self.assertEqual(self.parse(ORJSONParser, latin, "latin-1"), {"title": "Crème"})
@@ -1,8 +1,10 @@
-import debug_toolbar
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from recipeApp.media import serve_media
+from recipeApp.metrics import metrics_view
+from recipeApp.profiling import ProfileDownloadAPIView, ProfileListAPIView, ProfileTokenAPIView
+from recipeApp.response_cache import ResponseCacheStatsAPIView
 
 
 urlpatterns = [
@@ -11,8 +13,25 @@ urlpatterns = [
     path("recipes/", include("recipes.urls")),
     path("blogs/", include("blogs.urls")),
     path("nutritionist/", include("nutritionists.urls")),
-    path("__debug__/", include(debug_toolbar.urls)),
+    path("cache/stats/", ResponseCacheStatsAPIView.as_view(), name="response-cache-stats"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("profiles/", ProfileListAPIView.as_view(), name="profile-list"),
+    path("profiles/token/", ProfileTokenAPIView.as_view(), name="profile-token"),
+    path(
+        "profiles/<str:artifact_id>/<str:artifact_format>/",
+        ProfileDownloadAPIView.as_view(),
+        name="profile-download",
+    ),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.DEBUG_TOOLBAR:
+    import debug_toolbar
+
+    urlpatterns += [
+        path("__debug__/", include(debug_toolbar.urls)),
+    ]
+
+urlpatterns += [
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"),
+]
 
@@ -1,7 +1,7 @@
 """This module contains the admin interface for recipes.
 """
 from django.contrib import admin
-from recipes.models import Recipe
+from recipes.models import Ingredient, Recipe
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -9,3 +9,9 @@ class RecipeAdmin(admin.ModelAdmin):
 
 admin.site.register(Recipe, RecipeAdmin)
 
+
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ("name",)
+    search_fields = ("name",)
+
+admin.site.register(Ingredient, IngredientAdmin)
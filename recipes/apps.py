@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from recipeApp.conditional import track_model_versions
+        from recipeApp.search import search_index_post_migrate
+        from recipes import signals
+        from recipes.constants import SEARCH_FIELDS
+        from recipes.models import Recipe
+
+        track_model_versions(Recipe)
+        self.restore_search_index = search_index_post_migrate("recipes_recipe", SEARCH_FIELDS)
+        post_migrate.connect(self.restore_search_index, sender=self)
@@ -0,0 +1,170 @@
+"""This module contains the content-addressed cache of AI generated recipes. Entries are keyed on the canonical form
+of the ingredient list and on a hash of the generation prompt, so changing the prompt invalidates every entry.
+Lookups and coalesced calls are counted in the /metrics/ registry.
+"""
+import hashlib
+import re
+import threading
+import time
+import uuid
+from cachetools import TTLCache
+from django.core.cache import caches
+from recipes.constants import (
+    GENERATION_CACHE_ALIAS,
+    GENERATION_CACHE_MAX_ENTRIES,
+    GENERATION_CACHE_TTL,
+    GENERATION_LOCK_POLL_INTERVAL,
+    GENERATION_LOCK_TIMEOUT,
+    RECIPE_GENERATION_PROMPT,
+)
+from recipeApp.metrics import REGISTRY, Counter
+
+
+PROMPT_HASH = hashlib.sha256(RECIPE_GENERATION_PROMPT.encode()).hexdigest()
+GENERATION_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "recipe_generation_cache_lookups_total", "Generation cache lookups by result.", ("result",)
+))
+GENERATION_CALLS_COALESCED = REGISTRY.register(Counter(
+    "recipe_generation_calls_coalesced_total",
+    "Generations answered by an identical call in flight, or that stopped waiting for it, by outcome.",
+    ("outcome",),
+))
+
+
+def increment(metric, value):
+    with REGISTRY.lock:
+        metric.inc((value,))
+
+
+def canonicalize_ingredients(ingredients):
+    """Returns the ingredients as a sorted list of unique, lower-cased, whitespace-normalized tokens, so that
+    "eggs, flour, milk" and "Milk,eggs , flour" have the same canonical form.
+    """
+    tokens = (" ".join(token.split()).strip(".!-") for token in re.split(r"[,;\n]+", ingredients.lower()))
+    return sorted({token for token in tokens if token})
+
+
+def generation_cache_key(tokens):
+    digest = hashlib.sha256("\n".join([PROMPT_HASH, *tokens]).encode()).hexdigest()
+    return f"recipe-generation:{digest}"
+
+
+class GenerationCache:
+    """Two-tier cache: a per-process LRU with a TTL in front of the shared Django cache.
+    """
+    def __init__(self, alias, ttl, max_entries):
+        self.alias = alias
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.lock = threading.Lock()
+
+    def get(self, key, count=True):
+        with self.lock:
+            value = self.local.get(key)
+
+        if value is not None:
+            if count:
+                increment(GENERATION_CACHE_LOOKUPS, "local_hit")
+            return value
+
+        value = caches[self.alias].get(key)
+
+        if value is None:
+            if count:
+                increment(GENERATION_CACHE_LOOKUPS, "miss")
+            return None
+
+        if count:
+            increment(GENERATION_CACHE_LOOKUPS, "shared_hit")
+
+        with self.lock:
+            self.local[key] = value
+        return value
+
+    def set(self, key, value):
+        caches[self.alias].set(key, value, timeout=self.ttl)
+
+        with self.lock:
+            self.local[key] = value
+
+
+class InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key into a single upstream call. Within a process, followers wait for
+    the leader's result. Across processes, the leader holds a short-lived lock in the shared cache while followers
+    poll for the result it stores, and take over if the lock expires without a result. Followers in the leader's
+    process stop waiting after the lock timeout too, so a hung leader never holds them for longer.
+    """
+    def __init__(self, alias, lock_timeout, poll_interval):
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, call, lookup):
+        """Returns call() for the key, or the result of the identical call already in flight.
+
+        Args:
+            key (string): Key identifying identical calls.
+            call (callable): Makes the upstream call and stores its result where lookup can find it.
+            lookup (callable): Returns the stored result of a finished call for the key, or None.
+        """
+        with self.lock:
+            in_flight = self.calls.get(key)
+            is_leader = in_flight is None
+
+            if is_leader:
+                in_flight = self.calls[key] = InFlightCall()
+
+        if not is_leader:
+            if not in_flight.done.wait(self.lock_timeout):
+                increment(GENERATION_CALLS_COALESCED, "timed_out")
+                return self.do_shared(key, call, lookup)
+
+            increment(GENERATION_CALLS_COALESCED, "same_process")
+
+            if in_flight.error:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            in_flight.result = self.do_shared(key, call, lookup)
+            return in_flight.result
+        except Exception as error:
+            in_flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            in_flight.done.set()
+
+    def do_shared(self, key, call, lookup):
+        cache = caches[self.alias]
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+
+        while not cache.add(lock_key, token, timeout=self.lock_timeout):
+            time.sleep(self.poll_interval)
+            result = lookup()
+
+            if result is not None:
+                increment(GENERATION_CALLS_COALESCED, "other_process")
+                return result
+
+        try:
+            result = lookup()
+            return result if result is not None else call()
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+
+generation_cache = GenerationCache(GENERATION_CACHE_ALIAS, GENERATION_CACHE_TTL, GENERATION_CACHE_MAX_ENTRIES)
+generation_flight = SingleFlight(GENERATION_CACHE_ALIAS, GENERATION_LOCK_TIMEOUT, GENERATION_LOCK_POLL_INTERVAL)
@@ -3,3 +3,57 @@
 RECIPE_GENERATION_PROMPT = "Write a recipe with proper instructions for the given ingredients. State separately the amo\
     unt of each ingredient and the steps. Dont bold or italize the headings. Here are the ingredients:"
 
+
+# Searchable fields in order of decreasing weight. The search index migration was created with the same order.
+SEARCH_FIELDS = ["title", "ingredients", "instructions"]
+
+GENERATION_CACHE_ALIAS = "default"
+GENERATION_CACHE_TTL = 60 * 60 * 24
+GENERATION_CACHE_MAX_ENTRIES = 1024
+GENERATION_LOCK_TIMEOUT = 30
+GENERATION_LOCK_POLL_INTERVAL = 0.25
+
+SYNC = "sync"
+ASYNC = "async"
+GENERATION_DEFAULT_MODE = SYNC
+GENERATION_JOB_SOFT_TIME_LIMIT = 60
+GENERATION_JOB_TIME_LIMIT = 75
+GENERATION_JOB_MAX_RETRIES = 3
+GENERATION_JOB_MAX_IN_FLIGHT = 50
+GENERATION_JOB_TTL = 60 * 60 * 24
+# A slot outlives every attempt of its job, time limits and retry backoffs included, plus time in the queue. Slots of
+# killed workers are never released and expire after it.
+GENERATION_JOB_SLOT_TTL = 60 * 15
+GENERATION_SLOT_LOCK_TIMEOUT = 5
+
+SAVE = "save"
+UNSAVE = "unsave"
+BULK_SAVE_MAX_IDS = 500
+
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_RECOMPUTE_INTERVAL = 60 * 5
+TRENDING_MIN_SCORE = 0.01
+TRENDING_CACHE_TTL = 60 * 5
+
+IMAGE_VARIANT_DIRECTORY = "recipes/variants"
+IMAGE_VARIANT_WIDTHS = {"thumbnail": 320, "medium": 768, "large": 1280}
+# Preferred formats first. Formats the installed Pillow cannot encode are skipped.
+IMAGE_VARIANT_FORMATS = ["avif", "webp"]
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_PLACEHOLDER_WIDTH = 16
+
+IMPORT_FORMATS = ["jsonl", "csv"]
+IMPORT_BATCH_SIZE = 2000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+EXPORT_FIELDS = {
+    "id": "id",
+    "creator": "creator__user__username",
+    "title": "title",
+    "ingredients": "ingredients",
+    "instructions": "instructions",
+    "image": "image",
+    "save_count": "save_count",
+    "created_at": "created_at",
+    "modified_at": "modified_at",
+}
@@ -0,0 +1,86 @@
+"""This module generates the resized variants and the blur placeholder of recipe images.
+
+Variants are stored under the content hash of the original image, so re-uploads of the same picture and the
+default image share their variants, and unchanged images are never processed twice.
+"""
+import base64
+import hashlib
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageFilter, ImageOps
+from recipes.constants import (
+    IMAGE_PLACEHOLDER_WIDTH,
+    IMAGE_VARIANT_DIRECTORY,
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_WIDTHS,
+)
+
+
+Image.init()
+
+
+def get_variant_formats():
+    """Returns the variant formats supported by the installed Pillow, AVIF needing Pillow built with libavif.
+    """
+    return [image_format for image_format in IMAGE_VARIANT_FORMATS if image_format.upper() in Image.SAVE]
+
+
+def get_content_hash(content):
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+def get_variant_path(content_hash, name, image_format):
+    return f"{IMAGE_VARIANT_DIRECTORY}/{content_hash}-{name}.{image_format}"
+
+
+def encode_image(image, image_format):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def resize(image, width):
+    if image.width <= width:
+        return image
+    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+
+def get_placeholder(image):
+    """Returns a data URI of a tiny blurred WebP rendition of the image, inlined by clients while the variant loads.
+    """
+    placeholder = resize(image, IMAGE_PLACEHOLDER_WIDTH).filter(ImageFilter.GaussianBlur(1))
+    return f"data:image/webp;base64,{base64.b64encode(encode_image(placeholder, 'webp')).decode()}"
+
+
+def generate_image_variants(content, source):
+    """Stores the variants of an image given its bytes and returns the image_variants of a recipe using it:
+    {"source": name, "hash": content hash, "placeholder": data URI, "variants": {name: {format: path}}}.
+    """
+    content_hash = get_content_hash(content)
+
+    with Image.open(BytesIO(content)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    variants = {}
+
+    for name, width in IMAGE_VARIANT_WIDTHS.items():
+        resized = resize(image, width)
+        variants[name] = {}
+
+        for image_format in get_variant_formats():
+            path = get_variant_path(content_hash, name, image_format)
+
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(encode_image(resized, image_format)))
+            variants[name][image_format] = path
+
+    return {"source": source, "hash": content_hash, "placeholder": get_placeholder(image), "variants": variants}
+
+
+def generate_stored_image_variants(name):
+    """Generates the variants of an image already in the default storage.
+    """
+    with default_storage.open(name, "rb") as image_file:
+        return generate_image_variants(image_file.read(), name)
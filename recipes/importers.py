@@ -0,0 +1,168 @@
+"""This module imports recipes in bulk from JSON lines or CSV files.
+
+Files are parsed as a stream, rows are validated with RecipeSerializer and inserted with bulk_create in batches, each
+batch in its own transaction together with its ingredient index entries. Invalid rows are reported with their row
+number and skipped, the rest of their batch is still imported. The image column of the exports, the name of a file
+already in the storage, is kept when the file exists, so exported files import back as they are.
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework import serializers
+from authentication.models import UserProfile
+from recipes.constants import IMPORT_BATCH_SIZE, IMPORT_FORMATS
+from recipes.ingredients import index_recipes
+from recipes.models import Recipe
+from recipes.serializers import RecipeSerializer
+from recipeApp.conditional import bump_model_versions
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    errors: list = field(default_factory=list)
+    dry_run: bool = False
+    started: float = field(default_factory=time.monotonic)
+    elapsed: float = 0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+    def as_dict(self, max_errors=None):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": len(self.errors),
+            "dry_run": self.dry_run,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second),
+            "errors": [{"row": row, "errors": errors} for row, errors in self.errors[:max_errors]],
+        }
+
+
+def get_import_format(name, import_format=None):
+    import_format = import_format or name.rsplit(".", 1)[-1].lower()
+
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format {import_format!r}, expected one of {', '.join(IMPORT_FORMATS)}.")
+    return import_format
+
+
+def iter_rows(text_file, import_format):
+    """Yields (line number, row) pairs parsed lazily from a text file. Unparsable JSON lines yield their error instead.
+    """
+    if import_format == "csv":
+        yield from enumerate(csv.DictReader(text_file), start=2)
+        return
+
+    for number, line in enumerate(text_file, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            row = error
+
+        yield number, row if isinstance(row, (dict, Exception)) else TypeError("Expected a JSON object.")
+
+
+def open_text(binary_file):
+    return io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+
+
+class RecipeImporter:
+    """Validates and inserts recipe rows for a default creator. Rows may name another creator by username in a
+    creator column.
+    """
+    def __init__(self, creator, batch_size=IMPORT_BATCH_SIZE, dry_run=False, progress=None):
+        self.creator = creator
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.serializer = RecipeSerializer()
+        self.creators = {creator.user.username: creator}
+        self.images = {}
+
+    def get_creator(self, username):
+        if not username:
+            return self.creator
+
+        if username not in self.creators:
+            self.creators[username] = UserProfile.objects.filter(user__username=username).first()
+        return self.creators[username]
+
+    def get_image(self, name):
+        """Returns the name of an image already in the storage, or None for the default image.
+        """
+        if not name:
+            return None
+
+        if name not in self.images:
+            try:
+                self.images[name] = name if default_storage.exists(name) else None
+            except SuspiciousFileOperation:
+                self.images[name] = None
+        return self.images[name]
+
+    def build(self, number, row, report):
+        """Returns the unsaved recipe of a row, or None after recording the row's errors.
+        """
+        if isinstance(row, Exception):
+            report.errors.append((number, {"non_field_errors": [str(row)]}))
+            return None
+
+        image = row.pop("image", None)
+
+        try:
+            validated_data = self.serializer.run_validation(row)
+        except serializers.ValidationError as error:
+            report.errors.append((number, error.detail))
+            return None
+
+        creator = self.get_creator(row.get("creator"))
+
+        if creator is None:
+            report.errors.append((number, {"creator": [f"Unknown user {row['creator']!r}."]}))
+            return None
+        recipe = Recipe(creator=creator, **validated_data)
+
+        if isinstance(image, str) and self.get_image(image):
+            recipe.image = image
+        return recipe
+
+    def import_rows(self, rows):
+        """Imports (row number, row) pairs and returns the import report.
+        """
+        report = ImportReport(dry_run=self.dry_run)
+        rows = iter(rows)
+
+        while batch := list(islice(rows, self.batch_size)):
+            recipes = [recipe for recipe in (self.build(number, row, report) for number, row in batch) if recipe]
+            report.rows += len(batch)
+
+            if not self.dry_run and recipes:
+                with transaction.atomic():
+                    index_recipes(Recipe.objects.bulk_create(recipes))
+
+            report.imported += len(recipes)
+            report.elapsed = time.monotonic() - report.started
+
+            if self.progress:
+                self.progress(report)
+
+        if report.imported and not self.dry_run:
+            bump_model_versions(Recipe)
+        report.elapsed = time.monotonic() - report.started
+        return report
+
+    def import_file(self, text_file, import_format):
+        return self.import_rows(iter_rows(text_file, import_format))
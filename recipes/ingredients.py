@@ -0,0 +1,108 @@
+"""This module parses the free-text ingredients of recipes into normalized ingredient names and maintains the
+ingredient index used by the pantry search.
+"""
+import re
+import unicodedata
+from itertools import chain, groupby
+from django.db import connection, transaction
+
+
+QUANTITY_WORDS = {
+    "a", "an", "and", "of", "or", "one", "two", "three", "four", "five", "six", "half", "quarter", "few", "some",
+    "pinch", "dash", "handful", "to", "taste", "as", "needed", "for", "serving", "about", "plus", "extra", "x",
+}
+UNITS = {
+    "cup", "cups", "tbsp", "tablespoon", "tablespoons", "tsp", "teaspoon", "teaspoons", "g", "gm", "gram", "grams",
+    "kg", "kilogram", "kilograms", "mg", "ml", "l", "litre", "litres", "liter", "liters", "oz", "ounce", "ounces",
+    "lb", "lbs", "pound", "pounds", "clove", "cloves", "slice", "slices", "piece", "pieces", "can", "cans", "stick",
+    "sticks", "bunch", "bunches", "sprig", "sprigs", "packet", "packets", "pack", "jar", "bottle", "inch", "cm",
+}
+DESCRIPTORS = {
+    "chopped", "minced", "diced", "sliced", "grated", "shredded", "crushed", "ground", "fresh", "freshly", "dried",
+    "large", "medium", "small", "finely", "roughly", "thinly", "boneless", "skinless", "peeled", "optional",
+    "softened", "melted", "beaten", "cooked", "uncooked", "raw", "whole", "room", "temperature", "cold", "warm",
+    "hot", "frozen", "canned", "divided", "heaping", "level", "cubed", "halved", "quartered", "trimmed",
+}
+IGNORED = QUANTITY_WORDS | UNITS | DESCRIPTORS
+HEADINGS = {"ingredients", "ingredient", "instructions", "steps", "method", "directions"}
+MAX_NAME_LENGTH = 100
+
+
+def singularize(word):
+    if word.endswith("ies") and len(word) > 4:
+        return f"{word[:-3]}y"
+    if word.endswith("oes") and len(word) > 4:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(line):
+    """Returns the normalized name of an ingredient line, e.g. "2 cups Chopped Tomatoes (ripe)" gives "tomato", or
+    None when nothing is left once quantities, units and descriptors are removed. Words are runs of letters in any
+    script, so "Crème fraîche" or "jalapeños" are kept whole. NFKC composes accents and turns vulgar fractions
+    such as ½ into digits, which are dropped with the other quantities.
+    """
+    line = unicodedata.normalize("NFKC", line).casefold()
+    line = re.sub(r"\([^)]*\)|[\d_]+", " ", line)
+    words = [word for word in re.findall(r"\w+", line) if word not in IGNORED]
+
+    if not words or words[0] in HEADINGS:
+        return None
+
+    words[-1] = singularize(words[-1])
+    return " ".join(words)[:MAX_NAME_LENGTH]
+
+
+def parse_ingredients(text):
+    """Returns the sorted unique normalized ingredient names of a free-text ingredient list, split on new lines,
+    commas and semicolons.
+    """
+    names = (normalize_ingredient(line) for line in re.split(r"[\n,;]+", text))
+    return sorted({name for name in names if name})
+
+
+def insert_entries(model, entries):
+    """Inserts (recipe id, ingredient id) index entries with multi-row INSERT statements, which skips building a
+    model instance per entry. Imports insert several entries per recipe, so with bulk_create this dominated their cost.
+    """
+    if not entries:
+        return
+
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field("recipe"), model._meta.get_field("ingredient")]
+    sql = "INSERT INTO {} ({}) VALUES ".format(
+        quote(model._meta.db_table), ", ".join(quote(field.column) for field in fields)
+    )
+    batch_size = connection.ops.bulk_batch_size(fields, entries) or len(entries)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            cursor.execute(sql + ", ".join(["(%s, %s)"] * len(batch)), list(chain.from_iterable(batch)))
+
+
+def index_recipes(recipes):
+    """Rebuilds the ingredient index entries and the ingredient counts of the given recipes in bulk.
+    """
+    from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+    parsed = {recipe.pk: parse_ingredients(recipe.ingredients) for recipe in recipes}
+    names = set().union(*parsed.values())
+
+    with transaction.atomic():
+        Ingredient.objects.bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True)
+        ingredient_ids = dict(Ingredient.objects.filter(name__in=names).values_list("name", "id"))
+        RecipeIngredient.objects.filter(recipe_id__in=parsed).delete()
+        insert_entries(RecipeIngredient, [
+            (recipe_id, ingredient_ids[name]) for recipe_id, recipe_names in parsed.items() for name in recipe_names
+        ])
+
+        by_count = sorted(parsed.items(), key=lambda item: len(item[1]))
+
+        for count, group in groupby(by_count, key=lambda item: len(item[1])):
+            Recipe.objects.filter(pk__in=[recipe_id for recipe_id, _ in group]).update(ingredient_count=count)
+
+    for recipe in recipes:
+        recipe.ingredient_count = len(parsed[recipe.pk])
@@ -0,0 +1,14 @@
+"""This module contains the command that exports the public recipes as NDJSON or CSV.
+"""
+from recipes.constants import EXPORT_FIELDS
+from recipes.models import Recipe
+from recipeApp.exports import BaseExportCommand
+
+
+class Command(BaseExportCommand):
+    help = "Streams all the public recipes as NDJSON or CSV to a file or stdout."
+    export_name = "recipes"
+    export_fields = EXPORT_FIELDS
+
+    def get_queryset(self):
+        return Recipe.objects.filter(is_public=True)
@@ -0,0 +1,61 @@
+"""This module contains the command that backfills the image variants of the recipe images in the media directory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from recipes.images import generate_stored_image_variants
+from recipes.models import Recipe
+from recipeApp.conditional import bump_model_versions
+
+
+def generate(name):
+    try:
+        return name, generate_stored_image_variants(name), None
+    except Exception as error:
+        return name, None, error
+
+
+class Command(BaseCommand):
+    help = "Generates the variants of the recipe images in the media directory with a pool of processes and " \
+        "attaches them to the recipes using each image."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Defaults to the number of CPUs.")
+        parser.add_argument("--force", action="store_true", help="Regenerates images that already have variants.")
+
+    def get_image_names(self, force):
+        directory = Recipe._meta.get_field("image").upload_to.rstrip("/")
+        _, files = default_storage.listdir(directory)
+        stored = {f"{directory}/{name}" for name in files}
+        recipes = Recipe.objects.exclude(image="").order_by()
+        names = set()
+
+        for name, image_variants in recipes.values_list("image", "image_variants").iterator():
+            if force or image_variants.get("source") != name:
+                names.add(name)
+
+        missing = names - stored
+
+        if missing:
+            self.stderr.write(f"Skipping {len(missing)} images missing from the media directory.")
+        return sorted(names & stored)
+
+    def handle(self, *args, **options):
+        names = self.get_image_names(options["force"])
+        self.stdout.write(f"Generating the variants of {len(names)} images.")
+        connections.close_all()
+        generated = 0
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            for name, image_variants, error in executor.map(generate, names, chunksize=4):
+                if error is not None:
+                    self.stderr.write(f"Failed to process {name}: {error}")
+                    continue
+
+                Recipe.objects.filter(image=name).update(image_variants=image_variants, modified_at=timezone.now())
+                generated += 1
+
+        bump_model_versions(Recipe)
+        self.stdout.write(self.style.SUCCESS(f"Generated the variants of {generated} images."))
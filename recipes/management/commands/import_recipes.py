@@ -0,0 +1,52 @@
+"""This module contains the command that imports recipes in bulk from a JSON lines or CSV file.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models import UserProfile
+from recipes.constants import IMPORT_BATCH_SIZE, IMPORT_FORMATS
+from recipes.importers import RecipeImporter, get_import_format
+
+
+class Command(BaseCommand):
+    help = "Imports recipes from a JSON lines or CSV file with title, ingredients, instructions, is_public and an " \
+        "optional creator username per row."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--creator", required=True, help="Username of the creator of rows without a creator.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validates the rows without importing them.")
+        parser.add_argument("--max-errors", type=int, default=50, help="Number of row errors to print.")
+
+    def progress(self, report):
+        self.stdout.write(
+            f"{report.rows:>10,} rows   {report.imported:>10,} valid   {len(report.errors):>8,} failed   "
+            f"{report.rows_per_second:>8,.0f} rows/s"
+        )
+
+    def handle(self, *args, **options):
+        creator = UserProfile.objects.select_related("user").filter(user__username=options["creator"]).first()
+
+        if creator is None:
+            raise CommandError(f"Unknown user {options['creator']!r}.")
+
+        try:
+            import_format = get_import_format(options["path"], options["format"])
+        except ValueError as error:
+            raise CommandError(error)
+
+        importer = RecipeImporter(
+            creator, batch_size=options["batch_size"], dry_run=options["dry_run"], progress=self.progress
+        )
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as text_file:
+            report = importer.import_file(text_file, import_format)
+
+        for row, errors in report.errors[:options["max_errors"]]:
+            self.stderr.write(f"Row {row}: {errors}")
+
+        verb = "Validated" if report.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.imported:,} of {report.rows:,} rows in {report.elapsed:.1f} s "
+            f"({report.rows_per_second:,.0f} rows/s), {len(report.errors):,} failed."
+        ))
@@ -0,0 +1,30 @@
+"""This module contains the command that backfills the ingredient index of existing recipes.
+"""
+from django.core.management.base import BaseCommand
+from recipes.ingredients import index_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Parses the ingredients of every recipe into the ingredient index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.only("id", "ingredients").order_by("pk")
+        last_pk = 0
+        indexed = 0
+
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options["batch_size"]])
+
+            if not batch:
+                break
+
+            index_recipes(batch)
+            last_pk = batch[-1].pk
+            indexed += len(batch)
+            self.stdout.write(f"Indexed {indexed} recipes.")
+
+        self.stdout.write(self.style.SUCCESS(f"Ingredient index rebuilt for {indexed} recipes."))
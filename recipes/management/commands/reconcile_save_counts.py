@@ -0,0 +1,51 @@
+"""This module contains the command that reconciles the recipe save counts with the saved recipes through table.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from authentication.models import UserProfile
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recounts the saves of every recipe from the saved recipes table and fixes the counters that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        saves = UserProfile.saved_recipes.through.objects.filter(recipe_id=OuterRef("pk")).order_by().values(
+            "recipe_id"
+        ).annotate(count=Count("pk")).values("count")
+        actual = Coalesce(Subquery(saves, output_field=IntegerField()), Value(0))
+        last_pk = 0
+        checked = 0
+        fixed = 0
+
+        while True:
+            batch = list(
+                Recipe.objects.filter(pk__gt=last_pk).order_by("pk").annotate(actual=actual).values_list(
+                    "pk", "save_count", "actual"
+                )[:options["batch_size"]]
+            )
+
+            if not batch:
+                break
+
+            drifted = {}
+
+            for pk, save_count, count in batch:
+                if save_count != count:
+                    drifted.setdefault(count, []).append(pk)
+
+            if not options["dry_run"]:
+                for count, pks in drifted.items():
+                    Recipe.objects.filter(pk__in=pks).update(save_count=count)
+
+            last_pk = batch[-1][0]
+            checked += len(batch)
+            fixed += sum(len(pks) for pks in drifted.values())
+
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} drifted save counts in {checked} recipes."))
@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 13:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+from recipeApp.search import search_index_migration
+
+
+create_search_index, drop_search_index = search_index_migration("recipes_recipe", ["title", "ingredients", "instructions"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
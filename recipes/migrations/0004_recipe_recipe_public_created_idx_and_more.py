@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('recipes', '0003_ingredient_recipe_ingredient_count_recipeingredient'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='recipe_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['creator', '-created_at', '-id'], name='recipe_creator_created_idx'),
+        ),
+    ]
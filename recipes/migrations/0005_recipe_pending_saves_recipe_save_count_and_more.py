@@ -0,0 +1,52 @@
+# Generated by Django 5.1 on 2026-10-18 13:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_saves(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    UserProfile = apps.get_model("authentication", "UserProfile")
+    counts = UserProfile.saved_recipes.through.objects.values("recipe_id").annotate(count=Count("pk"))
+    recipes_by_count = {}
+
+    for row in counts:
+        recipes_by_count.setdefault(row["count"], []).append(row["recipe_id"])
+
+    for count, recipe_ids in recipes_by_count.items():
+        Recipe.objects.filter(pk__in=recipe_ids).update(save_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('recipes', '0004_recipe_recipe_public_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='pending_saves',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='save_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('is_public', True), ('trending_score__gt', 0)), fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('pending_saves', 0), _negated=True), fields=['id'], name='recipe_pending_saves_idx'),
+        ),
+        migrations.RunPython(count_saves, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 """This module contains the recipe related models.
 """
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -9,10 +10,62 @@ class Recipe(models.Model):
     ingredients = models.TextField()
     instructions = models.TextField()
     image = models.ImageField(upload_to="recipes/", default="recipes/default.jpg")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_public = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
+    ingredient_count = models.PositiveSmallIntegerField(default=0, editable=False)
+    save_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_saves = models.IntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="recipe_public_created_idx",
+                condition=models.Q(is_public=True),
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="recipe_private_created_idx",
+                condition=models.Q(is_public=False),
+            ),
+            models.Index(fields=["creator", "-created_at", "-id"], name="recipe_creator_created_idx"),
+            models.Index(
+                fields=["-trending_score", "-id"],
+                name="recipe_trending_idx",
+                condition=models.Q(is_public=True, trending_score__gt=0),
+            ),
+            models.Index(fields=["id"], name="recipe_pending_saves_idx", condition=~models.Q(pending_saves=0)),
+        ]
 
     def __str__(self):
         return self.title
-    
+
+
+class Ingredient(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    """Entry of the inverted ingredient index, linking a normalized ingredient to a recipe that uses it.
+    """
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="ingredient_entries")
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name="recipe_entries")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["recipe", "ingredient"], name="unique_recipe_ingredient"),
+        ]
+        indexes = [
+            models.Index(fields=["ingredient", "recipe"], name="recipe_ingredient_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.ingredient_id}"
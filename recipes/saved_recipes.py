@@ -0,0 +1,78 @@
+"""This module saves and unsaves recipes for a user profile in bulk, through the saved_recipes through table, and
+keeps the save counters of the recipes in step with the through table.
+"""
+from collections import Counter
+from itertools import groupby
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from recipes.models import Recipe
+from recipeApp.conditional import bump_model_versions
+
+
+SAVED = "saved"
+ALREADY_SAVED = "already_saved"
+REMOVED = "removed"
+NOT_SAVED = "not_saved"
+NOT_FOUND = "not_found"
+
+
+def get_through_model(profile):
+    return type(profile).saved_recipes.through
+
+
+def adjust_save_counts(deltas):
+    """Adds the given per-recipe deltas to the save counts and to the saves pending for the next trending update,
+    with one UPDATE per distinct delta. Save counts never go below zero.
+    """
+    deltas = sorted((delta, recipe_id) for recipe_id, delta in Counter(deltas).items() if delta)
+
+    for delta, group in groupby(deltas, key=lambda item: item[0]):
+        Recipe.objects.filter(pk__in=[recipe_id for _, recipe_id in group]).update(
+            save_count=Greatest(F("save_count") + delta, Value(0)),
+            pending_saves=F("pending_saves") + delta,
+        )
+
+
+def save_recipes(profile, recipe_ids):
+    """Adds the given recipes to the profile's saved recipes and returns the result of each recipe id.
+    """
+    through = get_through_model(profile)
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+
+    with transaction.atomic():
+        existing = set(Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True))
+        saved = set(
+            through.objects.filter(userprofile=profile, recipe_id__in=existing).values_list("recipe_id", flat=True)
+        )
+        added = [recipe_id for recipe_id in recipe_ids if recipe_id in existing and recipe_id not in saved]
+        through.objects.bulk_create(
+            [through(userprofile=profile, recipe_id=recipe_id) for recipe_id in added], ignore_conflicts=True
+        )
+        bump_model_versions(through)
+        adjust_save_counts(dict.fromkeys(added, 1))
+
+    return {
+        recipe_id: NOT_FOUND if recipe_id not in existing else ALREADY_SAVED if recipe_id in saved else SAVED
+        for recipe_id in recipe_ids
+    }
+
+
+def unsave_recipes(profile, recipe_ids):
+    """Removes the given recipes from the profile's saved recipes and returns the result of each recipe id.
+    """
+    through = get_through_model(profile)
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+
+    with transaction.atomic():
+        existing = set(Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True))
+        entries = through.objects.filter(userprofile=profile, recipe_id__in=existing)
+        removed = set(entries.values_list("recipe_id", flat=True))
+        entries.delete()
+        bump_model_versions(through)
+        adjust_save_counts(dict.fromkeys(removed, -1))
+
+    return {
+        recipe_id: NOT_FOUND if recipe_id not in existing else REMOVED if recipe_id in removed else NOT_SAVED
+        for recipe_id in recipe_ids
+    }
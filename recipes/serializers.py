@@ -1,13 +1,48 @@
 """This module contains the serializers for recipes.
 """
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from recipes.constants import (
+    BULK_SAVE_MAX_IDS,
+    IMAGE_VARIANT_WIDTHS,
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    SAVE,
+    UNSAVE,
+)
 from recipes.models import Recipe
+from recipeApp.excerpts import ExcerptField, get_excerpt_expression
+from recipeApp.fast_path import ValuesSerializer
+from recipeApp.query_plans import SparseFieldsetMixin
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    """Recipe serializer with custom get_Creator method that returns creator user name.
+def represent_image_variants(image, image_variants, build_url):
+    """Returns the URLs of the image variants by size and format, and the blur placeholder. Every size falls back
+    to the original image until its variants have been generated.
+    """
+    if not image:
+        return None
+
+    generated = image_variants.get("source") == image
+    variants = image_variants.get("variants", {}) if generated else {}
+    representation = {"placeholder": image_variants.get("placeholder") if generated else None}
+
+    for name in IMAGE_VARIANT_WIDTHS:
+        if variants.get(name):
+            representation[name] = {
+                image_format: build_url(default_storage.url(path)) for image_format, path in variants[name].items()
+            }
+        else:
+            representation[name] = {"original": build_url(default_storage.url(image))}
+    return representation
+
+
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Recipe serializer with custom get_Creator method that returns creator user name. The Meta query plan lets
+    views fetch the creator and its user in the same query. Used for the detail representation and for writes.
     """
     creator = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Recipe
@@ -19,16 +54,130 @@ class RecipeSerializer(serializers.ModelSerializer):
             "instructions",
             "is_public",
             "image",
+            "image_variants",
             "created_at",
             "modified_at"
         ]
-        
+        select_related = ["creator__user"]
+        only = [
+            "id",
+            "creator__user__username",
+            "title",
+            "ingredients",
+            "instructions",
+            "is_public",
+            "image",
+            "image_variants",
+            "created_at",
+            "modified_at",
+        ]
+
     def get_creator(self, obj):
         return obj.creator.user.username
+
+    def get_image_variants(self, obj):
+        request = self.context.get("request")
+        build_url = request.build_absolute_uri if request is not None else str
+        return represent_image_variants(obj.image.name, obj.image_variants, build_url)
+
+
+class RecipeListSerializer(RecipeSerializer):
+    """Recipe list serializer. Replaces the ingredients and instructions with an excerpt of the instructions, so
+    list views never read the large text columns.
+    """
+    excerpt = ExcerptField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = [
+            "id",
+            "creator",
+            "title",
+            "excerpt",
+            "is_public",
+            "image",
+            "image_variants",
+            "created_at",
+            "modified_at",
+        ]
+        only = [
+            "id",
+            "creator__user__username",
+            "title",
+            "is_public",
+            "image",
+            "image_variants",
+            "created_at",
+            "modified_at",
+        ]
+        annotations = {"excerpt": get_excerpt_expression("instructions")}
     
 
+class PantryRecipeSerializer(RecipeListSerializer):
+    """Recipe serializer for the pantry search with the number and share of the recipe ingredients that matched.
+    """
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeListSerializer.Meta):
+        fields = RecipeListSerializer.Meta.fields + ["matched_ingredients", "coverage"]
+
+
+class RecipeListValuesSerializer(ValuesSerializer):
+    """Fast path of RecipeListSerializer for values() rows.
+    """
+    serializer_class = RecipeListSerializer
+    columns = {
+        "creator": ["creator__user__username"],
+        "image_variants": ["image", "image_variants"],
+    }
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.image_variants = {}
+
+    def map_creator(self, username):
+        return username
+
+    def map_image_variants(self, image, image_variants):
+        """The representation only depends on the image and on the content hash its variants were generated from,
+        so it is built once per image for the page.
+        """
+        key = (image, image_variants.get("source"), image_variants.get("hash"))
+
+        if key not in self.image_variants:
+            build_url = self.request.build_absolute_uri if self.request is not None else str
+            self.image_variants[key] = represent_image_variants(image, image_variants, build_url)
+        return self.image_variants[key]
+
+
+class PantryRecipeValuesSerializer(RecipeListValuesSerializer):
+    """Fast path of PantryRecipeSerializer for values() rows.
+    """
+    serializer_class = PantryRecipeSerializer
+
+
 class IngredientsSerializer(serializers.Serializer):
     """Ingredients serializer for the generate recipe view.
     """
     ingredients = serializers.CharField(required=True, allow_blank=False)
 
+
+
+class RecipeImportSerializer(serializers.Serializer):
+    """Recipe import serializer for the uploaded JSON lines or CSV file and the import options.
+    """
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=IMPORT_BATCH_SIZE)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class BulkSaveRecipesSerializer(serializers.Serializer):
+    """Bulk save serializer with the action to apply and the ids of the recipes to save or unsave.
+    """
+    action = serializers.ChoiceField(choices=[SAVE, UNSAVE])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_SAVE_MAX_IDS,
+    )
@@ -0,0 +1,76 @@
+"""This module contains the signal receivers that keep recipe derived data in sync with recipe writes.
+"""
+import logging
+from collections import Counter
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_init, post_save
+from django.dispatch import receiver
+from authentication.models import UserProfile
+from recipes.ingredients import index_recipes
+from recipes.models import Recipe
+from recipes.saved_recipes import adjust_save_counts
+from recipes.tasks import generate_image_variants_task
+
+
+logger = logging.getLogger("scheduler")
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_ingredients(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or "ingredients" in update_fields:
+        index_recipes([instance])
+
+
+@receiver(post_init, sender=Recipe)
+def remember_image_name(sender, instance, **kwargs):
+    image = instance.__dict__.get("image")
+    instance._loaded_image_name = getattr(image, "name", image)
+
+
+def queue_image_variants_task(recipe_id):
+    """Queues the generation of the image variants. The recipe is already saved, so a broker outage is logged rather
+    than failing the request, and the generate_image_variants command catches up later.
+    """
+    try:
+        generate_image_variants_task.delay(recipe_id)
+    except Exception:
+        logger.exception(f"Could not queue the image variants of recipe {recipe_id}.")
+
+
+@receiver(post_save, sender=Recipe)
+def queue_image_variants(sender, instance, created, update_fields=None, **kwargs):
+    """Queues the generation of the image variants once the transaction that saved a new image commits. Images whose
+    variants exist and images unchanged since the recipe was loaded are skipped, and so is the default image, shared
+    by most recipes, whose variants the generate_image_variants command attaches to all of them at once.
+    """
+    if update_fields is not None and "image" not in update_fields:
+        return
+
+    name = instance.image.name
+
+    if not name or name == sender._meta.get_field("image").default or name == instance.image_variants.get("source"):
+        return
+
+    if not created and name == getattr(instance, "_loaded_image_name", None):
+        return
+
+    instance._loaded_image_name = name
+    transaction.on_commit(lambda: queue_image_variants_task(instance.pk))
+
+
+@receiver(m2m_changed, sender=UserProfile.saved_recipes.through)
+def count_recipe_saves(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keeps the save counts in step with saves made through the saved_recipes related managers, e.g. by the admin.
+    Removed entries are counted before the removal, since pk_set holds the requested ids rather than the removed ones.
+    """
+    if action == "post_add":
+        adjust_save_counts({instance.pk: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1))
+
+    elif action in ("pre_remove", "pre_clear"):
+        entries = sender.objects.filter(**{"recipe" if reverse else "userprofile": instance})
+
+        if pk_set is not None:
+            entries = entries.filter(**{"userprofile_id__in" if reverse else "recipe_id__in": pk_set})
+        instance._removed_saves = Counter(entries.values_list("recipe_id", flat=True))
+
+    elif action in ("post_remove", "post_clear"):
+        adjust_save_counts({recipe_id: -count for recipe_id, count in instance.__dict__.pop("_removed_saves", {}).items()})
@@ -0,0 +1,142 @@
+"""This module contains the celery task that generates recipes in the background and the in-flight generation cap,
+the periodic task that recomputes the trending scores and the task that generates recipe image variants.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from celery import Task, shared_task, states
+from django.core.cache import cache
+from django.utils import timezone
+from recipes.constants import (
+    GENERATION_JOB_MAX_IN_FLIGHT,
+    GENERATION_JOB_MAX_RETRIES,
+    GENERATION_JOB_SLOT_TTL,
+    GENERATION_JOB_SOFT_TIME_LIMIT,
+    GENERATION_JOB_TIME_LIMIT,
+    GENERATION_JOB_TTL,
+    GENERATION_LOCK_POLL_INTERVAL,
+    GENERATION_SLOT_LOCK_TIMEOUT,
+)
+from recipes.images import generate_stored_image_variants
+from recipes.models import Recipe
+from recipes.trending import recompute_trending_scores
+from recipes.utils import generate_recipe
+from recipeApp.conditional import bump_model_versions
+
+
+logger = logging.getLogger("scheduler")
+
+SLOTS_KEY = "recipe-generation:slots"
+SLOTS_LOCK_KEY = "recipe-generation:slots:lock"
+JOB_OWNER_KEY = "recipe-generation:job:{}"
+
+
+@contextmanager
+def generation_slots_lock():
+    """Serializes the updates of the slots across the web and worker processes. A lock left by a killed process
+    expires after GENERATION_SLOT_LOCK_TIMEOUT seconds.
+    """
+    while not cache.add(SLOTS_LOCK_KEY, 1, timeout=GENERATION_SLOT_LOCK_TIMEOUT):
+        time.sleep(GENERATION_LOCK_POLL_INTERVAL)
+
+    try:
+        yield
+    finally:
+        cache.delete(SLOTS_LOCK_KEY)
+
+
+def get_live_slots(now):
+    return {job_id: expiry for job_id, expiry in (cache.get(SLOTS_KEY) or {}).items() if expiry > now}
+
+
+def acquire_generation_slot(job_id):
+    """Reserves one of the in-flight generation slots shared by all web workers for the job. Returns False when all
+    slots are taken. Each slot expires GENERATION_JOB_SLOT_TTL seconds after it was reserved, and expired slots are
+    pruned here, so the slots of jobs whose worker was killed before releasing them come back on their own.
+    """
+    now = time.time()
+
+    with generation_slots_lock():
+        slots = get_live_slots(now)
+        acquired = len(slots) < GENERATION_JOB_MAX_IN_FLIGHT
+
+        if acquired:
+            slots[job_id] = now + GENERATION_JOB_SLOT_TTL
+
+        cache.set(SLOTS_KEY, slots, timeout=GENERATION_JOB_SLOT_TTL)
+    return acquired
+
+
+def release_generation_slot(job_id):
+    with generation_slots_lock():
+        slots = get_live_slots(time.time())
+
+        if slots.pop(job_id, None) is not None:
+            cache.set(SLOTS_KEY, slots, timeout=GENERATION_JOB_SLOT_TTL)
+
+
+def set_job_owner(job_id, user_id):
+    cache.set(JOB_OWNER_KEY.format(job_id), user_id, timeout=GENERATION_JOB_TTL)
+
+
+def get_job_owner(job_id):
+    return cache.get(JOB_OWNER_KEY.format(job_id))
+
+
+class RecipeGenerationTask(Task):
+    """Releases the in-flight slot once the job has succeeded or failed for good, but not between retries.
+    """
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        if status != states.RETRY:
+            release_generation_slot(task_id)
+
+
+@shared_task(
+    bind=True,
+    base=RecipeGenerationTask,
+    name="tasks.generate_recipe",
+    autoretry_for=(Exception,),
+    max_retries=GENERATION_JOB_MAX_RETRIES,
+    retry_backoff=True,
+    retry_backoff_max=60,
+    retry_jitter=True,
+    soft_time_limit=GENERATION_JOB_SOFT_TIME_LIMIT,
+    time_limit=GENERATION_JOB_TIME_LIMIT,
+)
+def generate_recipe_task(self, ingredients):
+    """Generates a recipe for the given ingredients. Failed attempts are retried with exponential backoff.
+
+    Args:
+        ingredients (string): Ingredients provided by the user.
+    """
+    if self.request.retries:
+        logger.info(f"Retrying recipe generation job {self.request.id} ({self.request.retries}).")
+    return {"recipe": generate_recipe(ingredients)}
+
+
+@shared_task(name="tasks.recompute_trending_scores", ignore_result=True)
+def recompute_trending_scores_task():
+    """Decays the trending scores and folds in the saves made since the previous run. Scheduled by celery beat.
+    """
+    updated = recompute_trending_scores()
+
+    if updated is None:
+        logger.info("Skipped the trending score recompute, another one is running.")
+    else:
+        logger.info(f"Recomputed the trending scores of {updated} recipes.")
+
+
+@shared_task(name="tasks.generate_image_variants", ignore_result=True)
+def generate_image_variants_task(recipe_id):
+    """Generates the variants of a recipe's image. The result is dropped if the image changed in the meantime.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only("image").first()
+
+    if recipe is None or not recipe.image:
+        return
+
+    image_variants = generate_stored_image_variants(recipe.image.name)
+    Recipe.objects.filter(pk=recipe_id, image=recipe.image.name).update(
+        image_variants=image_variants, modified_at=timezone.now()
+    )
+    bump_model_versions(Recipe)
@@ -1,3 +1,598 @@
-from django.test import TestCase
+"""This module contains the tests of the recipes app.
+"""
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.models import UserProfile
+from recipes.cache import (
+    GENERATION_CALLS_COALESCED,
+    SingleFlight,
+    canonicalize_ingredients,
+    generation_cache,
+    generation_cache_key,
+)
+from recipes.constants import GENERATION_JOB_SLOT_TTL, TRENDING_HALF_LIFE
+from recipes.ingredients import normalize_ingredient, parse_ingredients
+from recipes.models import Recipe, RecipeIngredient
+from recipes.tasks import acquire_generation_slot, get_live_slots, release_generation_slot
+from recipes.trending import recompute_trending_scores
+from recipes.utils import generate_recipe
+from recipes.views import (
+    NonPostedPublicRecipeListAPIView,
+    PostedRecipeListAPIView,
+    PrivateRecipeListAPIView,
+    PublicRecipeListAPIView,
+    TrendingRecipeListAPIView,
+)
+from recipeApp.metrics import REGISTRY
+from recipeApp.testing import QueryPlanAssertionsMixin
 
-# Create your tests here.
+
+User = get_user_model()
+
+class RecipeQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """EXPLAINs the first page of the hot recipe lists and fails when one regresses to a sequential scan or a sort.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f"cook-{index}", password=None) for index in range(2)]
+        profiles = [UserProfile.objects.create(user=user) for user in cls.users]
+        Recipe.objects.bulk_create([
+            Recipe(
+                creator=profiles[index % 2],
+                title=f"Recipe {index}",
+                ingredients="egg",
+                instructions="Whisk the eggs.",
+                is_public=index % 3 != 0,
+                trending_score=index % 4,
+            )
+            for index in range(60)
+        ])
+
+    def test_public_recipes(self):
+        queryset = self.get_page_queryset(PublicRecipeListAPIView, self.users[0])
+        self.assertUsesIndex(queryset, ["recipe_public_created_idx"])
+
+    def test_public_recipes_of_others(self):
+        queryset = self.get_page_queryset(NonPostedPublicRecipeListAPIView, self.users[0])
+        self.assertUsesIndex(queryset, ["recipe_public_created_idx"])
+
+    def test_posted_recipes(self):
+        queryset = self.get_page_queryset(PostedRecipeListAPIView, self.users[0])
+        self.assertUsesIndex(queryset, ["recipe_creator_created_idx"])
+
+    def test_private_recipes(self):
+        queryset = self.get_page_queryset(PrivateRecipeListAPIView, self.users[0])
+        self.assertUsesIndex(queryset, ["recipe_private_created_idx"])
+
+    def test_trending_recipes(self):
+        queryset = self.get_page_queryset(TrendingRecipeListAPIView, self.users[0])
+        self.assertUsesIndex(queryset, ["recipe_trending_idx"])
+
+    def test_default_ordering_is_stable(self):
+        self.assertEqual(Recipe._meta.ordering, ["-created_at", "-id"])
+        self.assertTrue(Recipe.objects.all().ordered)
+
+
+class GenerationCacheTests(TestCase):
+    """Checks that ingredient lists differing only in case, order, spacing or duplicates share one generation.
+    """
+    def setUp(self):
+        cache.clear()
+        generation_cache.local.clear()
+
+    def test_canonical_form(self):
+        self.assertEqual(canonicalize_ingredients("Milk,eggs , flour;\nEGGS"), ["eggs", "flour", "milk"])
+        self.assertEqual(canonicalize_ingredients("  olive   oil.,,"), ["olive oil"])
+
+    def test_key_ignores_order_and_case(self):
+        self.assertEqual(
+            generation_cache_key(canonicalize_ingredients("eggs, flour, milk")),
+            generation_cache_key(canonicalize_ingredients("Milk,eggs , flour")),
+        )
+        self.assertNotEqual(
+            generation_cache_key(canonicalize_ingredients("eggs, flour")),
+            generation_cache_key(canonicalize_ingredients("eggs, flour, milk")),
+        )
+
+    @mock.patch("recipes.utils.getGeminiModel")
+    def test_model_is_called_once_per_canonical_form(self, get_model):
+        get_model.return_value.generate_content.return_value.text = "Pancakes"
+
+        self.assertEqual(generate_recipe("eggs, flour, milk"), "Pancakes")
+        self.assertEqual(generate_recipe("MILK, flour,eggs, eggs"), "Pancakes")
+        self.assertEqual(get_model.return_value.generate_content.call_count, 1)
+
+    @mock.patch("recipes.utils.getGeminiModel")
+    def test_shared_tier_survives_local_eviction(self, get_model):
+        get_model.return_value.generate_content.return_value.text = "Omelette"
+        generate_recipe("eggs, cheese")
+        generation_cache.local.clear()
+
+        self.assertEqual(generate_recipe("cheese, eggs"), "Omelette")
+        self.assertEqual(get_model.return_value.generate_content.call_count, 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Checks that identical concurrent calls share one upstream call, and that followers stop waiting for a leader
+    that hangs.
+    """
+    def setUp(self):
+        cache.clear()
+        self.results = {}
+        self.calls = []
+        self.release = threading.Event()
+
+    def call(self, name, wait=True):
+        def upstream():
+            self.calls.append(name)
+
+            if wait:
+                self.release.wait(5)
+            self.results["key"] = name
+            return name
+        return upstream
+
+    def get_coalesced(self, outcome):
+        return REGISTRY.collect().get(GENERATION_CALLS_COALESCED.name, {}).get((outcome,), 0)
+
+    def test_concurrent_calls_are_coalesced(self):
+        flight = SingleFlight("default", lock_timeout=5, poll_interval=0.01)
+        coalesced = self.get_coalesced("same_process")
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [
+                pool.submit(flight.do, "key", self.call(f"call-{index}"), lambda: self.results.get("key"))
+                for index in range(5)
+            ]
+            time.sleep(0.2)
+            self.release.set()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual({future.result() for future in futures}, {self.calls[0]})
+        self.assertEqual(self.get_coalesced("same_process"), coalesced + 4)
+
+    def test_followers_stop_waiting_for_a_hung_leader(self):
+        flight = SingleFlight("default", lock_timeout=0.2, poll_interval=0.01)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "key", self.call("leader"), lambda: None)
+            time.sleep(0.05)
+            started = time.monotonic()
+            follower = flight.do("key", self.call("follower", wait=False), lambda: None)
+            waited = time.monotonic() - started
+            self.release.set()
+
+        self.assertEqual(follower, "follower")
+        self.assertLess(waited, 2)
+        self.assertEqual(leader.result(), "leader")
+
+
+@mock.patch("recipes.tasks.GENERATION_JOB_MAX_IN_FLIGHT", 2)
+class GenerationSlotTests(TestCase):
+    """Checks the cap on in-flight generation jobs, and that the slots of jobs that never finish expire.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_slots_are_capped_and_released(self):
+        self.assertTrue(acquire_generation_slot("a"))
+        self.assertTrue(acquire_generation_slot("b"))
+        self.assertFalse(acquire_generation_slot("c"))
+
+        release_generation_slot("a")
+        release_generation_slot("unknown")
+        self.assertTrue(acquire_generation_slot("c"))
+        self.assertEqual(set(get_live_slots(time.time())), {"b", "c"})
+
+    def test_leaked_slots_expire(self):
+        self.assertTrue(acquire_generation_slot("a"))
+        self.assertTrue(acquire_generation_slot("b"))
+
+        with mock.patch("recipes.tasks.time.time", return_value=time.time() + GENERATION_JOB_SLOT_TTL + 1):
+            self.assertTrue(acquire_generation_slot("c"))
+            self.assertTrue(acquire_generation_slot("d"))
+            self.assertFalse(acquire_generation_slot("e"))
+
+    @mock.patch("recipes.tasks.generate_recipe", return_value="Pancakes")
+    def test_async_generation(self, generate):
+        url = f"{reverse('recipe-generate')}?mode=async"
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        response = self.client.post(url, {"ingredients": "eggs"}, headers=headers)
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(get_live_slots(time.time()), {})
+
+        response = self.client.get(response.json()["status_url"], headers=headers)
+        self.assertEqual(response.json()["recipe"], "Pancakes")
+
+        acquire_generation_slot("a")
+        acquire_generation_slot("b")
+        response = self.client.post(url, {"ingredients": "eggs"}, headers=headers)
+        self.assertEqual(response.status_code, 429)
+        generate.assert_called_once_with("eggs")
+
+
+class IngredientParsingTests(SimpleTestCase):
+    """Checks the normalization of free-text ingredient lines into the names of the pantry search index.
+    """
+    def test_quantities_units_and_descriptors_are_removed(self):
+        self.assertEqual(normalize_ingredient("2 cups Chopped Tomatoes (ripe)"), "tomato")
+        self.assertEqual(normalize_ingredient("½ cup sugar"), "sugar")
+        self.assertIsNone(normalize_ingredient("1 cup"))
+        self.assertIsNone(normalize_ingredient("Ingredients:"))
+
+    def test_non_ascii_names_are_kept_whole(self):
+        self.assertEqual(normalize_ingredient("2 Jalapeños"), "jalapeño")
+        self.assertEqual(normalize_ingredient("200 ml Crème Fraîche"), "crème fraîche")
+        self.assertEqual(normalize_ingredient("1 tbsp 醤油"), "醤油")
+
+    def test_parse_ingredients(self):
+        self.assertEqual(
+            parse_ingredients("2 eggs\n1 cup flour, a pinch of salt; EGGS\n1 cup"), ["egg", "flour", "salt"]
+        )
+
+
+class IngredientIndexTests(TestCase):
+    """Checks the ingredient index entries written when recipes are saved.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = UserProfile.objects.create(user=User.objects.create_user(username="cook", password=None))
+
+    def index(self, ingredients):
+        recipe = Recipe.objects.create(
+            creator=self.profile, title="Water", ingredients=ingredients, instructions="Pour."
+        )
+        names = RecipeIngredient.objects.filter(recipe=recipe).values_list("ingredient__name", flat=True)
+        return Recipe.objects.get(pk=recipe.pk).ingredient_count, sorted(names)
+
+    def test_index_entries(self):
+        self.assertEqual(self.index("2 eggs\n1 cup flour"), (2, ["egg", "flour"]))
+
+    def test_no_parseable_ingredient(self):
+        # PostgreSQL bounds batches by the number of entries, which is 0 here.
+        with mock.patch.object(connection.ops, "bulk_batch_size", lambda fields, objs: len(objs)):
+            self.assertEqual(self.index("1 cup\n2 tbsp"), (0, []))
+
+
+class BulkSaveTests(TestCase):
+    """Checks the per-id results of the bulk save endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        cls.recipes = Recipe.objects.bulk_create([
+            Recipe(creator=cls.profile, title=f"Recipe {index}", ingredients="egg", instructions="Whisk.")
+            for index in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def bulk_save(self, action, ids):
+        response = self.client.post(
+            reverse("recipe-save-bulk"),
+            {"action": action, "ids": ids},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(result["id"], result["status"]) for result in response.json()["results"]]
+
+    def test_save(self):
+        first, second, third = [recipe.pk for recipe in self.recipes]
+        self.profile.saved_recipes.add(second)
+
+        self.assertEqual(
+            self.bulk_save("save", [first, second, 999_999, first]),
+            [(first, "saved"), (second, "already_saved"), (999_999, "not_found")],
+        )
+        self.assertEqual(set(self.profile.saved_recipes.values_list("pk", flat=True)), {first, second})
+
+    def test_unsave(self):
+        first, second, _ = [recipe.pk for recipe in self.recipes]
+        self.profile.saved_recipes.add(first)
+
+        self.assertEqual(
+            self.bulk_save("unsave", [first, second, 999_999]),
+            [(first, "removed"), (second, "not_saved"), (999_999, "not_found")],
+        )
+        self.assertFalse(self.profile.saved_recipes.exists())
+
+
+class SaveCountTests(TestCase):
+    """Checks that the save counts and pending saves follow every way a recipe is saved or unsaved.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        cls.recipes = Recipe.objects.bulk_create([
+            Recipe(creator=cls.profile, title=f"Recipe {index}", ingredients="egg", instructions="Whisk.")
+            for index in range(2)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, method, url_name, data=None, **kwargs):
+        return self.client.generic(
+            method,
+            reverse(url_name, kwargs=kwargs),
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+        )
+
+    def assertCounts(self, recipe, save_count, pending_saves):
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.save_count, recipe.pending_saves), (save_count, pending_saves))
+
+    def test_save_and_unsave(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.request("POST", "recipe-save", id=recipe.pk).status_code, 200)
+        self.assertCounts(recipe, 1, 1)
+        self.assertEqual(self.request("POST", "recipe-save", id=recipe.pk).status_code, 400)
+        self.assertCounts(recipe, 1, 1)
+        self.assertEqual(self.request("DELETE", "recipe-save", id=recipe.pk).status_code, 200)
+        self.assertCounts(recipe, 0, 0)
+
+    def test_bulk_save(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        self.request("POST", "recipe-save-bulk", {"action": "save", "ids": ids})
+        self.assertCounts(self.recipes[1], 1, 1)
+        self.request("POST", "recipe-save-bulk", {"action": "unsave", "ids": ids[:1]})
+        self.assertCounts(self.recipes[0], 0, 0)
+        self.assertCounts(self.recipes[1], 1, 1)
+
+    def test_related_manager(self):
+        first, second = self.recipes
+        self.profile.saved_recipes.add(first, second)
+        self.profile.saved_recipes.remove(first)
+        self.assertCounts(first, 0, 0)
+        self.assertCounts(second, 1, 1)
+        self.profile.saved_recipes.clear()
+        self.assertCounts(second, 0, 0)
+
+    def test_making_a_recipe_private_removes_its_saves(self):
+        recipe = self.recipes[0]
+        self.profile.saved_recipes.add(recipe)
+        response = self.request("PATCH", "recipe-update", {"is_public": False}, pk=recipe.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCounts(recipe, 0, 0)
+        self.assertFalse(self.profile.saved_recipes.exists())
+
+
+class TrendingTests(TestCase):
+    """Checks the decay of the trending scores, and that private recipes drop out of the trending list.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        profile = UserProfile.objects.create(user=cls.user)
+        cls.public, cls.private = Recipe.objects.bulk_create([
+            Recipe(creator=profile, title=title, ingredients="egg", instructions="Whisk.", is_public=is_public)
+            for title, is_public in [("Public", True), ("Private", False)]
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_decay(self):
+        Recipe.objects.filter(pk=self.public.pk).update(pending_saves=4)
+        recompute_trending_scores(now=1_000_000)
+        self.public.refresh_from_db()
+        self.assertEqual(self.public.trending_score, 4)
+
+        recompute_trending_scores(now=1_000_000 + TRENDING_HALF_LIFE)
+        self.public.refresh_from_db()
+        self.assertAlmostEqual(self.public.trending_score, 2)
+
+    def test_private_recipes_are_not_scored(self):
+        Recipe.objects.filter(pk=self.private.pk).update(pending_saves=3, trending_score=5)
+        recompute_trending_scores()
+        self.private.refresh_from_db()
+        self.assertEqual((self.private.trending_score, self.private.pending_saves), (0, 0))
+
+    def test_recipe_made_private_leaves_the_cached_list(self):
+        Recipe.objects.filter(pk=self.public.pk).update(pending_saves=1)
+        recompute_trending_scores()
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        response = self.client.get(reverse("recipe-trending-list"), headers=headers)
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.public.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.public.is_public = False
+            self.public.save()
+
+        response = self.client.get(reverse("recipe-trending-list"), headers=headers)
+        self.assertEqual(response.json()["results"], [])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "www.example.com"])
+    def test_cached_list_per_host(self):
+        Recipe.objects.filter(pk=self.public.pk).update(pending_saves=1, image="recipes/egg.jpg")
+        recompute_trending_scores()
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        urls = []
+
+        for options in [{}, {"secure": True}, {"headers": {**headers, "host": "www.example.com"}}]:
+            response = self.client.get(reverse("recipe-trending-list"), **{"headers": headers, **options})
+            urls.append(response.json()["results"][0]["image_variants"]["large"]["original"])
+
+        self.assertEqual(
+            [url.split("/recipes/egg.jpg")[0] for url in urls],
+            ["http://testserver/media", "https://testserver/media", "http://www.example.com/media"],
+        )
+
+
+@mock.patch("recipes.signals.generate_image_variants_task")
+class ImageVariantQueueTests(TestCase):
+    """Checks which recipe saves queue the generation of image variants, and that broker errors do not fail them.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cook", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def save(self, recipe, **fields):
+        for name, value in fields.items():
+            setattr(recipe, name, value)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        return recipe
+
+    def new_recipe(self, **fields):
+        recipe = Recipe(creator=self.profile, title="Soup", ingredients="leek", instructions="Simmer.")
+        return self.save(recipe, **fields)
+
+    def test_default_image_is_skipped(self, task):
+        self.new_recipe()
+        task.delay.assert_not_called()
+
+    def test_new_image_is_queued_once(self, task):
+        recipe = self.new_recipe(image="recipes/soup.jpg")
+        task.delay.assert_called_once_with(recipe.pk)
+
+        self.save(recipe, title="Leek soup")
+        self.save(Recipe.objects.get(pk=recipe.pk), title="Potato and leek soup")
+        task.delay.assert_called_once()
+
+        self.save(recipe, image="recipes/other-soup.jpg")
+        self.assertEqual(task.delay.call_count, 2)
+
+    def test_images_with_variants_are_skipped(self, task):
+        self.new_recipe(image="recipes/soup.jpg", image_variants={"source": "recipes/soup.jpg"})
+        task.delay.assert_not_called()
+
+    def get_image(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 8), "orange").save(buffer, format="PNG")
+        return SimpleUploadedFile("soup.png", buffer.getvalue(), content_type="image/png")
+
+    def test_broker_errors_do_not_fail_the_request(self, task):
+        task.delay.side_effect = ConnectionError("broker unavailable")
+
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            self.settings(MEDIA_ROOT=media_root),
+            self.assertLogs("scheduler", "ERROR"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.post(
+                reverse("recipe-create"),
+                {"title": "Soup", "ingredients": "leek", "instructions": "Simmer.", "image": self.get_image()},
+                headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+            )
+
+        self.assertEqual(response.status_code, 201, response.content)
+        task.delay.assert_called_once()
+
+
+class RecipeImportTests(TestCase):
+    """Imports JSON lines and CSV files through the import endpoint and checks the report and the imported rows.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password=None)
+        cls.profile = UserProfile.objects.create(user=cls.admin)
+        cls.cook = UserProfile.objects.create(user=User.objects.create_user(username="cook", password=None))
+
+    def setUp(self):
+        cache.clear()
+
+    def import_file(self, name, content, user=None, **data):
+        return self.client.post(
+            reverse("recipe-import"),
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            headers={"Authorization": f"Bearer {AccessToken.for_user(user or self.admin)}"},
+        )
+
+    def test_json_lines(self):
+        rows = [
+            {"title": "Boiled egg", "ingredients": "2 eggs", "instructions": "Boil the eggs.", "is_public": True},
+            {"title": "Omelette", "ingredients": "3 eggs, butter", "instructions": "Whisk.", "creator": "cook"},
+            {"title": "Nothing"},
+            {"title": "Ghost", "ingredients": "egg", "instructions": "Boil.", "creator": "ghost"},
+        ]
+        content = "\n".join(json.dumps(row) for row in rows) + "\n\nnot json\n"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.import_file("recipes.jsonl", content)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        report = response.json()
+        self.assertEqual((report["rows"], report["imported"], report["failed"]), (5, 2, 3))
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4, 6])
+        self.assertIn("instructions", report["errors"][0]["errors"])
+
+        recipes = Recipe.objects.order_by("pk")
+        self.assertEqual(
+            [(recipe.title, recipe.creator, recipe.ingredient_count) for recipe in recipes],
+            [("Boiled egg", self.profile, 1), ("Omelette", self.cook, 2)],
+        )
+
+    def test_csv(self):
+        content = "title,ingredients,instructions,is_public\nBoiled egg,2 eggs,Boil the eggs.,false\n"
+        response = self.import_file("recipes.csv", content)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["imported"], 1)
+        self.assertFalse(Recipe.objects.get().is_public)
+
+    def test_dry_run(self):
+        content = "title,ingredients,instructions\nBoiled egg,2 eggs,Boil the eggs.\n"
+        response = self.import_file("recipes.csv", content, dry_run=True)
+
+        self.assertEqual(response.json()["imported"], 1)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_unsupported_format(self):
+        self.assertEqual(self.import_file("recipes.xml", "<recipes/>").status_code, 400)
+
+    def test_admin_without_profile(self):
+        admin = User.objects.create_superuser(username="root", email="root@example.com", password=None)
+        content = "title,ingredients,instructions\nBoiled egg,2 eggs,Boil the eggs.\n"
+
+        self.assertEqual(self.import_file("recipes.csv", content, user=admin).status_code, 403)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_stored_image_names(self):
+        content = "".join(
+            json.dumps({"title": f"Egg {index}", "ingredients": "egg", "instructions": "Boil.", "image": image}) + "\n"
+            for index, image in enumerate(["recipes/egg.jpg", "recipes/missing.jpg", "../egg.jpg", ""])
+        )
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            os.mkdir(os.path.join(media_root, "recipes"))
+            open(os.path.join(media_root, "recipes", "egg.jpg"), "wb").close()
+            response = self.import_file("recipes.jsonl", content)
+
+        self.assertEqual(response.json()["imported"], 4)
+        self.assertEqual(
+            list(Recipe.objects.order_by("pk").values_list("image", flat=True)),
+            ["recipes/egg.jpg", "recipes/default.jpg", "recipes/default.jpg", "recipes/default.jpg"],
+        )
@@ -0,0 +1,52 @@
+"""This module maintains the time-decayed trending score of recipes.
+
+Saves and unsaves accumulate in pending_saves. Each recompute decays every live score by the time elapsed since the
+previous recompute and folds the pending saves in, so a save is worth half as much after every TRENDING_HALF_LIFE
+and only recently saved recipes are touched. Only public recipes are scored, private ones have their pending saves
+and score cleared.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from recipes.constants import TRENDING_HALF_LIFE, TRENDING_MIN_SCORE, TRENDING_RECOMPUTE_INTERVAL
+from recipes.models import Recipe
+
+
+LAST_RECOMPUTE_KEY = "recipes:trending:last-recompute"
+RECOMPUTE_LOCK_KEY = "recipes:trending:lock"
+
+
+def get_last_recompute():
+    return cache.get(LAST_RECOMPUTE_KEY, 0)
+
+
+def recompute_trending_scores(now=None):
+    """Decays the trending scores and folds in the pending saves in one UPDATE. Returns the number of updated
+    recipes, or None when another recompute is running.
+    """
+    if not cache.add(RECOMPUTE_LOCK_KEY, True, timeout=TRENDING_RECOMPUTE_INTERVAL):
+        return None
+
+    try:
+        now = now or time.time()
+        last = get_last_recompute()
+        elapsed = now - last if last else TRENDING_RECOMPUTE_INTERVAL
+        decay = 0.5 ** (max(elapsed, 0) / TRENDING_HALF_LIFE)
+
+        with transaction.atomic():
+            live = Q(trending_score__gt=0) | ~Q(pending_saves=0)
+            updated = Recipe.objects.filter(live, is_public=True).update(
+                trending_score=Greatest(F("trending_score") * decay + F("pending_saves"), Value(0.0)),
+                pending_saves=0,
+            )
+            Recipe.objects.filter(
+                is_public=True, trending_score__gt=0, trending_score__lt=TRENDING_MIN_SCORE
+            ).update(trending_score=0)
+            Recipe.objects.filter(live, is_public=False).update(trending_score=0, pending_saves=0)
+
+        cache.set(LAST_RECOMPUTE_KEY, now, timeout=None)
+        return updated
+    finally:
+        cache.delete(RECOMPUTE_LOCK_KEY)
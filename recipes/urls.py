@@ -3,26 +3,42 @@
 from django.urls import path
 from recipes.views import (
     GenerateRecipeAPIView,
+    GenerateRecipeJobAPIView,
+    GenerateRecipeStreamAPIView,
     PrivateRecipeListAPIView,
     PostedRecipeListAPIView,
     PublicRecipeListAPIView,
     RecipeCreateAPIView,
+    RecipeDetailAPIView,
+    RecipeImportAPIView,
+    RecipeExportAPIView,
     RecipeUpdateAPIView,
     RecipeDeleteAPIView,
     SaveRecipeAPIView,
+    BulkSaveRecipeAPIView,
     NonPostedPublicRecipeListAPIView,
+    PantryRecipeListAPIView,
+    TrendingRecipeListAPIView,
 )
 
 
 urlpatterns = [
     path("create/", RecipeCreateAPIView.as_view(), name="recipe-create"),
+    path("<int:pk>/", RecipeDetailAPIView.as_view(), name="recipe-detail"),
+    path("import/", RecipeImportAPIView.as_view(), name="recipe-import"),
+    path("export/", RecipeExportAPIView.as_view(), name="recipe-export"),
     path("public/", PublicRecipeListAPIView.as_view(), name="recipe-public-list"),
     path("private/", PrivateRecipeListAPIView.as_view(), name="recipe-private-list"),
     path("save/<int:id>", SaveRecipeAPIView.as_view(), name="recipe-save"),
+    path("save/bulk/", BulkSaveRecipeAPIView.as_view(), name="recipe-save-bulk"),
     path("posted/", PostedRecipeListAPIView.as_view(), name="recipe-posted-list"),
     path("update/<int:pk>", RecipeUpdateAPIView.as_view(), name="recipe-update"),
     path("delete/<int:pk>", RecipeDeleteAPIView.as_view(), name="recipe-delete"),
     path("generate/", GenerateRecipeAPIView.as_view(), name="recipe-generate"),
+    path("generate/stream/", GenerateRecipeStreamAPIView.as_view(), name="recipe-generate-stream"),
+    path("generate/<uuid:job_id>/", GenerateRecipeJobAPIView.as_view(), name="recipe-generate-job"),
+    path("trending/", TrendingRecipeListAPIView.as_view(), name="recipe-trending-list"),
+    path("pantry/", PantryRecipeListAPIView.as_view(), name="recipe-pantry-list"),
     path("public-non-posted/", NonPostedPublicRecipeListAPIView.as_view(), name="recipe-public-list-others"),
 ]
 
@@ -1,7 +1,11 @@
-"""This module sets up the gemini model for recipe generation api.
+"""This module sets up the gemini model for recipe generation api and wraps its blocking and streaming calls.
 """
+import json
 import os
 import google.generativeai as genai
+from asgiref.sync import sync_to_async
+from recipes.cache import canonicalize_ingredients, generation_cache, generation_cache_key, generation_flight
+from recipes.constants import RECIPE_GENERATION_PROMPT
 
 
 def getGeminiModel():
@@ -9,3 +13,102 @@ def getGeminiModel():
     model = genai.GenerativeModel("gemini-1.5-flash")
     return model
 
+
+def get_generation_prompt(tokens):
+    return f"{RECIPE_GENERATION_PROMPT} {', '.join(tokens)}"
+
+
+def generate_recipe(ingredients):
+    """Returns the AI generated recipe for the given ingredients. Ingredient lists that only differ in case, order,
+    spacing or duplicates are served from the generation cache after the first call, and identical concurrent
+    requests share a single model call.
+    """
+    tokens = canonicalize_ingredients(ingredients)
+    key = generation_cache_key(tokens)
+    recipe = generation_cache.get(key)
+
+    if recipe is None:
+        recipe = generation_flight.do(
+            key,
+            lambda: call_model(tokens, key),
+            lambda: generation_cache.get(key, count=False),
+        )
+    return recipe
+
+
+def call_model(tokens, key):
+    model = getGeminiModel()
+    response = model.generate_content(get_generation_prompt(tokens))
+    recipe = response.text
+    generation_cache.set(key, recipe)
+    return recipe
+
+
+def cancel_stream(response):
+    """Cancels the upstream gRPC stream of a partially consumed streaming response so the model stops generating.
+    """
+    cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+
+    if cancel:
+        cancel()
+
+
+def stream_recipe(ingredients):
+    """Yields the AI generated recipe for the given ingredients chunk by chunk. A cached recipe is yielded as a single
+    chunk, and a streamed recipe is only cached once the model has sent all of it. Closing the generator early, as
+    the WSGI server does when the client disconnects, cancels the upstream stream.
+    """
+    tokens = canonicalize_ingredients(ingredients)
+    key = generation_cache_key(tokens)
+    recipe = generation_cache.get(key)
+
+    if recipe is not None:
+        yield recipe
+        return
+
+    response = getGeminiModel().generate_content(get_generation_prompt(tokens), stream=True)
+    chunks = []
+
+    try:
+        for chunk in response:
+            chunks.append(chunk.text)
+            yield chunk.text
+    except GeneratorExit:
+        cancel_stream(response)
+        raise
+
+    generation_cache.set(key, "".join(chunks))
+
+
+async def astream_recipe(ingredients):
+    """Async counterpart of stream_recipe for ASGI. Django cancels the generator when the client disconnects, which
+    cancels the upstream stream in turn, and the event loop is never blocked on the model.
+    """
+    tokens = canonicalize_ingredients(ingredients)
+    key = generation_cache_key(tokens)
+    recipe = await sync_to_async(generation_cache.get)(key)
+
+    if recipe is not None:
+        yield recipe
+        return
+
+    response = await getGeminiModel().generate_content_async(get_generation_prompt(tokens), stream=True)
+    chunks = []
+
+    try:
+        async for chunk in response:
+            chunks.append(chunk.text)
+            yield chunk.text
+    except BaseException:
+        cancel_stream(response)
+        raise
+
+    await sync_to_async(generation_cache.set)(key, "".join(chunks))
+
+
+def sse_event(data, event=None):
+    """Formats a server-sent event whose data is the JSON encoded payload.
+    """
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
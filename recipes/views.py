@@ -1,63 +1,189 @@
 """This module contains the recipe related views.
 """
-from rest_framework import status, filters
+import uuid
+from contextlib import aclosing, closing
+from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.generics import CreateAPIView, ListAPIView, UpdateAPIView, DestroyAPIView
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from recipes.models import Recipe
-from recipes.serializers import IngredientsSerializer, RecipeSerializer
-from recipes.constants import RECIPE_GENERATION_PROMPT
-from recipes.utils import getGeminiModel
+from celery.result import AsyncResult
+from celery import states
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest
+from authentication.authentication import CachedJWTAuthentication
+from authentication.models import UserProfile
+from recipes.importers import RecipeImporter, get_import_format, open_text
+from recipes.ingredients import parse_ingredients
+from recipes.models import Ingredient, Recipe
+from recipes.serializers import (
+    BulkSaveRecipesSerializer,
+    IngredientsSerializer,
+    PantryRecipeSerializer,
+    PantryRecipeValuesSerializer,
+    RecipeImportSerializer,
+    RecipeListSerializer,
+    RecipeListValuesSerializer,
+    RecipeSerializer,
+)
+from recipes.constants import (
+    ASYNC,
+    EXPORT_FIELDS,
+    GENERATION_DEFAULT_MODE,
+    IMPORT_MAX_REPORTED_ERRORS,
+    SAVE,
+    SEARCH_FIELDS,
+    SYNC,
+    TRENDING_CACHE_TTL,
+)
+from recipes.tasks import (
+    acquire_generation_slot,
+    generate_recipe_task,
+    get_job_owner,
+    release_generation_slot,
+    set_job_owner,
+)
+from recipes.saved_recipes import save_recipes, unsave_recipes
+from recipes.trending import get_last_recompute
+from recipes.utils import astream_recipe, generate_recipe, sse_event, stream_recipe
+from recipeApp.conditional import ConditionalGetMixin, bump_model_versions, get_model_versions
+from recipeApp.exports import ExportAPIView
+from recipeApp.fast_path import FastPathMixin
+from recipeApp.query_plans import QueryPlanMixin
+from recipeApp.response_cache import CachedResponseMixin
+from recipeApp.search import FullTextSearchFilter
 
 
 User = get_user_model()
 
-class PublicRecipeListAPIView(ListAPIView):
-    """Returns the public recipes.
+class PublicRecipeListAPIView(ConditionalGetMixin, CachedResponseMixin, FastPathMixin, QueryPlanMixin, ListAPIView):
+    """Returns the public recipes. Unchanged pages are answered with 304 Not Modified, and pages are served from
+    the response cache.
     """
-    serializer_class = RecipeSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = RecipeListSerializer
+    values_serializer_class = RecipeListValuesSerializer
+    conditional_models = [Recipe, UserProfile, User, UserProfile.saved_recipes.through]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "ingredients", "instructions"]
+    filter_backends = [FullTextSearchFilter]
+    search_fields = SEARCH_FIELDS
 
     def get_queryset(self):
         return Recipe.objects.filter(is_public=True)
     
 
-class NonPostedPublicRecipeListAPIView(ListAPIView):
-    """Returns the public recipes excluding the public recipes posted by current authenticated user.
+class NonPostedPublicRecipeListAPIView(CachedResponseMixin, FastPathMixin, QueryPlanMixin, ListAPIView):
+    """Returns the public recipes excluding the public recipes posted by current authenticated user. Pages are
+    cached per user.
     """
-    serializer_class = RecipeSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = RecipeListSerializer
+    values_serializer_class = RecipeListValuesSerializer
+    response_cache_models = [Recipe, UserProfile, User, UserProfile.saved_recipes.through]
+    response_cache_per_user = True
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "ingredients", "instructions"]
+    filter_backends = [FullTextSearchFilter]
+    search_fields = SEARCH_FIELDS
 
     def get_queryset(self):
         user = self.request.user.profile
         return Recipe.objects.filter(is_public=True).exclude(creator=user)
 
 
-class PrivateRecipeListAPIView(ListAPIView):
+class PantryRecipeListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
+    """Returns the public recipes that use any of the ingredients given in the ingredients query parameter, ranked
+    by the share of each recipe's ingredients that are covered. Pages are numbered, cursors are refused.
+    """
+    serializer_class = PantryRecipeSerializer
+    values_serializer_class = PantryRecipeValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    # Keyset pages would be ordered by (created_at, id) instead of the coverage.
+    allow_cursor = False
+
+    def get_queryset(self):
+        serializer = IngredientsSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        names = parse_ingredients(serializer.validated_data["ingredients"])
+        ingredient_ids = Ingredient.objects.filter(name__in=names).values("id")
+
+        return Recipe.objects.filter(
+            is_public=True,
+            ingredient_entries__ingredient__in=ingredient_ids,
+        ).annotate(
+            matched_ingredients=Count("ingredient_entries"),
+            coverage=Cast("matched_ingredients", FloatField()) / F("ingredient_count"),
+        ).order_by("-coverage", "-matched_ingredients", "-id")
+
+
+class TrendingRecipeListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
+    """Returns the public recipes ranked by their time-decayed trending score. Pages are cached until the next
+    trending recompute or recipe write, and at most for TRENDING_CACHE_TTL.
+    """
+    serializer_class = RecipeListSerializer
+    values_serializer_class = RecipeListValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-trending_score", "-id")
+
+    def get_queryset(self):
+        return Recipe.objects.filter(is_public=True, trending_score__gt=0).order_by("-trending_score", "-id")
+
+    def list(self, request, *args, **kwargs):
+        version = get_model_versions([Recipe])[0]
+        # Pages hold absolute image URLs, so they are cached per scheme and host.
+        key = (
+            f"recipes:trending:{get_last_recompute()}:{version}:{request.scheme}:{request.get_host()}:"
+            f"{request.query_params.urlencode()}"
+        )
+        data = cache.get(key)
+
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, timeout=TRENDING_CACHE_TTL)
+        return Response(data)
+
+
+class PrivateRecipeListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
     """Returns the private recipes.
     """
-    serializer_class = RecipeSerializer
-    authentication_classes = [JWTAuthentication]
+    serializer_class = RecipeListSerializer
+    values_serializer_class = RecipeListValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Recipe.objects.filter(is_public=False)
 
 
+class RecipeDetailAPIView(QueryPlanMixin, RetrieveAPIView):
+    """Returns a recipe with its ingredients and instructions. Private recipes are only visible to their creator
+    and to admins.
+    """
+    serializer_class = RecipeSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+
+        if user.is_staff:
+            return Recipe.objects.all()
+        return Recipe.objects.filter(Q(is_public=True) | Q(creator__user=user))
+
+
 class SaveRecipeAPIView(APIView):
     """Saves/unsaves a recipe for the authenticated user.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
@@ -65,7 +191,7 @@ class SaveRecipeAPIView(APIView):
         recipe = get_object_or_404(Recipe, id=recipe_id)
         user = self.request.user.profile
 
-        if recipe not in user.saved_recipes.all():
+        if not user.saved_recipes.filter(pk=recipe.pk).exists():
             user.saved_recipes.add(recipe)
             return Response({"message": "Recipe saved successfully."}, status=status.HTTP_200_OK)
         else:
@@ -76,28 +202,54 @@ class SaveRecipeAPIView(APIView):
         recipe = get_object_or_404(Recipe, id=recipe_id)
         user = self.request.user.profile
 
-        if recipe in user.saved_recipes.all():
+        if user.saved_recipes.filter(pk=recipe.pk).exists():
             user.saved_recipes.remove(recipe)
             return Response({"message": "Recipe removed successfully."}, status=status.HTTP_200_OK)
         else:
             return Response({"message": "Recipe not found in saved recipes."}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkSaveRecipeAPIView(APIView):
+    """Saves/unsaves a list of recipes for the authenticated user in one transaction and returns the result of each
+    recipe id.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkSaveRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data["action"]
+        recipe_ids = serializer.validated_data["ids"]
+        user = self.request.user.profile
+
+        if action == SAVE:
+            results = save_recipes(user, recipe_ids)
+        else:
+            results = unsave_recipes(user, recipe_ids)
+
+        return Response(
+            {"results": [{"id": recipe_id, "status": result} for recipe_id, result in results.items()]},
+            status=status.HTTP_200_OK,
+        )
         
 
-class PostedRecipeListAPIView(ListAPIView):
+class PostedRecipeListAPIView(FastPathMixin, QueryPlanMixin, ListAPIView):
     """Get the recipes posted by the authenticated user.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    serializer_class = RecipeSerializer
+    serializer_class = RecipeListSerializer
+    values_serializer_class = RecipeListValuesSerializer
     
     def get_queryset(self):
-        return Recipe.objects.filter(creator=self.request.user.profile).select_related("creator")
+        return Recipe.objects.filter(creator=self.request.user.profile)
     
 
 class RecipeCreateAPIView(CreateAPIView):
     """Adds a recipe created by the current authenticated user to the database. 
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = RecipeSerializer
 
@@ -109,12 +261,55 @@ class RecipeCreateAPIView(CreateAPIView):
         return Response({"message": "Recipe added successfully"}, status=status.HTTP_201_CREATED)
 
 
+class RecipeImportAPIView(APIView):
+    """Imports the recipes of an uploaded JSON lines or CSV file for the admin, who is the creator of the rows
+    without a creator username and so needs a user profile. Returns the import report with the row errors.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        if not hasattr(request.user, "profile"):
+            return Response(
+                {"detail": "Recipes can only be imported by a user with a profile."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = RecipeImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        try:
+            import_format = get_import_format(upload.name, serializer.validated_data.get("format"))
+        except ValueError as error:
+            return Response({"message": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = RecipeImporter(
+            request.user.profile,
+            batch_size=serializer.validated_data["batch_size"],
+            dry_run=serializer.validated_data["dry_run"],
+        )
+        report = importer.import_file(open_text(upload.file), import_format)
+        return Response(report.as_dict(max_errors=IMPORT_MAX_REPORTED_ERRORS), status=status.HTTP_200_OK)
+
+
+class RecipeExportAPIView(ExportAPIView):
+    """Streams all the public recipes as NDJSON or CSV for admins.
+    """
+    export_name = "recipes"
+    export_fields = EXPORT_FIELDS
+
+    def get_queryset(self):
+        return Recipe.objects.filter(is_public=True)
+
+
 class RecipeUpdateAPIView(UpdateAPIView):
     """Updates a recipe. Also, removes the recipe from saved recipes of all the users if marked private during update.
     """
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def perform_update(self, serializer, partial=True):
@@ -124,7 +319,14 @@ class RecipeUpdateAPIView(UpdateAPIView):
         updated_recipe = self.get_object()
           
         if not updated_recipe.is_public and was_public:
-            Recipe.saved_by_users.through.objects.filter(recipe_id=recipe.id).delete()
+            with transaction.atomic():
+                removed, _ = Recipe.saved_by_users.through.objects.filter(recipe_id=recipe.id).delete()
+                Recipe.objects.filter(pk=recipe.id).update(
+                    save_count=Greatest(F("save_count") - removed, Value(0)),
+                    pending_saves=0,
+                    trending_score=0,
+                )
+                bump_model_versions(Recipe.saved_by_users.through)
 
     def update(self, request, *args, **kwargs):
         super().update(request, *args, **kwargs)
@@ -136,23 +338,120 @@ class RecipeDeleteAPIView(DestroyAPIView):
     """
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
 
 class GenerateRecipeAPIView(APIView):
-    """Generates a recipe for given ingredients provided by logged in user using AI model.
+    """Generates a recipe for given ingredients provided by logged in user using AI model. With ?mode=async the
+    generation is queued as a celery job and the response carries the url to poll for its result.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
         serializer = IngredientsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         ingredients = serializer.validated_data["ingredients"]
+        mode = request.query_params.get("mode", GENERATION_DEFAULT_MODE)
+
+        if mode == SYNC:
+            content = generate_recipe(ingredients)
+            return Response({"recipe": content}, status=status.HTTP_200_OK)
+
+        if mode != ASYNC:
+            return Response({"message": f"Mode must be {SYNC} or {ASYNC}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        job_id = str(uuid.uuid4())
+
+        if not acquire_generation_slot(job_id):
+            return Response(
+                {"message": "Too many recipes are being generated. Please try again shortly."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
 
-        model = getGeminiModel()
-        response = model.generate_content(f"{RECIPE_GENERATION_PROMPT} {ingredients}")
-        content = response.text
-        return Response({"recipe": content}, status=status.HTTP_200_OK)
+        try:
+            job = generate_recipe_task.apply_async((ingredients,), task_id=job_id)
+        except Exception:
+            release_generation_slot(job_id)
+            raise
+
+        set_job_owner(job.id, request.user.id)
+        return Response(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": reverse("recipe-generate-job", kwargs={"job_id": job.id}),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class GenerateRecipeJobAPIView(APIView):
+    """Returns the status of a recipe generation job queued by the authenticated user, and the recipe once ready.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job_id = str(job_id)
+
+        if get_job_owner(job_id) != request.user.id:
+            return Response({"message": "Recipe generation job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        job = AsyncResult(job_id, app=generate_recipe_task.app)
+        data = {"job_id": job_id, "status": job.status}
+
+        if job.status == states.SUCCESS:
+            data["recipe"] = job.result["recipe"]
+        elif job.status == states.FAILURE:
+            data["message"] = "Recipe could not be generated. Please try again."
+
+        if job.status in states.READY_STATES:
+            return Response(data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_202_ACCEPTED)
     
+
+
+
+class GenerateRecipeStreamAPIView(APIView):
+    """Streams the recipe generated for the given ingredients as server-sent events: a "chunk" event per piece of
+    text, then a "done" event, or an "error" event if generation fails.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = IngredientsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ingredients = serializer.validated_data["ingredients"]
+
+        if isinstance(request._request, ASGIRequest):
+            events = self.async_events(ingredients)
+        else:
+            events = self.events(ingredients)
+
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def events(self, ingredients):
+        try:
+            with closing(stream_recipe(ingredients)) as chunks:
+                for text in chunks:
+                    yield sse_event({"text": text}, event="chunk")
+        except Exception:
+            yield sse_event({"message": "Recipe could not be generated. Please try again."}, event="error")
+            return
+        yield sse_event({}, event="done")
+
+    async def async_events(self, ingredients):
+        try:
+            async with aclosing(astream_recipe(ingredients)) as chunks:
+                async for text in chunks:
+                    yield sse_event({"text": text}, event="chunk")
+        except Exception:
+            yield sse_event({"message": "Recipe could not be generated. Please try again."}, event="error")
+            return
+        yield sse_event({}, event="done")